@@ -0,0 +1,213 @@
+"""Быстрая загрузка датасета adult (census income) для assignment_pandas.py.
+
+В файле после запятых стоят пробелы. Раньше они убирались регулярным
+разделителем sep=',\\s*', а он работает только в медленном парсере на чистом
+Python и даёт колонки типа object. Здесь пробелы снимаются skipinitialspace
+(C-парсер) или utf8_trim_whitespace (pyarrow), а колонкам сразу задаются
+типы: категории для строковых признаков и маленькие целые для чисел.
+
+Большой локальный файл можно читать порциями (chunksize) или параллельно
+в нескольких процессах (processes) - файл делится на диапазоны байтов по
+границам строк. Прочитанная таблица сохраняется в каталог кэша (Parquet,
+если установлен pyarrow, иначе pickle) и при следующем запуске читается
+оттуда, пока исходный файл не изменится.
+
+Запуск из каталога numpy_pandas_tasks:
+    python adult_loader.py adult.data --processes 4
+"""
+import argparse
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+import pandas as pd
+try:
+    import pyarrow as pa # нужен только для engine='pyarrow' и кэша в Parquet
+    import pyarrow.compute as pc
+    import pyarrow.csv
+except ImportError:
+    pa = None
+
+ADULT_URL = 'https://archive.ics.uci.edu/ml/machine-learning-databases/adult/adult.data'
+CACHE_DIR = '.adult_cache'
+LOADER_VERSION = 2 # Увеличить при изменении типов колонок, чтобы старый кэш не использовался
+
+COLUMNS = [
+    'age', 'workclass', 'fnlwgt', 'education', 'education-num',
+    'marital-status', 'occupation', 'relationship', 'race', 'sex',
+    'capital-gain', 'capital-loss', 'hours-per-week', 'native-country', 'salary'
+]
+
+CATEGORICAL_COLUMNS = ['workclass', 'education', 'race', 'sex', 'native-country', 'salary']
+
+# Самые узкие типы, в которые помещаются значения датасета (возраст до 90, часы до 99, capital-gain до 99999)
+NUMERIC_DTYPES = {
+    'age': 'int8',
+    'fnlwgt': 'int32',
+    'education-num': 'int8',
+    'capital-gain': 'int32',
+    'capital-loss': 'int16',
+    'hours-per-week': 'int8',
+}
+
+DTYPES = {**NUMERIC_DTYPES, **{column: 'category' for column in CATEGORICAL_COLUMNS}}
+# Остальные колонки - строки, их тип выбирает парсер
+STRING_COLUMNS = [column for column in COLUMNS if column not in DTYPES]
+
+_READ_OPTIONS = dict(header=None, names=COLUMNS, sep=',', skipinitialspace=True, na_values='?',
+                     dtype=DTYPES)
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Склеивает порции, приводя категориальные колонки к общему отсортированному набору категорий.
+
+    В порции, где строковая колонка целиком состоит из пропусков, парсер
+    выбирает для неё другой тип - такие колонки приводятся к типу из
+    остальных порций, иначе после concat получился бы object.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    for column in STRING_COLUMNS:
+        typed = [frame[column].dtype for frame in frames if frame[column].notna().any()]
+        if typed:
+            for frame in frames:
+                frame[column] = frame[column].astype(typed[0])
+    for column in CATEGORICAL_COLUMNS:
+        categories = sorted(set().union(*(frame[column].cat.categories for frame in frames)))
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def _read_c(source, chunksize: Optional[int]) -> pd.DataFrame:
+    if chunksize:
+        return concat_frames(list(pd.read_csv(source, chunksize=chunksize, **_READ_OPTIONS)))
+    return pd.read_csv(source, **_READ_OPTIONS)
+
+def iter_adult_chunks(source: str = ADULT_URL, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Отдаёт датасет порциями по chunksize строк с теми же типами, что и load_adult."""
+    with pd.read_csv(source, chunksize=chunksize, **_READ_OPTIONS) as reader:
+        yield from reader
+
+def _read_pyarrow(path: str) -> pd.DataFrame:
+    """Читает файл многопоточным CSV-парсером pyarrow, снимает пробелы и приводит типы."""
+    table = pyarrow.csv.read_csv(
+        path,
+        read_options=pyarrow.csv.ReadOptions(column_names=COLUMNS),
+        convert_options=pyarrow.csv.ConvertOptions(column_types={column: pa.string() for column in COLUMNS}),
+    )
+    columns = {}
+    for name in COLUMNS:
+        values = pc.utf8_trim_whitespace(table[name])
+        values = pc.if_else(pc.equal(values, '?'), pa.scalar(None, pa.string()), values)
+        if name in NUMERIC_DTYPES:
+            columns[name] = pc.cast(values, getattr(pa, NUMERIC_DTYPES[name])())
+        elif name in CATEGORICAL_COLUMNS:
+            columns[name] = pc.dictionary_encode(values)
+        else:
+            columns[name] = values
+    frame = pa.table(columns).to_pandas()
+    for column in CATEGORICAL_COLUMNS:
+        # Категории в том же (отсортированном) порядке, что и у C-парсера
+        frame[column] = frame[column].cat.reorder_categories(sorted(frame[column].cat.categories))
+    return frame
+
+def _split_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """Делит файл на parts диапазонов байтов, каждый из которых начинается с новой строки."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for part in range(1, parts):
+            f.seek(max(size * part // parts, bounds[-1]))
+            f.readline() # дочитываем строку, на которую попали
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _read_range(path: str, start: int, end: int) -> pd.DataFrame:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), **_READ_OPTIONS)
+
+def _read_parallel(path: str, processes: int) -> pd.DataFrame:
+    ranges = _split_ranges(path, processes)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        frames = list(executor.map(_read_range, [path] * len(ranges), *zip(*ranges)))
+    return concat_frames(frames)
+
+def _is_url(source: str) -> bool:
+    return source.startswith(('http://', 'https://', 'ftp://'))
+
+def cache_path(source: str, cache_dir: str = CACHE_DIR) -> str:
+    """Путь к кэшу для источника: для файла ключ зависит от его размера и времени изменения."""
+    if _is_url(source):
+        fingerprint = source
+    else:
+        stat = os.stat(source)
+        fingerprint = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}"
+    key = hashlib.sha1(f"{LOADER_VERSION}|{fingerprint}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"adult_{key}.{'parquet' if pa is not None else 'pickle'}")
+
+def _read_cache(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+
+def _write_cache(frame: pd.DataFrame, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if path.endswith('.parquet'):
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path) # параллельный запуск не увидит недописанный файл
+
+def load_adult(source: str = ADULT_URL, engine: str = 'c', chunksize: Optional[int] = None,
+               processes: Optional[int] = None, cache_dir: Optional[str] = CACHE_DIR) -> pd.DataFrame:
+    """Загружает датасет adult с типизированными колонками.
+
+    engine - 'c' (pandas) или 'pyarrow'; chunksize - читать C-парсером
+    порциями; processes - читать локальный файл параллельно в нескольких
+    процессах. cache_dir=None отключает кэш.
+    """
+    if engine not in ('c', 'pyarrow'):
+        raise ValueError(f"Неизвестный парсер: {engine}")
+    if engine == 'pyarrow' and pa is None:
+        raise RuntimeError("Для engine='pyarrow' установите пакет pyarrow.")
+    if (processes or engine == 'pyarrow') and _is_url(source):
+        raise ValueError("Параллельное чтение и pyarrow работают только с локальным файлом.")
+
+    cached = cache_path(source, cache_dir) if cache_dir else None
+    if cached and os.path.exists(cached):
+        return _read_cache(cached)
+
+    if engine == 'pyarrow':
+        frame = _read_pyarrow(source)
+    elif processes and processes > 1:
+        frame = _read_parallel(source, processes)
+    else:
+        frame = _read_c(source, chunksize)
+
+    if cached:
+        _write_cache(frame, cached)
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка датасета adult с типизированными колонками.")
+    parser.add_argument('source', nargs='?', default=ADULT_URL, help='Путь к файлу или URL')
+    parser.add_argument('--engine', choices=['c', 'pyarrow'], default='c')
+    parser.add_argument('--chunksize', type=int, default=None, help='Читать порциями по столько строк')
+    parser.add_argument('--processes', type=int, default=None, help='Читать файл параллельно в нескольких процессах')
+    parser.add_argument('--cache-dir', type=str, default=CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать и не создавать кэш')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = load_adult(args.source, args.engine, args.chunksize, args.processes,
+                      None if args.no_cache else args.cache_dir)
+    elapsed = time.perf_counter() - started
+    print(f"Прочитано строк: {len(data)} за {elapsed:.2f} с, "
+          f"память: {data.memory_usage(deep=True).sum() / 2 ** 20:.1f} МБ")
+    print(data.dtypes)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import numpy as np
+from dedup_ops import deduplicate, rows_not_all_equal
+from match_ops import rows_matching_all
+from product_ops import CartesianProduct
 
 arr = np.random.randint(0, 20, 10)
 print(f"Исходный массив: {arr}")
@@ -24,8 +27,9 @@ arr1 = np.array([[1, 'A'],
 print("Исходный массив:")
 print(arr1)
 
-grids = np.meshgrid(*arr1.T)
-cartesian_product = np.stack(grids, axis=-1).reshape(-1, arr1.shape[1])
+# Комбинации вычисляются по номеру, без сеток meshgrid (см. product_ops.py);
+# CartesianProduct(...).chunks(n) перебирает большое произведение порциями
+cartesian_product = CartesianProduct(*arr1.T).stack()
 print("\nПрямое (декартово) произведение:")
 print(cartesian_product)
 
@@ -38,9 +42,8 @@ arr_B = np.random.randint(0, 10, size=(2, 2))
 print("Массив A:\n", arr_A)
 print("\nМассив B:\n", arr_B)
 
-mask1 = np.any(np.isin(arr_A, arr_B[0]), axis=1)
-mask2 = np.any(np.isin(arr_A, arr_B[1]), axis=1)
-combined_mask = mask1 & mask2
+# Все строки B за один вызов, а не отдельный np.isin на каждую (см. match_ops.py)
+combined_mask = rows_matching_all(arr_A, arr_B)
 
 result = arr_A[combined_mask]
 print("\nСтроки в A, содержащие элементы из каждой строки в B:")
@@ -51,7 +54,8 @@ print(result)
 
 arr2 = np.random.randint(0, 5, size=(10, 3))
 print("Исходная матрица:\n", arr2)
-unequal_rows = arr2[(arr2 != arr2[:, [0]]).any(axis=1)]
+# Столбцы сравниваются с первым по одному, без булевой матрицы размером с arr2
+unequal_rows = arr2[rows_not_all_equal(arr2)]
 
 print("\nСтроки, где не все значения равны:\n", unequal_rows)
 
@@ -64,5 +68,7 @@ arr3 = np.array([[0, 1, 2],
                 [3, 4, 5],
                 [9, 0, 1]])
 print("Исходный массив:\n", arr3)
-unique_rows = np.unique(arr3, axis=0)
+# Как np.unique(arr3, axis=0); order='first' сохранит исходный порядок строк,
+# а путь к .npy вместо массива - обработает файл больше памяти (см. dedup_ops.py)
+unique_rows = deduplicate(arr3, order='sorted').rows
 print("\nМассив без повторяющихся строк:\n", unique_rows)
@@ -1,13 +1,9 @@
 import pandas as pd
+from adult_loader import ADULT_URL, load_adult
+from group_ops import GroupPredicate, group_filter, prefix_category
 
-columns = [
-    'age', 'workclass', 'fnlwgt', 'education', 'education-num',
-    'marital-status', 'occupation', 'relationship', 'race', 'sex',
-    'capital-gain', 'capital-loss', 'hours-per-week', 'native-country', 'salary'
-]
-
-url = 'https://archive.ics.uci.edu/ml/machine-learning-databases/adult/adult.data'
-data = pd.read_csv(url, header=None, names=columns, sep=',\s*', na_values='?', engine='python')
+# C-парсер с типизированными колонками и кэшем на диске (см. adult_loader.py)
+data = load_adult(ADULT_URL)
 
 print("--- Первые 5 строк датасета ---")
 print(data.head())
@@ -49,7 +45,7 @@ is_all_higher_edu = high_earners_education.isin(higher_education).all()
 print(f"Утверждение, что все с доходом >50K имеют высшее образование, является: {is_all_higher_edu}")
 if not is_all_higher_edu:
     print("\nПримеры уровней образования, не относящихся к высшему, среди людей с доходом >50K:")
-    print(high_earners_education[~high_earners_education.isin(higher_education)].unique())
+    print(high_earners_education[~high_earners_education.isin(higher_education)].unique().tolist())
 print("\n" + "="*50 + "\n")
 
 
@@ -64,11 +60,11 @@ print("\n" + "="*50 + "\n")
 
 # --- Задача 8: Доля зарабатывающих >50K среди женатых и холостых мужчин ---
 print("--- 8. Доля зарабатывающих >50K: женатые vs холостые мужчины ---")
-men_data = data[data['sex'] == 'Male'].copy()
-men_data['marital_category'] = men_data['marital-status'].apply(
-    lambda x: 'Married' if x.startswith('Married') else 'Single'
-)
-salary_dist = pd.crosstab(men_data['marital_category'], men_data['salary'], normalize='index')
+men_data = data[data['sex'] == 'Male']
+# Категория вычисляется для каждого различного семейного положения, а не для каждой строки
+marital_category = prefix_category(men_data['marital-status'], 'Married', 'Married', 'Single',
+                                   name='marital_category')
+salary_dist = pd.crosstab(marital_category, men_data['salary'], normalize='index')
 print(salary_dist)
 print("\nВывод: Доля зарабатывающих много (>50K) значительно выше среди женатых мужчин.")
 print("\n" + "="*50 + "\n")
@@ -117,10 +113,9 @@ print("--- 14. Фильтрация групп по типу занятости
 print("Количество людей в каждой группе занятости (до фильтрации):")
 print(data['occupation'].value_counts())
 
-def filter_func(group):
-    return group['age'].mean() <= 40 and group['hours-per-week'].min() > 5
-
-filtered_groups = data.groupby('occupation').filter(filter_func)
+# Условия groupby().filter считаются агрегатами по всем группам сразу
+filtered_groups = group_filter(data, 'occupation', GroupPredicate('age', 'mean', '<=', 40),
+                               GroupPredicate('hours-per-week', 'min', '>', 5))
 print("\nКоличество людей в отфильтрованных группах по занятости:")
 print(filtered_groups['occupation'].value_counts())
 print("\n" + "="*50 + "\n")
\ No newline at end of file
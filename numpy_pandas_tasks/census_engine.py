@@ -0,0 +1,391 @@
+"""Однопроходный расчёт всех 14 задач assignment_pandas.py по порциям данных.
+
+В assignment_pandas.py каждая задача заново фильтрует и группирует весь
+датасет. Здесь файл читается порциями один раз, и каждая порция сворачивается
+в несколько маленьких накопителей GroupedAccumulator: количество, сумма,
+минимум и максимум по группам. Накопители объединяются между порциями (и
+между процессами - метод merge), поэтому память не зависит от размера файла.
+
+Возраст и часы в неделю - небольшие целые, поэтому для них хранятся точные
+гистограммы. По гистограмме среднее, стандартное отклонение, минимум,
+максимум и квартили (describe) считаются точно, а не приближённо.
+
+Запуск из каталога numpy_pandas_tasks:
+    python census_engine.py adult.data                 # отчёт как в assignment_pandas.py
+    python census_engine.py adult.data --benchmark     # сравнение с многопроходной версией
+"""
+import argparse
+import math
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from adult_loader import ADULT_URL, iter_adult_chunks, load_adult
+
+HIGHER_EDUCATION = ['Bachelors', 'Prof-school', 'Assoc-acdm', 'Assoc-voc', 'Masters', 'Doctorate']
+AGE_BINS = [15, 35, 70, 100]
+AGE_LABELS = ['young', 'adult', 'retiree']
+HEAD_ROWS = 5
+
+class GroupedAccumulator:
+    """Объединяемые агрегаты по группам: size, sum, min и max по колонкам порции.
+
+    Группы с пропусками в ключах сохраняются (dropna=False), а отбрасываются
+    уже при расчёте результата - так же, как это делает соответствующая
+    операция pandas в исходном скрипте. Частичные результаты порций
+    сливаются пачками по MERGE_EVERY, а не после каждой порции.
+    """
+    _COMBINE = {'size': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+    MERGE_EVERY = 32
+
+    def __init__(self, keys: List[str], **aggregations):
+        self.keys = keys
+        self.aggregations = aggregations # имя результата -> (колонка, операция)
+        self._parts: List[pd.DataFrame] = []
+
+    def update(self, chunk: pd.DataFrame):
+        grouped = chunk.groupby(self.keys, observed=True, dropna=False, sort=False)
+        # Отдельные вызовы size/sum/min/max заметно быстрее agg с именованными агрегатами
+        part = pd.DataFrame({
+            name: grouped.size() if op == 'size' else getattr(grouped[column], op)()
+            for name, (column, op) in self.aggregations.items()
+        })
+        self._parts.append(part)
+        if len(self._parts) >= self.MERGE_EVERY:
+            self._combine()
+
+    def merge(self, other: 'GroupedAccumulator'):
+        self._parts.extend(other._parts)
+        self._combine()
+
+    def _combine(self):
+        if len(self._parts) < 2:
+            return
+        combined = pd.concat(self._parts)
+        self._parts = [combined.groupby(level=list(range(len(self.keys))), dropna=False, sort=False).agg(
+            {name: self._COMBINE[op] for name, (_, op) in self.aggregations.items()}
+        )]
+
+    @property
+    def state(self) -> Optional[pd.DataFrame]:
+        self._combine()
+        return self._parts[0] if self._parts else None
+
+    @state.setter
+    def state(self, value: pd.DataFrame):
+        self._parts = [value]
+
+    def frame(self) -> pd.DataFrame:
+        """Результат в виде таблицы: колонки ключей и агрегатов."""
+        state = self.state
+        if state is None:
+            return pd.DataFrame(columns=self.keys + list(self.aggregations))
+        frame = state.reset_index()
+        for key in self.keys:
+            # После объединения порций категории разных порций превращаются в обычные значения
+            if isinstance(frame[key].dtype, pd.CategoricalDtype):
+                frame[key] = frame[key].astype(object)
+        return frame
+
+def describe_histogram(values: np.ndarray, counts: np.ndarray) -> Dict[str, float]:
+    """Показатели Series.describe() по гистограмме целых значений (квантили - линейная интерполяция)."""
+    order = np.argsort(values)
+    values = values[order].astype(np.float64)
+    counts = counts[order].astype(np.int64)
+    n = int(counts.sum())
+    mean = float((values * counts).sum() / n)
+    std = math.sqrt(float((counts * (values - mean) ** 2).sum()) / (n - 1)) if n > 1 else float('nan')
+    cumulative = np.cumsum(counts)
+
+    def at(index: int) -> float:
+        return values[np.searchsorted(cumulative, index, side='right')]
+
+    stats = {'count': float(n), 'mean': mean, 'std': std, 'min': values[0]}
+    for q, label in ((0.25, '25%'), (0.5, '50%'), (0.75, '75%')):
+        position = (n - 1) * q
+        lower = math.floor(position)
+        low, high = at(lower), at(min(lower + 1, n - 1))
+        stats[label] = low + (high - low) * (position - lower)
+    stats['max'] = values[-1]
+    return stats
+
+def _value_counts(counts: pd.Series, name: str) -> pd.Series:
+    counts = counts.sort_values(ascending=False, kind='stable')
+    counts.index.name = name
+    counts.name = 'count'
+    return counts
+
+class CensusAggregates:
+    """Класс для однопроходного расчёта результатов задач 1-14 по порциям датасета."""
+    def __init__(self):
+        self.rows = 0
+        self.us_rows = 0
+        self.head: Optional[pd.DataFrame] = None
+        self.sex_age = GroupedAccumulator(['sex', 'age'], n=('age', 'size'))
+        self.salary_age = GroupedAccumulator(['salary', 'age'], n=('age', 'size'))
+        self.race_sex_age = GroupedAccumulator(['race', 'sex', 'age'], n=('age', 'size'))
+        self.salary_hours = GroupedAccumulator(['salary', 'hours-per-week'], n=('age', 'size'))
+        self.salary_education = GroupedAccumulator(['salary', 'education'], n=('age', 'size'), first=('_row', 'min'))
+        self.men_marital = GroupedAccumulator(['sex', 'marital-status', 'salary'], n=('age', 'size'))
+        self.country_hours = GroupedAccumulator(['native-country', 'salary'], n=('hours-per-week', 'size'),
+                                                hours=('hours-per-week', 'sum'))
+        self.occupation = GroupedAccumulator(['occupation'], n=('age', 'size'), age=('age', 'sum'),
+                                             min_hours=('hours-per-week', 'min'))
+
+    def _accumulators(self) -> List[GroupedAccumulator]:
+        return [self.sex_age, self.salary_age, self.race_sex_age, self.salary_hours, self.salary_education,
+                self.men_marital, self.country_hours, self.occupation]
+
+    def update(self, chunk: pd.DataFrame):
+        """Сворачивает очередную порцию в накопители."""
+        if self.head is None or len(self.head) < HEAD_ROWS:
+            self.head = pd.concat([self.head, chunk.head(HEAD_ROWS)]).head(HEAD_ROWS) if self.head is not None \
+                else chunk.head(HEAD_ROWS).copy()
+        # Номер строки в файле - чтобы отчёт 6 перечислял уровни образования в порядке первого появления
+        chunk = chunk.assign(_row=np.arange(self.rows, self.rows + len(chunk)))
+        self.rows += len(chunk)
+        self.us_rows += int((chunk['native-country'] == 'United-States').sum())
+        for accumulator in self._accumulators():
+            accumulator.update(chunk)
+
+    def merge(self, other: 'CensusAggregates'):
+        """Объединяет с результатами, посчитанными по следующему за этим куску файла."""
+        if self.head is None or len(self.head) < HEAD_ROWS:
+            self.head = pd.concat([self.head, other.head]).head(HEAD_ROWS) if self.head is not None else other.head
+        shifted = other.salary_education.state
+        if shifted is not None:
+            other.salary_education.state = shifted.assign(first=shifted['first'] + self.rows)
+        self.rows += other.rows
+        self.us_rows += other.us_rows
+        for mine, theirs in zip(self._accumulators(), other._accumulators()):
+            mine.merge(theirs)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame]) -> 'CensusAggregates':
+        aggregates = cls()
+        for chunk in chunks:
+            aggregates.update(chunk)
+        return aggregates
+
+    def results(self) -> Dict[str, Any]:
+        """Результаты задач в том же виде, что и у многопроходной версии (multi_pass_results)."""
+        results: Dict[str, Any] = {'head': self.head.reset_index(drop=True)}
+
+        sex_age = self.sex_age.frame().dropna(subset=['sex'])
+        results['sex_counts'] = _value_counts(sex_age.groupby('sex')['n'].sum(), 'sex')
+        men = sex_age[sex_age['sex'] == 'Male']
+        results['avg_male_age'] = float((men['age'] * men['n']).sum() / men['n'].sum())
+        results['us_share'] = self.us_rows / self.rows * 100
+
+        salary_age = self.salary_age.frame().dropna(subset=['salary'])
+        by_salary = {salary: describe_histogram(group['age'].to_numpy(), group['n'].to_numpy())
+                     for salary, group in salary_age.groupby('salary', sort=True)}
+        results['age_stats_by_salary'] = pd.DataFrame(
+            {'mean': [s['mean'] for s in by_salary.values()], 'std': [s['std'] for s in by_salary.values()]},
+            index=pd.Index(list(by_salary), name='salary'))
+
+        education = self.salary_education.frame()
+        high_education = education[education['salary'] == '>50K']
+        not_higher = high_education[~high_education['education'].isin(HIGHER_EDUCATION)].sort_values('first')
+        results['is_all_higher_edu'] = not_higher.empty
+        results['non_higher_education'] = not_higher['education'].tolist()
+
+        race_sex_age = self.race_sex_age.frame().dropna(subset=['race', 'sex'])
+        describe = {key: describe_histogram(group['age'].to_numpy(), group['n'].to_numpy())
+                    for key, group in race_sex_age.groupby(['race', 'sex'], sort=True)}
+        results['age_stats_by_race_sex'] = pd.DataFrame(
+            list(describe.values()), index=pd.MultiIndex.from_tuples(list(describe), names=['race', 'sex']))
+        results['max_age_asian_male'] = int(results['age_stats_by_race_sex'].loc[('Asian-Pac-Islander', 'Male'), 'max'])
+
+        marital = self.men_marital.frame()
+        marital = marital[marital['sex'] == 'Male'].dropna(subset=['marital-status', 'salary'])
+        marital = marital.assign(marital_category=np.where(marital['marital-status'].str.startswith('Married'),
+                                                           'Married', 'Single'))
+        table = marital.pivot_table(index='marital_category', columns='salary', values='n', aggfunc='sum', fill_value=0)
+        results['salary_dist'] = table.div(table.sum(axis=1), axis=0)
+
+        hours = self.salary_hours.frame()
+        max_hours = hours['hours-per-week'].max()
+        at_max = hours[hours['hours-per-week'] == max_hours]
+        results['max_hours'] = int(max_hours)
+        results['people_with_max_hours'] = int(at_max['n'].sum())
+        results['rich_percentage_max_hours'] = at_max.loc[at_max['salary'] == '>50K', 'n'].sum() / at_max['n'].sum() * 100
+
+        country = self.country_hours.frame().dropna(subset=['native-country', 'salary'])
+        country_mean = country.groupby(['native-country', 'salary'], sort=True)[['hours', 'n']].sum()
+        results['avg_hours_by_country_salary'] = (country_mean['hours'] / country_mean['n']).unstack()
+
+        head_age = self.head[['age']].reset_index(drop=True)
+        results['age_group_head'] = head_age.assign(AgeGroup=pd.cut(head_age['age'], bins=AGE_BINS, labels=AGE_LABELS))
+        high_ages = salary_age[salary_age['salary'] == '>50K']
+        groups = pd.cut(high_ages['age'], bins=AGE_BINS, labels=AGE_LABELS)
+        high_by_group = high_ages['n'].groupby(groups, observed=False).sum()
+        results['high_earners_by_age'] = _value_counts(high_by_group, 'AgeGroup')
+        results['leader_group'] = results['high_earners_by_age'].idxmax()
+
+        occupation = self.occupation.frame().dropna(subset=['occupation']).set_index('occupation')
+        results['occupation_counts'] = _value_counts(occupation['n'], 'occupation')
+        passed = (occupation['age'] / occupation['n'] <= 40) & (occupation['min_hours'] > 5)
+        results['filtered_occupation_counts'] = _value_counts(occupation.loc[passed, 'n'], 'occupation')
+        return results
+
+def multi_pass_results(data: pd.DataFrame) -> Dict[str, Any]:
+    """Те же результаты, посчитанные так, как в assignment_pandas.py (отдельный проход на задачу)."""
+    results: Dict[str, Any] = {'head': data.head()}
+    results['sex_counts'] = data['sex'].value_counts()
+    results['avg_male_age'] = data[data['sex'] == 'Male']['age'].mean()
+    results['us_share'] = (data['native-country'] == 'United-States').sum() / len(data) * 100
+    results['age_stats_by_salary'] = data.groupby('salary')['age'].agg(['mean', 'std'])
+
+    high_earners_education = data[data['salary'] == '>50K']['education']
+    results['is_all_higher_edu'] = bool(high_earners_education.isin(HIGHER_EDUCATION).all())
+    results['non_higher_education'] = high_earners_education[
+        ~high_earners_education.isin(HIGHER_EDUCATION)].unique().tolist()
+
+    results['age_stats_by_race_sex'] = data.groupby(['race', 'sex'])['age'].describe()
+    results['max_age_asian_male'] = int(results['age_stats_by_race_sex'].loc[('Asian-Pac-Islander', 'Male'), 'max'])
+
+    men_data = data[data['sex'] == 'Male'].copy()
+    men_data['marital_category'] = men_data['marital-status'].apply(
+        lambda x: 'Married' if x.startswith('Married') else 'Single'
+    )
+    results['salary_dist'] = pd.crosstab(men_data['marital_category'], men_data['salary'], normalize='index')
+
+    max_hours = data['hours-per-week'].max()
+    people_with_max_hours = data[data['hours-per-week'] == max_hours].shape[0]
+    results['max_hours'] = int(max_hours)
+    results['people_with_max_hours'] = people_with_max_hours
+    results['rich_percentage_max_hours'] = (
+        (data[data['hours-per-week'] == max_hours]['salary'] == '>50K').sum() / people_with_max_hours * 100)
+    results['avg_hours_by_country_salary'] = data.groupby(['native-country', 'salary'])['hours-per-week'].mean().unstack()
+
+    age_group = pd.cut(data['age'], bins=AGE_BINS, labels=AGE_LABELS, right=True)
+    results['age_group_head'] = data[['age']].assign(AgeGroup=age_group).head()
+    results['high_earners_by_age'] = age_group[data['salary'] == '>50K'].value_counts()
+    results['leader_group'] = results['high_earners_by_age'].idxmax()
+
+    results['occupation_counts'] = data['occupation'].value_counts()
+    filtered_groups = data.groupby('occupation').filter(
+        lambda group: group['age'].mean() <= 40 and group['hours-per-week'].min() > 5)
+    results['filtered_occupation_counts'] = filtered_groups['occupation'].value_counts()
+    return results
+
+def _plain(value):
+    """Приводит pandas-объект к виду, не зависящему от категориальных индексов и порядка равных строк."""
+    if isinstance(value, pd.Series):
+        return sorted((str(k), round(float(v), 9)) for k, v in value.items())
+    if isinstance(value, pd.DataFrame):
+        frame = value.astype(object).where(value.notna(), None)
+        return sorted((str(k), [round(float(v), 9) if isinstance(v, (int, float, np.number)) else v for v in row])
+                      for k, row in zip(frame.index, frame.itertuples(index=False)))
+    if isinstance(value, float):
+        return round(value, 9)
+    return value
+
+def compare_results(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """Возвращает имена результатов, которые отличаются (числа сравниваются до 9 знаков)."""
+    return [name for name in expected if _plain(expected[name]) != _plain(actual[name])]
+
+def print_report(results: Dict[str, Any]):
+    """Печатает результаты в том же виде, что и assignment_pandas.py."""
+    separator = "\n" + "=" * 50 + "\n"
+    print("--- Первые 5 строк датасета ---")
+    print(results['head'])
+    print(separator)
+    print("--- 1. Количество мужчин и женщин ---")
+    print(results['sex_counts'])
+    print(separator)
+    print("--- 2. Средний возраст мужчин ---")
+    print(f"Средний возраст мужчин: {results['avg_male_age']:.2f} лет")
+    print(separator)
+    print("--- 3. Доля граждан Соединенных Штатов ---")
+    print(f"Доля граждан США: {results['us_share']:.2f}%")
+    print(separator)
+    print("--- 4-5. Статистика возраста для зарабатывающих >50K и <=50K ---")
+    print(results['age_stats_by_salary'])
+    print(separator)
+    print("--- 6. Правда ли, что люди, которые получают >50k, имеют высшее образование? ---")
+    print(f"Утверждение, что все с доходом >50K имеют высшее образование, является: {results['is_all_higher_edu']}")
+    if not results['is_all_higher_edu']:
+        print("\nПримеры уровней образования, не относящихся к высшему, среди людей с доходом >50K:")
+        print(results['non_higher_education'])
+    print(separator)
+    print("--- 7. Статистика возраста для каждой расы и пола ---")
+    print(results['age_stats_by_race_sex'])
+    print(f"\nМаксимальный возраст мужчин расы Asian-Pac-Islander: {results['max_age_asian_male']} лет")
+    print(separator)
+    print("--- 8. Доля зарабатывающих >50K: женатые vs холостые мужчины ---")
+    print(results['salary_dist'])
+    print("\nВывод: Доля зарабатывающих много (>50K) значительно выше среди женатых мужчин.")
+    print(separator)
+    print("--- 9. Анализ максимального количества рабочих часов ---")
+    print(f"Максимальное количество часов в неделю: {results['max_hours']} часов")
+    print(f"Количество людей, работающих столько: {results['people_with_max_hours']} человек")
+    print(f"Процент зарабатывающих >50K среди них: {results['rich_percentage_max_hours']:.2f}%")
+    print(separator)
+    print("--- 10. Среднее время работы (hours-per-week) по странам и зарплате ---")
+    print(results['avg_hours_by_country_salary'].head(10))
+    print(separator)
+    print("--- 11. Создание возрастных групп ---")
+    print("Первые 5 строк с новой колонкой 'AgeGroup':")
+    print(results['age_group_head'])
+    print(separator)
+    print("--- 12-13. Количество зарабатывающих >50K по возрастным группам ---")
+    print("Количество зарабатывающих >50K в каждой группе:")
+    print(results['high_earners_by_age'])
+    print(f"\nВозрастная группа, где больше всего людей с доходом >50K: '{results['leader_group']}'")
+    print(separator)
+    print("--- 14. Фильтрация групп по типу занятости ---")
+    print("Количество людей в каждой группе занятости (до фильтрации):")
+    print(results['occupation_counts'])
+    print("\nКоличество людей в отфильтрованных группах по занятости:")
+    print(results['filtered_occupation_counts'])
+    print(separator)
+
+def _measure(run) -> tuple:
+    """Время и пик памяти Python (tracemalloc учитывает и буферы numpy)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def benchmark(source: str, chunksize: int, repeat: int):
+    """Сравнивает многопроходную версию (чтение целиком + задачи) с однопроходной по порциям."""
+    runs = {
+        'многопроходная': lambda: multi_pass_results(load_adult(source, cache_dir=None)),
+        'однопроходная': lambda: CensusAggregates.from_chunks(iter_adult_chunks(source, chunksize)).results(),
+    }
+    results = {}
+    print(f"{'версия':<16} {'медиана, с':>12} {'пик памяти, МБ':>16}")
+    for name, run in runs.items():
+        timings, peaks = [], []
+        for _ in range(repeat):
+            results[name], elapsed, peak = _measure(run)
+            timings.append(elapsed)
+            peaks.append(peak)
+        print(f"{name:<16} {sorted(timings)[len(timings) // 2]:>12.3f} {max(peaks) / 2 ** 20:>16.1f}")
+
+    mismatches = compare_results(results['многопроходная'], results['однопроходная'])
+    print(f"\nРезультаты совпадают: {not mismatches}")
+    if mismatches:
+        print(f"Отличаются: {', '.join(mismatches)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Однопроходный расчёт задач по датасету adult.")
+    parser.add_argument('source', nargs='?', default=ADULT_URL, help='Путь к файлу или URL')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='Строк в одной порции')
+    parser.add_argument('--benchmark', action='store_true', help='Сравнить с многопроходной версией')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.source, args.chunksize, args.repeat)
+        return
+    print_report(CensusAggregates.from_chunks(iter_adult_chunks(args.source, args.chunksize)).results())
+
+if __name__ == "__main__":
+    main()
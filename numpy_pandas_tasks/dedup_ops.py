@@ -0,0 +1,354 @@
+"""Удаление повторяющихся строк больших двумерных массивов (задачи 5 и 6 из assignment_numpy.py).
+
+np.unique(arr, axis=0) сортирует полную копию матрицы в памяти и теряет
+исходный порядок строк. deduplicate обрабатывает целочисленные массивы, в
+том числе .npy, открытые через memmap и не помещающиеся в память:
+
+1. вход читается порциями по chunk_rows строк; каждая строка - один
+   элемент через непрерывное представление (view) со структурным типом
+   void, по полю на столбец. Такие элементы целиком пишутся в разделы и
+   хешируются, а сортируются через np.lexsort по полям - в том же порядке,
+   что и np.unique(axis=0);
+2. повторы внутри порции убираются сразу, а оставшиеся строки вместе с
+   номером первого вхождения, числом повторов и номером записи
+   раскладываются по разделам: для order='first' - по хешу строки, для
+   order='sorted' - по диапазонам строк (границы берутся из выборки),
+   чтобы разделы шли в порядке сортировки. Одинаковые строки всегда
+   попадают в один раздел. Если разделов больше одного, они пишутся на
+   диск во временный каталог;
+3. каждый раздел загружается целиком и сводится отдельно: первое
+   вхождение - минимум номеров, число повторов - сумма.
+
+Результат - строки в порядке первого вхождения (order='first') или
+отсортированные (order='sorted'), номера первых вхождений и число
+повторов; обратные индексы (inverse) - по запросу. Строки результата и
+inverse можно сразу писать в .npy (out, inverse_out). В памяти остаются
+номера первых вхождений и числа повторов - по 8 байт каждое на различную
+строку.
+
+Запуск из каталога numpy_pandas_tasks:
+    python dedup_ops.py --rows 100K 1M 10M --values 100
+    python dedup_ops.py --rows 100M --dtype int32 --directory /tmp/dedup --unique-limit 0
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from np_bench import measure_peak, parse_count
+
+DEFAULT_MEMORY_LIMIT = 256 * 2 ** 20 # байт на порцию или раздел
+_META_DTYPE = np.dtype([('first', np.int64), ('count', np.int64), ('entry', np.int64)])
+_SAMPLE_PER_PARTITION = 1000 # строк выборки на раздел при order='sorted'
+
+class DedupResult(NamedTuple):
+    rows: np.ndarray # различные строки
+    index: np.ndarray # номер первого вхождения каждой из них во входе
+    counts: np.ndarray # сколько раз каждая встречается
+    inverse: Optional[np.ndarray] # номер строки результата для каждой строки входа
+
+def _open(source) -> np.ndarray:
+    """Массив или путь к .npy (открывается через memmap, без чтения в память)."""
+    array = np.load(source, mmap_mode='r') if isinstance(source, (str, os.PathLike)) else np.asarray(source)
+    if array.ndim != 2 or array.shape[1] == 0:
+        raise ValueError(f"Ожидается двумерный массив хотя бы с одним столбцом: {array.shape}")
+    if array.dtype.kind not in 'iub':
+        raise ValueError(f"Поддерживаются только целочисленные массивы, получено {array.dtype}")
+    return array
+
+def row_dtype(array: np.ndarray) -> np.dtype:
+    """Структурный тип void с полем на столбец: одна строка массива - один элемент."""
+    return np.dtype([(f"f{i}", array.dtype) for i in range(array.shape[1])])
+
+def row_view(block: np.ndarray) -> np.ndarray:
+    """Одномерное представление строк block без копирования, если block уже непрерывен."""
+    return np.ascontiguousarray(block).view(row_dtype(block)).reshape(-1)
+
+def row_hash(rows: np.ndarray) -> np.ndarray:
+    """64-битный хеш строк (структурный массив из row_view), столбец за столбцом."""
+    h = np.zeros(len(rows), dtype=np.uint64)
+    for name in rows.dtype.names:
+        column = rows[name]
+        bits = column.view(f"u{column.dtype.itemsize}") if column.dtype.kind != 'b' else column.view(np.uint8)
+        h ^= bits.astype(np.uint64)
+        h *= np.uint64(0x9E3779B97F4A7C15)
+        h ^= h >> np.uint64(29)
+    return h
+
+def unique_rows(rows: np.ndarray):
+    """np.unique(rows, return_index, return_inverse, return_counts) для структурного массива строк.
+
+    Сортировка идёт через np.lexsort по столбцам, а не сравнением элементов
+    void целиком, - порядок тот же, но в несколько раз быстрее.
+    """
+    order = np.lexsort([rows[name] for name in reversed(rows.dtype.names)])
+    ordered = rows[order]
+    change = np.zeros(len(rows), dtype=bool)
+    change[:1] = True
+    for name in rows.dtype.names:
+        change[1:] |= ordered[name][1:] != ordered[name][:-1]
+    starts = np.flatnonzero(change)
+    inverse = np.empty(len(rows), dtype=np.int64)
+    inverse[order] = np.cumsum(change) - 1
+    return ordered[starts], order[starts], inverse, np.diff(starts, append=len(rows))
+
+def rows_not_all_equal(source, chunk_rows: int = 1 << 20) -> np.ndarray:
+    """Маска строк, в которых не все значения равны (задача 5).
+
+    Вместо булевой матрицы размером с массив сравнивается по одному
+    столбцу с первым, порциями по chunk_rows строк.
+    """
+    array = _open(source)
+    mask = np.empty(len(array), dtype=bool)
+    for start in range(0, len(array), chunk_rows):
+        block = array[start:start + chunk_rows]
+        first = block[:, 0]
+        unequal = np.zeros(len(block), dtype=bool)
+        for j in range(1, block.shape[1]):
+            unequal |= block[:, j] != first
+        mask[start:start + len(block)] = unequal
+    return mask
+
+class _Partitions:
+    """Разделы строк и их метаданных: в памяти, если раздел один, иначе - файлы в каталоге."""
+    def __init__(self, count: int, dtype: np.dtype, directory: Optional[str]):
+        self.count, self.dtype, self.directory = count, dtype, directory
+        self._rows: List[List[np.ndarray]] = [[] for _ in range(count)]
+        self._meta: List[List[np.ndarray]] = [[] for _ in range(count)]
+        self._kept: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def _path(self, kind: str, p: int) -> str:
+        return os.path.join(self.directory, f"{kind}_{p}.bin")
+
+    def append(self, p: int, rows: np.ndarray, meta: np.ndarray):
+        if self.directory is None:
+            self._rows[p].append(rows)
+            self._meta[p].append(meta)
+            return
+        with open(self._path('rows', p), 'ab') as f:
+            rows.tofile(f)
+        with open(self._path('meta', p), 'ab') as f:
+            meta.tofile(f)
+
+    def read(self, p: int):
+        """Все строки и метаданные раздела p; файлы раздела удаляются после чтения."""
+        if self.directory is None:
+            rows = np.concatenate(self._rows[p]) if self._rows[p] else np.empty(0, self.dtype)
+            meta = np.concatenate(self._meta[p]) if self._meta[p] else np.empty(0, _META_DTYPE)
+            self._rows[p], self._meta[p] = [], []
+            return rows, meta
+        if not os.path.exists(self._path('rows', p)):
+            return np.empty(0, self.dtype), np.empty(0, _META_DTYPE)
+        rows, meta = np.fromfile(self._path('rows', p), self.dtype), np.fromfile(self._path('meta', p), _META_DTYPE)
+        os.remove(self._path('rows', p))
+        os.remove(self._path('meta', p))
+        return rows, meta
+
+    def keep(self, kind: str, p: int, array: np.ndarray):
+        """Промежуточный результат раздела до сборки ответа."""
+        if self.directory is None:
+            self._kept[kind, p] = array
+        else:
+            array.tofile(self._path(kind, p))
+
+    def take(self, kind: str, p: int, dtype: np.dtype) -> np.ndarray:
+        if self.directory is None:
+            return self._kept.pop((kind, p))
+        path = self._path(kind, p)
+        array = np.fromfile(path, dtype)
+        os.remove(path)
+        return array
+
+def _splitters(array: np.ndarray, partitions: int, seed: int = 0) -> np.ndarray:
+    """Границы диапазонов строк для order='sorted' по случайной выборке строк."""
+    size = min(len(array), partitions * _SAMPLE_PER_PARTITION)
+    positions = np.unique(np.random.default_rng(seed).integers(0, len(array), size))
+    sample = unique_rows(row_view(array[positions]))[0]
+    cuts = np.linspace(0, len(sample), partitions + 1)[1:-1].astype(np.int64)
+    return np.unique(sample[cuts])
+
+def _allocate(shape, dtype, path: Optional[str]) -> np.ndarray:
+    """Массив в памяти или, если задан путь, .npy через memmap."""
+    shape = (shape,) if isinstance(shape, int) else shape
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+def deduplicate(source, order: str = 'first', return_inverse: bool = False,
+                memory_limit: int = DEFAULT_MEMORY_LIMIT, chunk_rows: Optional[int] = None,
+                out: Optional[str] = None, inverse_out: Optional[str] = None,
+                tmp_dir: Optional[str] = None) -> DedupResult:
+    """Различные строки двумерного целочисленного массива или .npy-файла.
+
+    order='first' - в порядке первого вхождения, order='sorted' - как
+    np.unique(axis=0). memory_limit ограничивает размер порции и раздела;
+    если вход больше, разделы пишутся во временный каталог в tmp_dir.
+    out и inverse_out - пути .npy для строк результата и обратных индексов.
+    """
+    if order not in ('first', 'sorted'):
+        raise ValueError(f"order должен быть 'first' или 'sorted', получено {order!r}")
+    array = _open(source)
+    n, dtype = len(array), row_dtype(array)
+    row_bytes = dtype.itemsize
+    if chunk_rows is None:
+        chunk_rows = max(1, memory_limit // (4 * row_bytes + 64))
+    # Раздел держит строки, метаданные и отсортированную копию; запас в полтора раза на неравномерность
+    partitions = max(1, int(np.ceil(1.5 * n * (2 * row_bytes + 64) / memory_limit)))
+    splitters = None
+    if order == 'sorted' and partitions > 1:
+        splitters = _splitters(array, partitions)
+        partitions = len(splitters) + 1
+    directory = tempfile.mkdtemp(prefix='dedup_', dir=tmp_dir) if partitions > 1 else None
+    try:
+        return _deduplicate(array, dtype, order, return_inverse, chunk_rows, partitions, splitters,
+                            directory, out, inverse_out)
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+def _deduplicate(array, dtype, order, return_inverse, chunk_rows, partitions, splitters,
+                 directory, out, inverse_out) -> DedupResult:
+    n = len(array)
+    store = _Partitions(partitions, dtype, directory)
+    # Номер записи (строки без повторов внутри порции) для каждой строки входа
+    row_entry = None
+    if return_inverse:
+        row_entry = _allocate(n, np.int64, os.path.join(directory, 'row_entry.npy') if directory else None)
+
+    # Проход 1: повторы внутри порции и раскладка по разделам
+    entries = 0
+    for start in range(0, n, chunk_rows):
+        rows = row_view(array[start:start + chunk_rows])
+        unique, first, local, counts = unique_rows(rows)
+        if row_entry is not None:
+            row_entry[start:start + len(rows)] = entries + local
+        meta = np.empty(len(unique), dtype=_META_DTYPE)
+        meta['first'], meta['count'] = start + first, counts
+        meta['entry'] = np.arange(entries, entries + len(unique))
+        entries += len(unique)
+        if partitions == 1:
+            store.append(0, unique, meta)
+            continue
+        if splitters is not None:
+            part = np.searchsorted(splitters, unique, side='right')
+        else:
+            part = (row_hash(unique) % np.uint64(partitions)).astype(np.int64)
+        order_in_chunk = np.argsort(part, kind='stable')
+        bounds = np.searchsorted(part[order_in_chunk], np.arange(partitions + 1))
+        for p in range(partitions):
+            picked = order_in_chunk[bounds[p]:bounds[p + 1]]
+            if len(picked):
+                store.append(p, unique[picked], meta[picked])
+
+    # Проход 2: каждый раздел сводится отдельно
+    firsts, totals = [], []
+    for p in range(partitions):
+        rows, meta = store.read(p)
+        unique, _, inverse, _ = unique_rows(rows)
+        first = np.full(len(unique), n, dtype=np.int64)
+        np.minimum.at(first, inverse, meta['first'])
+        totals.append(np.bincount(inverse, weights=meta['count'], minlength=len(unique)).astype(np.int64))
+        firsts.append(first)
+        store.keep('unique', p, unique)
+        if return_inverse:
+            store.keep('inverse', p, np.stack([meta['entry'], inverse.astype(np.int64)]))
+
+    # Номера строк результата: по разделам подряд (sorted) или по рангу первого вхождения (first)
+    sizes = [len(first) for first in firsts]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    total = int(offsets[-1])
+    if order == 'first':
+        ranks = np.empty(total, dtype=np.int64)
+        ranks[np.argsort(np.concatenate(firsts), kind='stable')] = np.arange(total)
+        positions = [ranks[offsets[p]:offsets[p + 1]] for p in range(partitions)]
+    else:
+        positions = [np.arange(offsets[p], offsets[p + 1]) for p in range(partitions)]
+
+    result_rows = _allocate((total, array.shape[1]), array.dtype, out)
+    index = np.empty(total, dtype=np.int64)
+    counts = np.empty(total, dtype=np.int64)
+    entry_result = None
+    if return_inverse:
+        entry_result = _allocate(entries, np.int64, os.path.join(directory, 'entry.npy') if directory else None)
+    for p in range(partitions):
+        unique = store.take('unique', p, dtype)
+        result_rows[positions[p]] = unique.view(array.dtype).reshape(-1, array.shape[1])
+        index[positions[p]], counts[positions[p]] = firsts[p], totals[p]
+        if return_inverse:
+            entry, local = store.take('inverse', p, np.int64).reshape(2, -1)
+            entry_result[entry] = positions[p][local]
+
+    # Проход 3: обратные индексы; записи одной порции идут подряд, поэтому чтение последовательное
+    inverse = None
+    if return_inverse:
+        inverse = _allocate(n, np.int64, inverse_out)
+        for start in range(0, n, chunk_rows):
+            inverse[start:start + chunk_rows] = entry_result[row_entry[start:start + chunk_rows]]
+    if isinstance(result_rows, np.memmap):
+        result_rows.flush()
+    return DedupResult(result_rows, index, counts, inverse)
+
+def _write_input(path: str, rows: int, cols: int, values: int, dtype, chunk_rows: int, seed: int = 42) -> np.ndarray:
+    """Случайная матрица в .npy, записанная порциями (для входов больше памяти)."""
+    rng = np.random.default_rng(seed)
+    array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(rows, cols))
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        array[start:stop] = rng.integers(0, values, (stop - start, cols), dtype=dtype)
+    array.flush()
+    return np.load(path, mmap_mode='r')
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк удаления повторяющихся строк против np.unique(axis=0).")
+    parser.add_argument('--rows', nargs='+', type=parse_count, default=[10 ** 5, 10 ** 6, 10 ** 7],
+                        help='Число строк (от 100K до 1G)')
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--values', type=parse_count, default=100, help='Значения берутся из 0..values-1')
+    parser.add_argument('--dtype', type=str, default='int64')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_LIMIT // 2 ** 20)
+    parser.add_argument('--directory', type=str, default=None,
+                        help='Каталог для .npy входа и результата; по умолчанию вход в памяти')
+    parser.add_argument('--unique-limit', type=parse_count, default=2 * 10 ** 7,
+                        help='Запускать np.unique, только если строк не больше')
+    parser.add_argument('--inverse', action='store_true', help='Считать обратные индексы')
+    args = parser.parse_args()
+
+    memory_limit = args.memory_mb * 2 ** 20
+    print(f"Столбцов: {args.cols}, значения 0..{args.values - 1}, {args.dtype}, бюджет {args.memory_mb} МБ")
+    print(f"{'строк':>12} {'способ':<16} {'время, с':>10} {'пик, МБ':>10} {'различных':>12}")
+    for rows in args.rows:
+        if args.directory:
+            os.makedirs(args.directory, exist_ok=True)
+            source = os.path.join(args.directory, 'input.npy')
+            array = _write_input(source, rows, args.cols, args.values, args.dtype, max(1, memory_limit // 64))
+        else:
+            source = array = np.random.default_rng(42).integers(0, args.values, (rows, args.cols)).astype(args.dtype)
+        results = {}
+        for order in ('first', 'sorted'):
+            out = os.path.join(args.directory, f"unique_{order}.npy") if args.directory else None
+            inverse_out = os.path.join(args.directory, f"inverse_{order}.npy") if args.directory and args.inverse else None
+            result, elapsed, peak = measure_peak(lambda: deduplicate(
+                source, order, args.inverse, memory_limit, out=out, inverse_out=inverse_out, tmp_dir=args.directory))
+            results[order] = result
+            print(f"{rows:>12} {'dedup ' + order:<16} {elapsed:>10.3f} {peak:>10.1f} {len(result.rows):>12}")
+        if rows <= args.unique_limit:
+            (unique, first, counts), elapsed, peak = measure_peak(
+                lambda: np.unique(np.asarray(array), axis=0, return_index=True, return_counts=True))
+            print(f"{rows:>12} {'np.unique':<16} {elapsed:>10.3f} {peak:>10.1f} {len(unique):>12}")
+            in_first_order = np.argsort(first, kind='stable')
+            same = np.array_equal(results['sorted'].rows, unique) and \
+                np.array_equal(results['sorted'].counts, counts) and \
+                np.array_equal(results['first'].rows, unique[in_first_order]) and \
+                np.array_equal(results['first'].index, first[in_first_order])
+            print(f"{'':>12} результаты совпадают с np.unique: {same}")
+        if args.inverse:
+            result = results['first']
+            same = all(np.array_equal(result.rows[result.inverse[start:start + 10 ** 6]],
+                                      np.asarray(array[start:start + 10 ** 6]))
+                       for start in range(0, rows, 10 ** 6))
+            print(f"{'':>12} rows[inverse] восстанавливает вход: {same}")
+        del array, results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Блочный расчёт евклидовых расстояний для задачи 5 из np_tasks.py.
+
+compute_euclidean_matrix строит всю матрицу X @ Y.T и ещё несколько
+временных матриц того же размера в float64, поэтому для выборок в миллионы
+точек не помещается в память. Здесь матрица считается плитками
+(блок строк X на блок строк Y), размер которых выбирается по бюджету памяти,
+а плитки разных блоков строк X обрабатываются в пуле потоков - умножение
+матриц в BLAS и операции numpy над большими массивами отпускают GIL.
+
+Кроме полной матрицы (в том числе в np.memmap) поддерживаются потоковые
+свёртки, для которых вся матрица не нужна: ближайший сосед (min_distance),
+k ближайших (top_k) и число точек в радиусе (radius_count). Внутри
+сравниваются квадраты расстояний, корень берётся только у результата.
+
+В float32 формула |x|^2 - 2xy + |y|^2 теряет точность для близких точек
+(относительная ошибка порядка 1e-3 от |x|^2), поэтому для точных сравнений
+используйте float64.
+
+Запуск из каталога numpy_pandas_tasks:
+    python distance_engine.py --x 100000 --y 100000 --features 128 --dtype float32 --k 10
+"""
+import argparse
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+from np_tasks import compute_euclidean_matrix
+from np_bench import measure_peak, parse_count
+try:
+    from scipy.spatial.distance import cdist # нужен только для сравнения в бенчмарке
+except ImportError:
+    cdist = None
+
+DEFAULT_MEMORY_LIMIT = 256 * 2 ** 20 # байт на все плитки всех потоков
+# Сколько буферов размера плитки живёт в потоке одновременно: в top_k это сама плитка,
+# её копия вместе с текущими лучшими и индексы argpartition (int64)
+_BUFFERS_PER_WORKER = 4
+
+class PairwiseDistances:
+    """Евклидовы расстояния между строками X и Y, посчитанные плитками ограниченного размера."""
+    def __init__(self, memory_limit: int = DEFAULT_MEMORY_LIMIT, dtype=np.float64,
+                 workers: Optional[int] = None):
+        self.memory_limit = memory_limit
+        self.dtype = np.dtype(dtype)
+        self.workers = workers or os.cpu_count() or 1
+
+    def _prepare(self, X, Y) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        Y = np.ascontiguousarray(Y, dtype=self.dtype)
+        if X.ndim != 2 or Y.ndim != 2 or X.shape[1] != Y.shape[1]:
+            raise ValueError(f"Ожидаются матрицы с одинаковым числом признаков: {X.shape} и {Y.shape}")
+        return X, np.einsum('ij,ij->i', X, X), Y, np.einsum('ij,ij->i', Y, Y)
+
+    def tile_shape(self, rows: int, cols: int) -> Tuple[int, int]:
+        """Размер плитки (строк X, строк Y), чтобы все потоки укладывались в memory_limit."""
+        elements = max(1, self.memory_limit // (self.workers * _BUFFERS_PER_WORKER * self.dtype.itemsize))
+        # Блоков строк X не меньше, чем потоков, иначе часть пула простаивает
+        tile_rows = min(rows, max(1, math.isqrt(elements)), max(1, -(-rows // self.workers)))
+        tile_cols = min(cols, max(1, elements // tile_rows))
+        return tile_rows, tile_cols
+
+    def _row_blocks(self, rows: int, tile_rows: int) -> Iterator[Tuple[int, int]]:
+        for start in range(0, rows, tile_rows):
+            yield start, min(start + tile_rows, rows)
+
+    @staticmethod
+    def _squared_tile(x: np.ndarray, x_norms: np.ndarray, y: np.ndarray, y_norms: np.ndarray) -> np.ndarray:
+        """Квадраты расстояний для плитки; все операции на месте, без лишних копий."""
+        tile = x @ y.T
+        tile *= -2
+        tile += x_norms[:, np.newaxis]
+        tile += y_norms
+        np.maximum(tile, 0, out=tile)
+        return tile
+
+    def _run(self, X, Y, process_rows: Callable[[int, int, Iterator], None]):
+        """Для каждого блока строк X вызывает process_rows(start, end, плитки по блокам Y) в пуле потоков."""
+        X, x_norms, Y, y_norms = self._prepare(X, Y)
+        tile_rows, tile_cols = self.tile_shape(len(X), len(Y))
+
+        def tiles(start: int, end: int) -> Iterator[Tuple[int, np.ndarray]]:
+            x, x_sq = X[start:end], x_norms[start:end]
+            for col in range(0, len(Y), tile_cols):
+                yield col, self._squared_tile(x, x_sq, Y[col:col + tile_cols], y_norms[col:col + tile_cols])
+
+        blocks = list(self._row_blocks(len(X), tile_rows))
+        if self.workers == 1 or len(blocks) == 1:
+            for start, end in blocks:
+                process_rows(start, end, tiles(start, end))
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # list(...) пробрасывает исключения из потоков
+            list(executor.map(lambda block: process_rows(*block, tiles(*block)), blocks))
+
+    def pairwise(self, X, Y, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Полная матрица расстояний; out может быть np.memmap, если матрица не помещается в память."""
+        if out is None:
+            out = np.empty((len(X), len(Y)), dtype=self.dtype)
+        elif out.shape != (len(X), len(Y)):
+            raise ValueError(f"Размер out {out.shape} не совпадает с ({len(X)}, {len(Y)})")
+
+        def process_rows(start, end, tiles):
+            for col, tile in tiles:
+                np.sqrt(tile, out=tile)
+                out[start:end, col:col + tile.shape[1]] = tile
+
+        self._run(X, Y, process_rows)
+        return out
+
+    def min_distance(self, X, Y) -> Tuple[np.ndarray, np.ndarray]:
+        """Расстояние до ближайшей точки Y и её индекс для каждой строки X."""
+        distances = np.full(len(X), np.inf, dtype=self.dtype)
+        indices = np.full(len(X), -1, dtype=np.int64)
+
+        def process_rows(start, end, tiles):
+            best, best_index = distances[start:end], indices[start:end]
+            for col, tile in tiles:
+                nearest = tile.argmin(axis=1)
+                value = tile[np.arange(len(tile)), nearest]
+                better = value < best
+                best[better] = value[better]
+                best_index[better] = nearest[better] + col
+
+        self._run(X, Y, process_rows)
+        return np.sqrt(distances, out=distances), indices
+
+    def top_k(self, X, Y, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """k ближайших точек Y для каждой строки X: расстояния и индексы по возрастанию расстояния."""
+        if not 0 < k <= len(Y):
+            raise ValueError(f"k должно быть от 1 до {len(Y)}, получено {k}")
+        distances = np.full((len(X), k), np.inf, dtype=self.dtype)
+        indices = np.full((len(X), k), -1, dtype=np.int64)
+
+        def process_rows(start, end, tiles):
+            best, best_index = distances[start:end], indices[start:end]
+            for col, tile in tiles:
+                # Кандидаты: текущие k лучших и вся плитка; оставляем k меньших без полной сортировки
+                candidates = np.concatenate((best, tile), axis=1)
+                keep = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+                from_best = keep < k
+                new_index = np.where(from_best, np.take_along_axis(best_index, np.minimum(keep, k - 1), axis=1),
+                                     keep - k + col)
+                best[:] = np.take_along_axis(candidates, keep, axis=1)
+                best_index[:] = new_index
+            order = np.argsort(best, axis=1, kind='stable')
+            best[:] = np.take_along_axis(best, order, axis=1)
+            best_index[:] = np.take_along_axis(best_index, order, axis=1)
+
+        self._run(X, Y, process_rows)
+        return np.sqrt(distances, out=distances), indices
+
+    def radius_count(self, X, Y, radius: float) -> np.ndarray:
+        """Число точек Y на расстоянии не больше radius от каждой строки X."""
+        counts = np.zeros(len(X), dtype=np.int64)
+        radius_sq = self.dtype.type(radius) ** 2
+
+        def process_rows(start, end, tiles):
+            for _, tile in tiles:
+                counts[start:end] += np.count_nonzero(tile <= radius_sq, axis=1)
+
+        self._run(X, Y, process_rows)
+        return counts
+
+def benchmark(x_rows: int, y_rows: int, features: int, dtype: str, memory_limit: int, workers: int,
+              k: int, full_limit: int, seed: int = 42):
+    """Сравнивает полную матрицу, cdist и блочные свёртки по времени и пиковой памяти."""
+    rng = np.random.default_rng(seed)
+    X = rng.random((x_rows, features))
+    Y = rng.random((y_rows, features))
+    engine = PairwiseDistances(memory_limit, dtype, workers)
+    print(f"X({x_rows}, {features}), Y({y_rows}, {features}), {dtype}, потоков: {engine.workers}, "
+          f"плитка: {engine.tile_shape(x_rows, y_rows)}")
+    print(f"{'метод':<32} {'время, с':>10} {'пик памяти, МБ':>15}")
+
+    def report(name, elapsed, peak):
+        print(f"{name:<32} {elapsed:>10.3f} {peak:>15.1f}")
+
+    cases = []
+    if x_rows * y_rows <= full_limit:
+        cases.append(('compute_euclidean_matrix', lambda: compute_euclidean_matrix(X, Y)))
+        if cdist is not None:
+            cases.append(('scipy.cdist', lambda: cdist(X, Y, 'euclidean')))
+        cases.append(('блочная полная матрица', lambda: engine.pairwise(X, Y)))
+    else:
+        print(f"Полная матрица пропущена: {x_rows * y_rows} > --full-limit")
+    cases += [
+        ('блочный min_distance', lambda: engine.min_distance(X, Y)),
+        (f'блочный top_k (k={k})', lambda: engine.top_k(X, Y, k)),
+        ('блочный radius_count', lambda: engine.radius_count(X, Y, math.sqrt(features / 6))),
+    ]
+    results = {}
+    for name, run in cases:
+        results[name], elapsed, peak = measure_peak(run)
+        report(name, elapsed, peak)
+
+    if 'compute_euclidean_matrix' in results:
+        expected = results['compute_euclidean_matrix']
+        tolerance = dict(rtol=1e-3, atol=1e-3) if engine.dtype == np.float32 else {}
+        nearest = np.sort(expected, axis=1)
+        print(f"Полная матрица совпадает: {np.allclose(results['блочная полная матрица'], expected, **tolerance)}")
+        print(f"min_distance совпадает: {np.allclose(results['блочный min_distance'][0], nearest[:, 0], **tolerance)}")
+        print(f"top_k совпадает: {np.allclose(results[f'блочный top_k (k={k})'][0], nearest[:, :k], **tolerance)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк блочного расчёта евклидовых расстояний.")
+    parser.add_argument('--x', type=parse_count, default=20_000, help='Строк в X (20K, 1M)')
+    parser.add_argument('--y', type=parse_count, default=20_000, help='Строк в Y')
+    parser.add_argument('--features', type=int, default=128)
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float64')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_LIMIT // 2 ** 20,
+                        help='Бюджет памяти на плитки всех потоков')
+    parser.add_argument('--workers', type=int, default=None, help='Потоков (по умолчанию - число ядер)')
+    parser.add_argument('--k', type=int, default=10, help='Число ближайших соседей для top_k')
+    parser.add_argument('--full-limit', type=parse_count, default=10 ** 9,
+                        help='Считать полную матрицу, только если в ней не больше стольких элементов')
+    args = parser.parse_args()
+    benchmark(args.x, args.y, args.features, args.dtype, args.memory_mb * 2 ** 20, args.workers,
+              args.k, args.full_limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Векторные замены groupby().filter() и построчного apply для assignment_pandas.py.
+
+groupby(key).filter(func) вызывает Python-функцию для каждой группы, а
+apply(lambda x: ...) - для каждой строки, поэтому при большом числе групп
+или строк время растёт вместе с ними. Здесь то же самое делается целыми
+массивами:
+
+* group_mask / group_filter - условия на агрегаты группы (среднее, минимум,
+  ...) считаются один раз на группу, а результат раздаётся строкам по кодам
+  ключа (как groupby().transform, но без копии агрегата на каждую строку);
+* map_values / prefix_category - функция применяется к уникальным значениям
+  колонки (категориям), а не к каждой строке.
+
+Запуск из каталога numpy_pandas_tasks:
+    python group_ops.py --sizes 1M 10M 100M --groups 14 100000
+"""
+import argparse
+import operator
+from typing import Callable, Dict, List, NamedTuple, Tuple
+import numpy as np
+import pandas as pd
+from np_bench import parse_count, timed
+
+_OPERATORS: Dict[str, Callable] = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+class GroupPredicate(NamedTuple):
+    """Условие на агрегат группы, например GroupPredicate('age', 'mean', '<=', 40)."""
+    column: str
+    agg: str # любой агрегат groupby: mean, min, max, sum, size, nunique, ...
+    op: str
+    value: float
+
+def key_codes(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Коды ключа (-1 для пропусков) и различные значения; у категорий коды уже готовы."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+def group_mask(data: pd.DataFrame, key: str, *predicates: GroupPredicate) -> np.ndarray:
+    """Маска строк, группа которых удовлетворяет всем условиям.
+
+    Строки с пропуском в ключе не проходят, как и в groupby(key).filter.
+    """
+    codes, uniques = key_codes(data[key])
+    groups = len(uniques)
+    valid = codes >= 0
+    columns = data[list(dict.fromkeys(predicate.column for predicate in predicates))]
+    if not valid.all():
+        columns, codes = columns[valid], codes[valid]
+    # Одна группировка на все условия: разбиение по кодам считается один раз
+    grouped = columns.groupby(codes)
+    passed = np.ones(groups, dtype=bool)
+    for predicate in predicates:
+        aggregate = getattr(grouped[predicate.column], predicate.agg)().reindex(range(groups)).to_numpy()
+        with np.errstate(invalid='ignore'):
+            passed &= _OPERATORS[predicate.op](aggregate, predicate.value)
+    mask = np.zeros(len(valid), dtype=bool)
+    mask[valid] = passed[codes]
+    return mask
+
+def group_filter(data: pd.DataFrame, key: str, *predicates: GroupPredicate) -> pd.DataFrame:
+    """Векторный аналог data.groupby(key).filter(...) для условий на агрегаты групп."""
+    return data[group_mask(data, key, *predicates)]
+
+def map_values(values: pd.Series, func: Callable, name: str = None) -> pd.Series:
+    """Векторный аналог values.apply(func): func вызывается один раз на каждое различное значение.
+
+    Результат - категориальная колонка с отсортированными категориями (как
+    порядок групп в groupby и crosstab); пропуски остаются пропусками.
+    """
+    codes, uniques = key_codes(values)
+    mapped = pd.Index([func(value) for value in uniques])
+    categories = mapped.unique().sort_values()
+    result = pd.Categorical.from_codes(np.where(codes >= 0, categories.get_indexer(mapped)[codes], -1),
+                                       categories=categories)
+    return pd.Series(result, index=values.index, name=name or values.name)
+
+def prefix_category(values: pd.Series, prefix: str, matched: str, other: str, name: str = None) -> pd.Series:
+    """Категория matched для значений, начинающихся с prefix, иначе other (через строковый метод категорий)."""
+    return map_values(values, lambda value: matched if value.startswith(prefix) else other, name)
+
+def _synthetic(rows: int, groups: int, seed: int = 42) -> pd.DataFrame:
+    """Данные вида adult: возраст, часы, занятость (groups значений) и семейное положение."""
+    rng = np.random.default_rng(seed)
+    occupations = pd.Index([f"occupation-{i}" for i in range(groups)])
+    statuses = pd.Index(['Married-civ-spouse', 'Never-married', 'Divorced', 'Separated',
+                         'Widowed', 'Married-spouse-absent', 'Married-AF-spouse'])
+    return pd.DataFrame({
+        'age': rng.integers(17, 91, rows, dtype=np.int8),
+        'hours-per-week': rng.integers(1, 100, rows, dtype=np.int8),
+        'occupation': pd.Categorical.from_codes(rng.integers(0, groups, rows), categories=occupations),
+        'marital-status': pd.Categorical.from_codes(rng.integers(0, len(statuses), rows), categories=statuses),
+    })
+
+def _filter_baseline(data: pd.DataFrame) -> pd.DataFrame:
+    def filter_func(group):
+        return group['age'].mean() <= 40 and group['hours-per-week'].min() > 5
+    return data.groupby('occupation', observed=True).filter(filter_func)
+
+def _filter_vectorized(data: pd.DataFrame) -> pd.DataFrame:
+    return group_filter(data, 'occupation', GroupPredicate('age', 'mean', '<=', 40),
+                        GroupPredicate('hours-per-week', 'min', '>', 5))
+
+def _category_baseline(statuses: pd.Series) -> pd.Series:
+    return statuses.apply(lambda x: 'Married' if x.startswith('Married') else 'Single')
+
+def _category_vectorized(statuses: pd.Series) -> pd.Series:
+    return prefix_category(statuses, 'Married', 'Married', 'Single')
+
+def benchmark(sizes: List[int], groups_list: List[int], baseline_limit: int):
+    """Сравнивает filter/apply с векторными версиями; исходные версии - только до baseline_limit строк."""
+    print(f"{'строк':>12} {'групп':>8} {'задача':<10} {'исходная, с':>12} {'векторная, с':>13} {'ускорение':>10}")
+    for rows in sizes:
+        for groups in groups_list:
+            data = _synthetic(rows, groups)
+            # В assignment_pandas.py семейное положение - строки, а не категории
+            statuses = data['marital-status'].astype(object)
+            cases = [
+                ('filter', lambda: _filter_baseline(data), lambda: _filter_vectorized(data),
+                 lambda a, b: a.index.equals(b.index)),
+                ('category', lambda: _category_baseline(statuses), lambda: _category_vectorized(statuses),
+                 lambda a, b: (a.to_numpy() == b.astype(object).to_numpy()).all()),
+            ]
+            for task, baseline, vectorized, same in cases:
+                fast, fast_time = timed(vectorized)
+                if rows > baseline_limit:
+                    print(f"{rows:>12} {groups:>8} {task:<10} {'-':>12} {fast_time:>13.3f} {'-':>10}")
+                    continue
+                slow, slow_time = timed(baseline)
+                mark = '' if same(slow, fast) else '  РЕЗУЛЬТАТЫ РАЗЛИЧАЮТСЯ'
+                print(f"{rows:>12} {groups:>8} {task:<10} {slow_time:>12.3f} {fast_time:>13.3f} "
+                      f"{slow_time / fast_time:>9.1f}x{mark}")
+            del data, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк векторных групповых условий и производных колонок.")
+    parser.add_argument('--sizes', nargs='+', type=parse_count, default=[10 ** 6, 10 ** 7], help='Число строк (1M, 10M, 100M)')
+    parser.add_argument('--groups', nargs='+', type=int, default=[14, 100_000], help='Число различных occupation')
+    parser.add_argument('--baseline-limit', type=parse_count, default=10 ** 7,
+                        help='Исходные filter/apply запускать только до этого числа строк')
+    args = parser.parse_args()
+    benchmark(args.sizes, args.groups, args.baseline_limit)
+
+if __name__ == "__main__":
+    main()
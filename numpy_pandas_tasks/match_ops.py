@@ -0,0 +1,176 @@
+"""Поиск строк A, в которых есть элемент из каждой строки B (задача 4 из assignment_numpy.py).
+
+Исходное решение делает отдельный проход np.isin по A для каждой строки B,
+поэтому при тысячах строк в B время растёт пропорционально их числу. Здесь
+строки B (без повторов, от меньших множеств к большим) проверяются блоками,
+и каждый следующий блок проверяется только на строках A, прошедших
+предыдущие, - обычно почти все строки A отсеиваются первыми блоками.
+Размеры блоков B и пачек A выбираются по бюджету памяти. Пересечение строк
+считается одним из двух способов:
+
+* 'bitset' - для целых значений из небольшого диапазона: каждая строка
+  превращается в битовую маску значений (слова uint64), и строка A подходит
+  к строке B, если их маски пересекаются. Диапазон берётся только по B:
+  значения A вне него ни с чем не совпадут;
+* 'sorted' - для любых значений: различные значения B отсортированы, и для
+  каждого значения известно, в каких строках B оно встречается. Элементы A
+  ищутся двоичным поиском, после чего для каждой строки A считается число
+  различных строк B, с которыми она пересеклась.
+
+method='auto' выбирает bitset, если значения целые и диапазон B не больше
+BITSET_MAX_RANGE.
+
+Запуск из каталога numpy_pandas_tasks:
+    python match_ops.py --a-rows 1M --b-rows 1000 2000 --values 1000
+"""
+import argparse
+import time
+import numpy as np
+from np_bench import parse_count
+
+BITSET_MAX_RANGE = 1 << 14 # до 256 слов uint64 на строку
+DEFAULT_MEMORY_LIMIT = 64 * 2 ** 20 # байт на промежуточные массивы одной пачки
+
+def rows_matching_all_isin(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """Исходный способ: отдельный np.isin по A для каждой строки B."""
+    mask = np.ones(len(A), dtype=bool)
+    for row in B:
+        mask &= np.any(np.isin(A, row), axis=1)
+    return mask
+
+def _bitsets(values: np.ndarray, low, words: int) -> np.ndarray:
+    """Битовые маски строк: бит v - low установлен, если значение v есть в строке."""
+    masks = np.zeros((len(values), words), dtype=np.uint64)
+    rows = np.arange(len(values))
+    for column in values.T: # в одном столбце каждая строка встречается один раз - конфликтов нет
+        offset = column.astype(np.int64) - low
+        inside = (offset >= 0) & (offset < words * 64)
+        masks[rows[inside], offset[inside] >> 6] |= np.left_shift(np.uint64(1), (offset[inside] & 63).astype(np.uint64))
+    return masks
+
+class _BitsetKernel:
+    """Пересечение битовых масок; bytes_per_pair - память на пару (строка A, строка B)."""
+    def __init__(self, B: np.ndarray):
+        self.low = int(B.min())
+        self.words = (int(B.max()) - self.low) // 64 + 1
+        self.bytes_per_pair = self.words * 8 + 1
+
+    def __call__(self, A: np.ndarray, B: np.ndarray) -> np.ndarray:
+        a_masks, b_masks = _bitsets(A, self.low, self.words), _bitsets(B, self.low, self.words)
+        if self.words == 1:
+            hits = (a_masks & b_masks.T) != 0 # (строк A, 1) & (1, строк B)
+        else:
+            hits = ((a_masks[:, np.newaxis, :] & b_masks[np.newaxis, :, :]) != 0).any(axis=2)
+        return hits.all(axis=1)
+
+class _SortedKernel:
+    """Двоичный поиск элементов A среди отсортированных пар (значение, строка B)."""
+    def __init__(self, B: np.ndarray):
+        self.bytes_per_pair = B.shape[1] * 8 * 4
+
+    def __call__(self, A: np.ndarray, B: np.ndarray) -> np.ndarray:
+        # Пары (значение, строка B) без повторов, отсортированные по значению
+        b_rows = np.repeat(np.arange(len(B)), B.shape[1])
+        order = np.lexsort((b_rows, B.ravel()))
+        b_values, b_rows = B.ravel()[order], b_rows[order]
+        keep = np.r_[True, (b_values[1:] != b_values[:-1]) | (b_rows[1:] != b_rows[:-1])]
+        b_values, b_rows = b_values[keep], b_rows[keep]
+        # Для каждого различного значения - диапазон его строк в b_rows
+        starts = np.flatnonzero(np.r_[True, b_values[1:] != b_values[:-1]])
+        unique_values = b_values[starts]
+        ends = np.r_[starts[1:], len(b_values)]
+
+        flat = A.ravel()
+        position = np.searchsorted(unique_values, flat)
+        position[position == len(unique_values)] = 0
+        found = unique_values[position] == flat
+        a_rows = np.repeat(np.arange(len(A)), A.shape[1])[found]
+        first, counts = starts[position[found]], (ends - starts)[position[found]]
+        # Развёртка диапазонов [first, first + count) в индексы b_rows без цикла по элементам
+        offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        pairs = np.repeat(a_rows, counts) * len(B) + b_rows[np.repeat(first, counts) + offsets]
+        matched = np.bincount(np.unique(pairs) // len(B), minlength=len(A))
+        return matched == len(B)
+
+def _prepare_b(B: np.ndarray) -> np.ndarray:
+    """Различные строки B (как множества), от меньших множеств к большим.
+
+    Строка с меньшим числом значений отсеивает больше строк A, поэтому
+    проверяется раньше.
+    """
+    rows = np.unique(np.sort(B, axis=1), axis=0)
+    distinct = 1 + (np.diff(rows, axis=1) != 0).sum(axis=1)
+    return rows[np.argsort(distinct, kind='stable')]
+
+def _filter(A: np.ndarray, B: np.ndarray, kernel, memory_limit: int) -> np.ndarray:
+    """Проверяет строки B блоками, каждый раз только на ещё подходящих строках A.
+
+    Большинство строк A отсеивается первыми строками B, поэтому следующие
+    блоки обрабатывают всё меньше строк A и могут быть всё больше.
+    """
+    alive = np.arange(len(A))
+    start = 0
+    while start < len(B) and len(alive):
+        block = max(1, memory_limit // (len(alive) * kernel.bytes_per_pair))
+        b_block = B[start:start + block]
+        batch = max(1, memory_limit // (len(b_block) * kernel.bytes_per_pair))
+        keep = np.concatenate([kernel(A[alive[i:i + batch]], b_block) for i in range(0, len(alive), batch)])
+        alive = alive[keep]
+        start += len(b_block)
+    mask = np.zeros(len(A), dtype=bool)
+    mask[alive] = True
+    return mask
+
+def rows_matching_all(A, B, method: str = 'auto', memory_limit: int = DEFAULT_MEMORY_LIMIT) -> np.ndarray:
+    """Маска строк A, в которых есть хотя бы один элемент каждой строки B."""
+    A, B = np.asarray(A), np.asarray(B)
+    if A.ndim != 2 or B.ndim != 2:
+        raise ValueError(f"Ожидаются двумерные массивы: {A.shape} и {B.shape}")
+    if len(B) == 0:
+        return np.ones(len(A), dtype=bool)
+    if len(A) == 0 or B.shape[1] == 0:
+        return np.zeros(len(A), dtype=bool)
+    if method == 'auto':
+        small_range = B.dtype.kind in 'iub' and A.dtype.kind in 'iub' and \
+            int(B.max()) - int(B.min()) < BITSET_MAX_RANGE
+        method = 'bitset' if small_range else 'sorted'
+    kernels = {'bitset': _BitsetKernel, 'sorted': _SortedKernel}
+    if method not in kernels:
+        raise ValueError(f"Неизвестный метод: {method}")
+    B = _prepare_b(B)
+    return _filter(A, B, kernels[method](B), memory_limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска строк A, совпадающих с каждой строкой B.")
+    parser.add_argument('--a-rows', type=parse_count, default=10 ** 6)
+    parser.add_argument('--a-cols', type=int, default=3)
+    parser.add_argument('--b-rows', nargs='+', type=parse_count, default=[10, 100, 1000])
+    parser.add_argument('--b-cols', type=int, default=2)
+    parser.add_argument('--values', type=parse_count, default=100, help='Значения берутся из 0..values-1')
+    parser.add_argument('--isin-limit', type=parse_count, default=10 ** 9,
+                        help='Запускать исходный способ, только если строк A * строк B не больше')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    A = rng.integers(0, args.values, (args.a_rows, args.a_cols))
+    print(f"A({args.a_rows}, {args.a_cols}), значения 0..{args.values - 1}")
+    print(f"{'строк B':>8} {'метод':<8} {'время, с':>10} {'подходит':>10}")
+    for b_rows in args.b_rows:
+        # В каждой строке B одно из трёх частых значений, чтобы ответ не был пустым
+        B = rng.integers(0, args.values, (b_rows, args.b_cols))
+        B[:, 0] = rng.integers(0, 3, b_rows)
+        results = {}
+        methods = (['bitset'] if args.values <= BITSET_MAX_RANGE else []) + ['sorted'] + \
+            (['isin'] if args.a_rows * b_rows <= args.isin_limit else [])
+        for method in methods:
+            run = (lambda: rows_matching_all_isin(A, B)) if method == 'isin' else \
+                (lambda: rows_matching_all(A, B, method))
+            started = time.perf_counter()
+            results[method] = run()
+            elapsed = time.perf_counter() - started
+            print(f"{b_rows:>8} {method:<8} {elapsed:>10.3f} {int(results[method].sum()):>10}")
+        same = all(np.array_equal(results['sorted'], mask) for mask in results.values())
+        print(f"{'':>8} результаты совпадают: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Бенчмарк пар решений из np_tasks.py: без NumPy и на NumPy.
+
+Каждая пара (мультимножества, максимум после нуля, RLE) запускается на
+размерах от 10 до 10^8, на разных типах (int8, int32, int64, float64) и
+распределениях входа: например, для RLE - много коротких серий или мало
+длинных. Для каждой точки печатаются медиана времени вызова и 95%
+доверительный интервал медианы (бутстреп), а для каждой пары - размер, с
+которого NumPy обгоняет чистый Python (точка пересечения, интерполяция по
+логарифмам).
+
+По умолчанию размеры идут от 10 до 10^7; 10^8 добавляется флагом --full
+(или явно через --sizes), потому что на нём одни входы занимают гигабайты.
+
+Время на одну точку ограничено бюджетом: если по предыдущему размеру
+видно, что вызов не уложится в бюджет, точка пропускается; решения без
+NumPy получают список (tolist вне замера) и ограничены --max-python-size,
+чтобы список из 10^8 объектов не съел всю память. Результаты сохраняются в
+JSON и сравниваются с базой, как в task_1/scale_bench.py.
+
+Запуск из каталога numpy_pandas_tasks:
+    python np_bench.py --sizes 10 1K 100K 10M --dtypes int32 float64 --budget 2
+    python np_bench.py --full --dtypes int64
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from np_tasks import (are_multisets_equal_sorted, are_multisets_equal_unique, max_after_zero_list,
+                      max_after_zero_numpy, rle_with_numpy, rle_without_numpy)
+
+RESULTS_FILE = 'np_bench_results.json'
+BASELINE_FILE = 'np_bench_baseline.json'
+TOLERANCE = 0.2
+MIN_SAMPLE_SECONDS = 0.002 # Быстрые вызовы повторяются в цикле, пока замер не станет длиннее
+BOOTSTRAP_ROUNDS = 1000
+LONG_RUN = 1000 # Длина серии для распределения long_runs
+
+class Pair(NamedTuple):
+    python: Callable
+    numpy: Callable
+    distributions: Tuple[str, ...]
+    make: Callable[[np.random.Generator, int, np.dtype, str], tuple]
+
+def _values(rng: np.random.Generator, size: int, dtype: np.dtype, high: int) -> np.ndarray:
+    """Значения от 0 до high (не больше максимума целого типа)."""
+    if dtype.kind == 'f':
+        return (rng.random(size) * high).astype(dtype)
+    return rng.integers(0, min(high, np.iinfo(dtype).max), size).astype(dtype)
+
+def _multiset_input(rng, size, dtype, distribution):
+    # Перестановка x - худший случай: ответ True и сравнивать приходится всё
+    x = _values(rng, size, dtype, size if distribution == 'uniform' else 10)
+    return x, rng.permutation(x)
+
+def _max_after_zero_input(rng, size, dtype, distribution):
+    zero_share = 0.01 if distribution == 'sparse_zeros' else 0.5
+    x = _values(rng, size, dtype, 100) + dtype.type(1)
+    x[rng.random(size) < zero_share] = 0
+    return (x,)
+
+def _rle_input(rng, size, dtype, distribution):
+    if distribution == 'short_runs':
+        return (_values(rng, size, dtype, 2),) # средняя длина серии - 2
+    return (np.repeat(_values(rng, size // LONG_RUN + 1, dtype, 100), LONG_RUN)[:size],)
+
+PAIRS: Dict[str, Pair] = {
+    'multiset': Pair(are_multisets_equal_sorted, are_multisets_equal_unique, ('uniform', 'few_values'),
+                     _multiset_input),
+    'max_after_zero': Pair(max_after_zero_list, max_after_zero_numpy, ('sparse_zeros', 'dense_zeros'),
+                           _max_after_zero_input),
+    'rle': Pair(rle_without_numpy, rle_with_numpy, ('short_runs', 'long_runs'), _rle_input),
+}
+
+def median_ci(samples: List[float], rng: np.random.Generator, level: float = 0.95) -> Tuple[float, float, float]:
+    """Медиана и доверительный интервал медианы по бутстрепу."""
+    values = np.asarray(samples)
+    if len(values) < 2:
+        return float(values[0]), float(values[0]), float(values[0])
+    medians = np.median(values[rng.integers(0, len(values), (BOOTSTRAP_ROUNDS, len(values)))], axis=1)
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(medians, [tail, 100 - tail])
+    return float(np.median(values)), float(low), float(high)
+
+def parse_count(value: str) -> int:
+    """Размер из аргумента командной строки: 100, 10K, 1.5M, 1G."""
+    value = value.strip().upper()
+    scale = {'K': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9}.get(value[-1], 1)
+    return int(float(value.rstrip('KMG')) * scale)
+
+def timed(run: Callable) -> Tuple[Any, float]:
+    """Результат и время одного вызова run() в секундах."""
+    started = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - started
+
+def measure_peak(run: Callable) -> Tuple[Any, float, float]:
+    """Результат, время в секундах и пик памяти в МБ (tracemalloc видит и буферы массивов numpy)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = run()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+def measure(func: Callable, args: tuple, repeat: int, budget: float) -> List[float]:
+    """Время одного вызова в секундах: до repeat замеров, но не дольше budget секунд."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SAMPLE_SECONDS or loops >= 10 ** 6:
+            break
+        loops *= 10
+    samples = [elapsed / loops]
+    spent = elapsed
+    while len(samples) < repeat and spent + elapsed <= budget:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        elapsed = time.perf_counter() - started
+        spent += elapsed
+        samples.append(elapsed / loops)
+    return samples
+
+def crossover(points: List[Tuple[int, float, float]]) -> Optional[str]:
+    """Размер, с которого NumPy быстрее: points - (размер, медиана без NumPy, медиана NumPy)."""
+    ratios = [(size, python / numpy) for size, python, numpy in points]
+    if not ratios:
+        return None
+    if all(ratio >= 1 for _, ratio in ratios):
+        return f"<= {ratios[0][0]}"
+    for (size0, ratio0), (size1, ratio1) in zip(ratios, ratios[1:]):
+        if ratio0 < 1 <= ratio1:
+            # Линейная интерполяция log(ratio) по log(size) до нуля
+            share = -math.log(ratio0) / (math.log(ratio1) - math.log(ratio0))
+            return f"~{round(math.exp(math.log(size0) + share * (math.log(size1) - math.log(size0))))}"
+    return None
+
+class NpBenchmark:
+    """Прогоняет пары функций по размерам, типам и распределениям и копит результаты."""
+    def __init__(self, repeat: int, budget: float, max_python_size: int, seed: int):
+        self.repeat = repeat
+        self.budget = budget
+        self.max_python_size = max_python_size
+        self.seed = seed
+        self.results: List[Dict[str, Any]] = []
+        self._ci_rng = np.random.default_rng(seed)
+
+    def _skip_reason(self, impl: str, size: int, previous: Optional[Tuple[int, float]]) -> Optional[str]:
+        if impl == 'python' and size > self.max_python_size:
+            return '--max-python-size'
+        # Все функции не быстрее линейных: время растёт хотя бы пропорционально размеру
+        if previous and previous[1] * size / previous[0] > self.budget:
+            return 'бюджет'
+        return None
+
+    def run_case(self, name: str, pair: Pair, dtype: np.dtype, distribution: str, sizes: List[int]):
+        previous: Dict[str, Tuple[int, float]] = {}
+        points = []
+        for size in sizes:
+            args = pair.make(np.random.default_rng([self.seed, size]), size, dtype, distribution)
+            medians = {}
+            for impl, func in (('python', pair.python), ('numpy', pair.numpy)):
+                reason = self._skip_reason(impl, size, previous.get(impl))
+                if reason:
+                    print(f"{name:<15} {dtype.name:<8} {distribution:<13} {size:>10} {impl:<7} "
+                          f"{'пропуск (' + reason + ')':>40}")
+                    continue
+                call_args = tuple(arg.tolist() for arg in args) if impl == 'python' else args
+                samples = measure(func, call_args, self.repeat, self.budget)
+                del call_args
+                median, low, high = median_ci(samples, self._ci_rng)
+                medians[impl] = median
+                previous[impl] = (size, median)
+                self.results.append({
+                    'pair': name, 'impl': impl, 'dtype': dtype.name, 'distribution': distribution, 'size': size,
+                    'samples': len(samples), 'median_s': median, 'ci_low_s': low, 'ci_high_s': high,
+                })
+                print(f"{name:<15} {dtype.name:<8} {distribution:<13} {size:>10} {impl:<7} "
+                      f"{median:>12.3e} [{low:.3e}, {high:.3e}] {len(samples):>3}")
+            if len(medians) == 2:
+                points.append((size, medians['python'], medians['numpy']))
+        point = crossover(points)
+        print(f"{name:<15} {dtype.name:<8} {distribution:<13} NumPy быстрее с n {point or 'не найдено'}\n")
+
+    def run(self, pairs: List[str], dtypes: List[str], sizes: List[int]):
+        print(f"{'пара':<15} {'тип':<8} {'распред.':<13} {'размер':>10} {'решение':<7} "
+              f"{'медиана, с':>12} {'95% ДИ медианы':>24} {'n':>3}")
+        for name in pairs:
+            pair = PAIRS[name]
+            for dtype in dtypes:
+                for distribution in pair.distributions:
+                    self.run_case(name, pair, np.dtype(dtype), distribution, sizes)
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                          tolerance: float) -> List[str]:
+    """Регрессия - медиана выросла больше чем на tolerance и вышла за доверительный интервал базы."""
+    def key(entry):
+        return entry['pair'], entry['impl'], entry['dtype'], entry['distribution'], entry['size']
+
+    previous = {key(entry): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        base = previous.get(key(entry))
+        if base is None or not base['median_s']:
+            continue
+        change = entry['median_s'] / base['median_s'] - 1
+        if change > tolerance and entry['median_s'] > base['ci_high_s']:
+            regressions.append(f"{' / '.join(map(str, key(entry)))}: "
+                               f"{base['median_s']:.3e} -> {entry['median_s']:.3e} с (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пар решений np_tasks.py: без NumPy и на NumPy.")
+    parser.add_argument('--pairs', nargs='+', choices=list(PAIRS), default=list(PAIRS))
+    parser.add_argument('--sizes', nargs='+', type=parse_count, default=[10 ** p for p in range(1, 8)],
+                        help='Размеры входа (10, 1K, 10M, 100M); по умолчанию от 10 до 10^7')
+    parser.add_argument('--full', action='store_true',
+                        help='Добавить размер 10^8 (массивы по 800 МБ для int64 и float64)')
+    parser.add_argument('--dtypes', nargs='+', default=['int8', 'int32', 'int64', 'float64'])
+    parser.add_argument('--repeat', type=int, default=7, help='Замеров на точку')
+    parser.add_argument('--budget', type=float, default=1.0, help='Секунд на одну точку (пара, решение, размер)')
+    parser.add_argument('--max-python-size', type=parse_count, default=10 ** 7,
+                        help='Не запускать решения без NumPy на больших размерах (память под список)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=RESULTS_FILE)
+    parser.add_argument('--baseline', type=str, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как новую базу')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    bench = NpBenchmark(args.repeat, args.budget, args.max_python_size, args.seed)
+    sizes = sorted(set(args.sizes) | ({10 ** 8} if args.full else set()))
+    bench.run(args.pairs, args.dtypes, sizes)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'params': {key: getattr(args, key) for key in ('repeat', 'budget', 'max_python_size', 'seed')},
+        'results': bench.results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Результаты сохранены как база: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"База {args.baseline} не найдена - сравнение пропущено (запустите с --save-baseline).")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(bench.results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"\nНайдено регрессий: {len(regressions)}", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print("Регрессий не найдено.")
+
+if __name__ == "__main__":
+    main()
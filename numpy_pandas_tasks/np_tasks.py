@@ -1,40 +1,49 @@
+"""Задачи по NumPy: у каждой задачи есть решение без NumPy и на NumPy.
+
+Функции можно импортировать без побочных эффектов (их сравнивает
+np_bench.py); демонстрации задач 1, 5 и 6 выполняются только при запуске
+скрипта.
+
+Запуск из каталога numpy_pandas_tasks:
+    python np_tasks.py
+"""
 import numpy as np
 import random
 import timeit
-from scipy.spatial.distance import cdist
 
 '''Задача 1: Подсчитать произведение ненулевых элементов
 на диагонали прямоугольной матрицы.'''
 
-# No numpy solution
-rows = 5
-cols = 6
-min_val = 0
-max_val = 10
+def task_1_diagonal_product():
+    # No numpy solution
+    rows = 5
+    cols = 6
+    min_val = 0
+    max_val = 10
 
-matrix = [[random.randint(min_val, max_val) for j in range(cols)] for i in range(rows)]
-for r in matrix:
-    print(r)
+    matrix = [[random.randint(min_val, max_val) for j in range(cols)] for i in range(rows)]
+    for r in matrix:
+        print(r)
 
-result = 1
-diagonal_length = min(rows, cols)
+    result = 1
+    diagonal_length = min(rows, cols)
 
-for i in range(diagonal_length):
-    element = matrix[i][i]
-    if element != 0:
-        result *= element
+    for i in range(diagonal_length):
+        element = matrix[i][i]
+        if element != 0:
+            result *= element
 
-print(f"\nПроизведение ненулевых элементов на диагонали: {result}")
+    print(f"\nПроизведение ненулевых элементов на диагонали: {result}")
 
-# Numpy solution
-matrix_np = np.random.randint(0, 10, size=(5, 6))
-print("Исходная матрица (NumPy):")
-print(matrix_np)
+    # Numpy solution
+    matrix_np = np.random.randint(0, 10, size=(5, 6))
+    print("Исходная матрица (NumPy):")
+    print(matrix_np)
 
-diagonal = np.diag(matrix_np)
-non_zero_elements = diagonal[diagonal != 0]
-product_np = np.prod(non_zero_elements)
-print(f"\nПроизведение ненулевых элементов на диагонали: {product_np}")
+    diagonal = np.diag(matrix_np)
+    non_zero_elements = diagonal[diagonal != 0]
+    product_np = np.prod(non_zero_elements)
+    print(f"\nПроизведение ненулевых элементов на диагонали: {product_np}")
 
 '''Задача 2: Даны два вектора x и y. Проверить, задают ли они 
 одно и то же мультимножество.'''
@@ -140,82 +149,93 @@ def compute_euclidean_matrix(X, Y):
     dist_sq = np.maximum(dist_sq, 0)
     return np.sqrt(dist_sq)
 
-# No numpy solution
-num_features = 128
-num_x_samples = 1000
-num_y_samples = 800
+def task_5_euclidean_benchmark():
+    # scipy и distance_engine нужны только для сравнения, импорт функций задач от них не зависит
+    from scipy.spatial.distance import cdist
+    from distance_engine import PairwiseDistances
+
+    num_features = 128
+    num_x_samples = 1000
+    num_y_samples = 800
 
-X_large = np.random.rand(num_x_samples, num_features)
-Y_large = np.random.rand(num_y_samples, num_features)
+    X_large = np.random.rand(num_x_samples, num_features)
+    Y_large = np.random.rand(num_y_samples, num_features)
 
-numpy_time = timeit.timeit(lambda: compute_euclidean_matrix(X_large, Y_large), number=10)
-scipy_time = timeit.timeit(lambda: cdist(X_large, Y_large, 'euclidean'), number=10)
+    numpy_time = timeit.timeit(lambda: compute_euclidean_matrix(X_large, Y_large), number=10)
+    scipy_time = timeit.timeit(lambda: cdist(X_large, Y_large, 'euclidean'), number=10)
+    # Блочный расчёт с ограниченной памятью и потоками (см. distance_engine.py)
+    distance_engine = PairwiseDistances()
+    blocked_time = timeit.timeit(lambda: distance_engine.pairwise(X_large, Y_large), number=10)
 
-print("\n--- Сравнение производительности ---")
-print(f"Размерность данных: X({num_x_samples}, {num_features}), Y({num_y_samples}, {num_features})")
-print(f"Наша реализация на NumPy: {numpy_time:.5f} секунд")
-print(f"Функция scipy.cdist:      {scipy_time:.5f} секунд")
+    print("\n--- Сравнение производительности ---")
+    print(f"Размерность данных: X({num_x_samples}, {num_features}), Y({num_y_samples}, {num_features})")
+    print(f"Наша реализация на NumPy: {numpy_time:.5f} секунд")
+    print(f"Функция scipy.cdist:      {scipy_time:.5f} секунд")
+    print(f"Блочный PairwiseDistances: {blocked_time:.5f} секунд")
 
-numpy_result = compute_euclidean_matrix(X_large, Y_large)
-scipy_result = cdist(X_large, Y_large, 'euclidean')
-print(f"Результаты совпадают: {np.allclose(numpy_result, scipy_result)}")
+    numpy_result = compute_euclidean_matrix(X_large, Y_large)
+    scipy_result = cdist(X_large, Y_large, 'euclidean')
+    print(f"Результаты совпадают: {np.allclose(numpy_result, scipy_result)}")
+    print(f"Блочный результат совпадает: {np.allclose(distance_engine.pairwise(X_large, Y_large), scipy_result)}")
 
 '''Задача 6: CrunchieMunchies'''
 
-calorie_stats = np.array([ 70., 120.,  70.,  50., 110., 110., 110., 130.,  90.,  90., 120.,
-       110., 120., 110., 110., 110., 100., 110., 110., 110., 100., 110.,
-       100., 100., 110., 110., 100., 120., 120., 110., 100., 110., 100.,
-       110., 120., 120., 110., 110., 110., 140., 110., 100., 110., 100.,
-       150., 150., 160., 100., 120., 140.,  90., 130., 120., 100.,  50.,
-        50., 100., 100., 120., 100.,  90., 110., 110.,  80.,  90.,  90.,
-       110., 110.,  90., 110., 140., 100., 110., 110., 100., 100., 110.])
-
-crunchie_munchies_calories = 60
-
-# 1. Вычисление среднего количества калорий конкурентов
-average_calories_raw = np.mean(calorie_stats)
-average_calories = average_calories_raw - crunchie_munchies_calories
-print("--- 1. Среднее количество калорий конкурентов ---")
-print(f"Среднее количество калорий конкурентов: {average_calories_raw:.2f}")
-print(f"Среднее количество калорий конкурентов выше на: {average_calories:.2f} калорий.")
-
-# 2. Сортировка данных
-calorie_stats_sorted = np.sort(calorie_stats)
-print("\n--- 2. Отсортированные данные ---")
-print("Отсортированные данные о калориях:\n", calorie_stats_sorted)
-
-# 3. Вычисление медианы
-median_calories = np.median(calorie_stats)
-print("\n--- 3. Медиана ---")
-print(f"Медиана количества калорий: {median_calories:.2f}")
-
-# 4. Поиск наименьшего процентиля, превышающего 60 калорий
-for p in range(1, 10):
-    perc_value = np.percentile(calorie_stats, p)
-    if perc_value > crunchie_munchies_calories:
-        nth_percentile = p
-        break
-else:
-    nth_percentile = 5
-
-print("\n--- 4. Наименьший процентиль, превышающий 60 калорий ---")
-print(f"{nth_percentile}-й процентиль: {np.percentile(calorie_stats, nth_percentile):.2f}")
-print(f"Наименьший процентиль, превышающий 60 калорий: {nth_percentile}")
-
-# 5. Процент хлопьев с более чем 60 калориями
-more_calories_count = np.count_nonzero(calorie_stats > crunchie_munchies_calories)
-more_calories = (more_calories_count / len(calorie_stats)) * 100
-print("\n--- 5. Процент конкурентов с более чем 60 калориями ---")
-print(f"Процент конкурентов с более чем 60 калориями: {more_calories:.2f}%")
-
-# 6. Расчет стандартного отклонения
-calorie_std = np.std(calorie_stats)
-print("\n--- 6. Стандартное отклонение ---")
-print(f"Стандартное отклонение количества калорий: {calorie_std:.2f}")
-
-# 7. Маркетинговые выводы
-print("\n--- 7. Маркетинговые выводы ---")
-marketing_summary = f"""
+def task_6_crunchie_munchies():
+    from stream_stats import StreamingStats
+
+    calorie_stats = np.array([ 70., 120.,  70.,  50., 110., 110., 110., 130.,  90.,  90., 120.,
+           110., 120., 110., 110., 110., 100., 110., 110., 110., 100., 110.,
+           100., 100., 110., 110., 100., 120., 120., 110., 100., 110., 100.,
+           110., 120., 120., 110., 110., 110., 140., 110., 100., 110., 100.,
+           150., 150., 160., 100., 120., 140.,  90., 130., 120., 100.,  50.,
+            50., 100., 100., 120., 100.,  90., 110., 110.,  80.,  90.,  90.,
+           110., 110.,  90., 110., 140., 100., 110., 110., 100., 100., 110.])
+
+    crunchie_munchies_calories = 60
+    # Одна сводка вместо отдельного прохода на каждую статистику (см. stream_stats.py);
+    # для длинного потока - stats.update(порция) или merge сводок разных процессов
+    stats = StreamingStats.of([calorie_stats])
+
+    # 1. Вычисление среднего количества калорий конкурентов
+    average_calories_raw = stats.mean
+    average_calories = average_calories_raw - crunchie_munchies_calories
+    print("--- 1. Среднее количество калорий конкурентов ---")
+    print(f"Среднее количество калорий конкурентов: {average_calories_raw:.2f}")
+    print(f"Среднее количество калорий конкурентов выше на: {average_calories:.2f} калорий.")
+
+    # 2. Сортировка данных (калорийность целая - значения берутся из точной гистограммы)
+    calorie_stats_sorted = stats.sorted_values()
+    print("\n--- 2. Отсортированные данные ---")
+    print("Отсортированные данные о калориях:\n", calorie_stats_sorted)
+
+    # 3. Вычисление медианы
+    median_calories = stats.median()
+    print("\n--- 3. Медиана ---")
+    print(f"Медиана количества калорий: {median_calories:.2f}")
+
+    # 4. Поиск наименьшего процентиля, превышающего 60 калорий: обращение CDF вместо перебора
+    nth_percentile = stats.smallest_percentile_above(crunchie_munchies_calories, lowest=1)
+    if nth_percentile is None or nth_percentile >= 10: # как в прежнем переборе процентилей 1..9
+        nth_percentile = 5
+
+    print("\n--- 4. Наименьший процентиль, превышающий 60 калорий ---")
+    print(f"{nth_percentile}-й процентиль: {stats.percentile(nth_percentile):.2f}")
+    print(f"Наименьший процентиль, превышающий 60 калорий: {nth_percentile}")
+
+    # 5. Процент хлопьев с более чем 60 калориями
+    more_calories_count = stats.count_above(crunchie_munchies_calories)
+    more_calories = (more_calories_count / stats.count) * 100
+    print("\n--- 5. Процент конкурентов с более чем 60 калориями ---")
+    print(f"Процент конкурентов с более чем 60 калориями: {more_calories:.2f}%")
+
+    # 6. Расчет стандартного отклонения
+    calorie_std = stats.std()
+    print("\n--- 6. Стандартное отклонение ---")
+    print(f"Стандартное отклонение количества калорий: {calorie_std:.2f}")
+
+    # 7. Маркетинговые выводы
+    print("\n--- 7. Маркетинговые выводы ---")
+    marketing_summary = f"""
 Анализ данных конкурентов с помощью NumPy показывает, что CrunchieMunchies (60 калорий) является самым здоровым выбором.
 1. Почти все конкуренты (96.10%) имеют более 60 калорий на порцию.
 2. Среднее количество калорий (107.29) у конкурентов на 47.29 калорий выше, чем в CrunchieMunchies.
@@ -223,5 +243,9 @@ marketing_summary = f"""
 4. Стандартное отклонение (22.86) указывает на значительный разброс данных, но большинство конкурентов находятся в диапазоне 84-130 калорий, 
 что подчеркивает исключительную низкую калорийность CrunchieMunchies по сравнению с основной массой.
 """
-print(marketing_summary)
+    print(marketing_summary)
 
+if __name__ == "__main__":
+    task_1_diagonal_product()
+    task_5_euclidean_benchmark()
+    task_6_crunchie_munchies()
@@ -0,0 +1,166 @@
+"""Ленивое декартово произведение столбцов для задачи 3 из assignment_numpy.py.
+
+np.meshgrid(*arr1.T) + np.stack(...).reshape строит все сетки сразу, а
+столбцы разных типов приводит к общему (число и строка -> '<U'). Здесь
+произведение не хранится: комбинация с номером k вычисляется из k как
+число в смешанной системе счисления (основания - длины столбцов). Поэтому
+можно
+
+* получить k-ю комбинацию или комбинации по массиву номеров (product[k]);
+* перебирать произведение порциями фиксированного размера (chunks);
+* сохранить тип каждого столбца - порции являются структурированными
+  массивами с отдельным полем на столбец.
+
+Порядок комбинаций как у np.meshgrid: indexing='xy' (по умолчанию, как в
+задаче 3 - быстрее всего меняется первый столбец при двух столбцах) или
+'ij' (как itertools.product - быстрее всего меняется последний).
+
+Запуск из каталога numpy_pandas_tasks:
+    python product_ops.py --columns 1000 1000 100 --chunk-size 1M
+"""
+import argparse
+import math
+from typing import Iterator, List, Optional, Sequence, Union
+import numpy as np
+from np_bench import measure_peak, parse_count
+
+class CartesianProduct:
+    """Все комбинации по одному значению из каждого столбца, без материализации."""
+    def __init__(self, *columns, names: Optional[Sequence[str]] = None, indexing: str = 'xy'):
+        if indexing not in ('xy', 'ij'):
+            raise ValueError(f"indexing должен быть 'xy' или 'ij', получено {indexing!r}")
+        self.columns = [np.asarray(column) for column in columns]
+        if not self.columns or any(column.ndim != 1 for column in self.columns):
+            raise ValueError("Нужен хотя бы один одномерный столбец")
+        names = list(names) if names is not None else [f"f{i}" for i in range(len(self.columns))]
+        self.dtype = np.dtype([(name, column.dtype) for name, column in zip(names, self.columns)])
+        # Порядок столбцов от самого медленного разряда к самому быстрому
+        self._order = list(range(len(self.columns)))
+        if indexing == 'xy' and len(self._order) > 1:
+            self._order[0], self._order[1] = 1, 0
+        self._shape = tuple(len(self.columns[i]) for i in self._order)
+
+    @property
+    def size(self) -> int:
+        """Число комбинаций (целое Python: может не поместиться в len())."""
+        return math.prod(self._shape)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _digits(self, k: int) -> List[int]:
+        """Номер значения в каждом столбце для комбинации k (целые Python - без переполнения)."""
+        digits = [0] * len(self.columns)
+        for position in reversed(range(len(self._order))):
+            k, digits[self._order[position]] = divmod(k, self._shape[position])
+        return digits
+
+    def __getitem__(self, key: Union[int, np.ndarray]):
+        """k-я комбинация (кортеж) или структурированный массив комбинаций по массиву номеров."""
+        if np.ndim(key) == 0:
+            k = int(key)
+            if k < 0:
+                k += self.size
+            if not 0 <= k < self.size:
+                raise IndexError(f"Номер комбинации вне диапазона 0..{self.size - 1}")
+            return tuple(column[digit] for column, digit in zip(self.columns, self._digits(k)))
+        keys = np.asarray(key, dtype=np.int64)
+        negative = keys < 0
+        if not negative.any():
+            return self._combinations(keys)
+        # Отрицательные номера считаются от конца: size + k может не поместиться в int64,
+        # поэтому size передаётся как start, а проверка диапазона - в _combinations
+        result = np.empty(len(keys), dtype=self.dtype)
+        result[~negative] = self._combinations(keys[~negative])
+        result[negative] = self._combinations(keys[negative], self.size)
+        return result
+
+    def _combinations(self, offsets: np.ndarray, start: int = 0) -> np.ndarray:
+        """Комбинации с номерами start + offsets.
+
+        start - целое Python, offsets - небольшие int64, поэтому номера
+        могут быть больше int64: разряды start считаются в целых Python, а
+        offsets прибавляются к ним с переносом от самого быстрого разряда к
+        самому медленному (np.unravel_index не работает, если размер
+        произведения не помещается в intp).
+        """
+        if offsets.size and (start + int(offsets.min()) < 0 or start + int(offsets.max()) >= self.size):
+            raise IndexError(f"Номер комбинации вне диапазона 0..{self.size - 1}")
+        result = np.empty(len(offsets), dtype=self.dtype)
+        start_digits = self._digits(start)
+        carry = offsets
+        for position in reversed(range(len(self._order))):
+            column = self._order[position]
+            carry, digits = np.divmod(carry + start_digits[column], self._shape[position])
+            result[self.dtype.names[column]] = self.columns[column][digits]
+        return result
+
+    def chunks(self, chunk_size: int, start: int = 0, stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Комбинации [start, stop) порциями по chunk_size - в памяти только одна порция."""
+        stop = self.size if stop is None else min(stop, self.size)
+        for begin in range(start, stop, chunk_size):
+            yield self._combinations(np.arange(min(chunk_size, stop - begin), dtype=np.int64), begin)
+
+    def to_array(self) -> np.ndarray:
+        """Всё произведение одним структурированным массивом (только для небольших произведений)."""
+        return self._combinations(np.arange(self.size, dtype=np.int64))
+
+    def stack(self) -> np.ndarray:
+        """Всё произведение двумерным массивом общего типа, как np.stack(np.meshgrid(...)).reshape."""
+        combinations = self.to_array()
+        common = np.result_type(*self.columns)
+        return np.stack([combinations[name].astype(common) for name in self.dtype.names], axis=-1)
+
+def _meshgrid_product(columns: List[np.ndarray]) -> np.ndarray:
+    """Исходный способ из assignment_numpy.py (задача 3)."""
+    grids = np.meshgrid(*columns)
+    return np.stack(grids, axis=-1).reshape(-1, len(columns))
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк ленивого декартова произведения против meshgrid.")
+    parser.add_argument('--columns', nargs='+', type=parse_count, default=[1000, 1000, 100],
+                        help='Длины столбцов: int32, float64, строки, затем снова по кругу')
+    parser.add_argument('--chunk-size', type=parse_count, default=10 ** 6)
+    parser.add_argument('--consume', type=parse_count, default=10 ** 8,
+                        help='Сколько первых комбинаций перебрать порциями')
+    parser.add_argument('--meshgrid-limit', type=parse_count, default=2 * 10 ** 7,
+                        help='Запускать meshgrid, только если комбинаций не больше')
+    args = parser.parse_args()
+
+    makers = [lambda n: np.arange(n, dtype=np.int32), lambda n: np.linspace(0, 1, n),
+              lambda n: np.array([f"v{i}" for i in range(n)])]
+    columns = [makers[i % len(makers)](n) for i, n in enumerate(args.columns)]
+    product = CartesianProduct(*columns)
+    print(f"Столбцы: {[f'{len(c)} x {c.dtype}' for c in columns]}, комбинаций: {product.size}")
+
+    def consume():
+        rows = 0
+        for chunk in product.chunks(args.chunk_size, stop=args.consume):
+            rows += len(chunk)
+        return rows
+
+    rows, elapsed, peak = measure_peak(consume)
+    print(f"chunks({args.chunk_size}): {elapsed:.3f} с, пик памяти {peak:.1f} МБ, "
+          f"{rows / elapsed / 1e6:.1f} млн комбинаций/с; тип порции: {product.dtype}")
+
+    if product.size <= args.meshgrid_limit:
+        grid, elapsed, peak = measure_peak(lambda: _meshgrid_product(columns))
+        print(f"meshgrid + stack: {elapsed:.3f} с, пик памяти {peak:.1f} МБ, тип: {grid.dtype}")
+        del grid
+        # Сверяем порядок по meshgrid из номеров значений: там все столбцы одного типа
+        positions = _meshgrid_product([np.arange(len(c)) for c in columns])
+        combinations = product.to_array()
+        same = all(np.array_equal(combinations[name], column[positions[:, i]])
+                   for i, (name, column) in enumerate(zip(product.dtype.names, columns)))
+        print(f"Комбинации и их порядок совпадают с meshgrid: {same}")
+    else:
+        print("meshgrid пропущен: комбинаций больше --meshgrid-limit")
+
+    indices = np.random.default_rng(1).integers(0, product.size, 10 ** 6)
+    _, elapsed, _ = measure_peak(lambda: product[indices])
+    print(f"Доступ по номеру: 1 000 000 случайных комбинаций за {elapsed:.3f} с")
+    last = product[-1]
+    print(f"Последняя комбинация: {last}, совпадает: {last == tuple(c[-1] for c in columns)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Кодек длин серий (RLE) для длинных столбцов, на основе rle_with_numpy из np_tasks.py.
+
+rle_with_numpy кодирует только весь вектор целиком и не умеет
+декодировать. Здесь:
+
+* RunLengthEncoder кодирует поток порциями любого размера: последняя серия
+  порции не выдаётся сразу, а склеивается с первой серией следующей;
+* RunLengthArray хранит значения серий и накопленные концы серий (ends).
+  По ends позиция находится двоичным поиском (searchsorted), поэтому
+  доступ к элементу или диапазону не требует декодирования всего столбца;
+* при сохранении типы сужаются до минимальных (значения - до наименьшего
+  целого, в которое помещается диапазон, концы - до беззнакового по длине),
+  а сохранённый каталог открывается через np.load(mmap_mode='r').
+
+Как и в rle_with_numpy, NaN не равен сам себе, поэтому каждый NaN - отдельная серия.
+
+Запуск из каталога numpy_pandas_tasks:
+    python rle_codec.py --size 100M --run-length 1000 --chunk-size 1M
+"""
+import argparse
+import os
+import time
+from typing import Iterable, List, Optional, Union
+import numpy as np
+from np_tasks import rle_with_numpy
+from np_bench import parse_count
+
+VALUES_FILE = 'values.npy'
+ENDS_FILE = 'ends.npy'
+
+def narrow_dtype(values: np.ndarray) -> np.dtype:
+    """Наименьший целый тип, вмещающий все значения; для остальных типов - исходный."""
+    if values.dtype.kind not in 'iu' or values.size == 0:
+        return values.dtype
+    return np.result_type(np.min_scalar_type(values.min()), np.min_scalar_type(values.max()))
+
+class RunLengthArray:
+    """Закодированный столбец: values[i] повторяется до позиции ends[i] (не включая)."""
+    def __init__(self, values: np.ndarray, ends: np.ndarray):
+        if len(values) != len(ends):
+            raise ValueError(f"Разная длина values ({len(values)}) и ends ({len(ends)})")
+        self.values = values
+        self.ends = ends
+
+    @classmethod
+    def from_runs(cls, values, lengths) -> 'RunLengthArray':
+        values = np.asarray(values)
+        return cls(values, np.cumsum(np.asarray(lengths, dtype=np.int64)))
+
+    @classmethod
+    def encode(cls, x) -> 'RunLengthArray':
+        return cls.from_runs(*rle_with_numpy(x))
+
+    def __len__(self) -> int:
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    @property
+    def runs(self) -> int:
+        return len(self.values)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.ends, prepend=0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.ends.nbytes
+
+    def _positions(self, positions: np.ndarray) -> np.ndarray:
+        positions = np.where(positions < 0, positions + len(self), positions)
+        if positions.size and (positions.min() < 0 or positions.max() >= len(self)):
+            raise IndexError(f"Позиция вне диапазона 0..{len(self) - 1}")
+        return positions
+
+    def _run_of(self, positions) -> np.ndarray:
+        """Номера серий для позиций (уже проверенных на диапазон 0..len-1).
+
+        Позиции приводятся к типу ends: иначе np.searchsorted приводит и
+        копирует весь ends (после narrowed - uint32 и т.п.) при каждом вызове.
+        """
+        positions = np.asarray(positions)
+        if positions.dtype != self.ends.dtype:
+            limit = np.iinfo(self.ends.dtype).max
+            if positions.size and (positions.min() < 0 or positions.max() > limit):
+                raise IndexError(f"Позиция вне диапазона 0..{limit} для ends типа {self.ends.dtype}")
+            positions = positions.astype(self.ends.dtype)
+        return np.searchsorted(self.ends, positions, side='right')
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray]):
+        """Элемент, срез (с любым шагом) или массив позиций; серия ищется двоичным поиском по ends."""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step < 0:
+                # Срез идёт от start вниз до stop (не включая): декодируем [stop + 1, start + 1)
+                return self.decode(stop + 1, start + 1)[::step]
+            return self.decode(start, stop)[::step]
+        positions = self._positions(np.asarray(key, dtype=np.int64))
+        return self.values[self._run_of(positions)]
+
+    def decode(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Исходные значения в диапазоне [start, stop); по умолчанию - весь столбец."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return self.values[:0].copy()
+        first, last = self._run_of([start, stop - 1])
+        ends = np.array(self.ends[first:last + 1], dtype=np.int64)
+        ends[-1] = stop
+        lengths = np.diff(ends, prepend=start)
+        return np.repeat(self.values[first:last + 1], lengths)
+
+    def iter_decode(self, chunk_size: int) -> Iterable[np.ndarray]:
+        """Декодирует порциями по chunk_size элементов, не разворачивая весь столбец."""
+        for start in range(0, len(self), chunk_size):
+            yield self.decode(start, start + chunk_size)
+
+    def narrowed(self) -> 'RunLengthArray':
+        """Копия с минимальными типами значений и концов серий."""
+        ends_dtype = np.min_scalar_type(len(self))
+        return RunLengthArray(self.values.astype(narrow_dtype(self.values)), self.ends.astype(ends_dtype))
+
+    def save(self, directory: str):
+        """Сохраняет в каталог два .npy (значения и концы) с суженными типами."""
+        os.makedirs(directory, exist_ok=True)
+        compact = self.narrowed()
+        np.save(os.path.join(directory, VALUES_FILE), compact.values)
+        np.save(os.path.join(directory, ENDS_FILE), compact.ends)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'RunLengthArray':
+        """Открывает сохранённый столбец; при mmap=True данные читаются с диска по мере обращения."""
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(directory, VALUES_FILE), mmap_mode=mode),
+                   np.load(os.path.join(directory, ENDS_FILE), mmap_mode=mode))
+
+class RunLengthEncoder:
+    """Потоковый кодировщик: update(порция) ... finish() -> RunLengthArray.
+
+    Серия, которая пересекает границу порций, склеивается в одну.
+    """
+    def __init__(self):
+        self._values: List[np.ndarray] = []
+        self._lengths: List[np.ndarray] = []
+        self._last_value = None
+        self._last_length = 0
+
+    def update(self, chunk) -> 'RunLengthEncoder':
+        values, lengths = rle_with_numpy(chunk)
+        if len(values) == 0:
+            return self
+        lengths = lengths.astype(np.int64)
+        if self._last_length:
+            if values[0] == self._last_value:
+                lengths[0] += self._last_length
+            else:
+                self._values.append(np.asarray([self._last_value], dtype=values.dtype))
+                self._lengths.append(np.asarray([self._last_length], dtype=np.int64))
+        # Последняя серия может продолжиться в следующей порции
+        self._values.append(values[:-1])
+        self._lengths.append(lengths[:-1])
+        self._last_value, self._last_length = values[-1], int(lengths[-1])
+        return self
+
+    def finish(self) -> RunLengthArray:
+        values, lengths = list(self._values), list(self._lengths)
+        if self._last_length:
+            values.append(np.asarray([self._last_value]))
+            lengths.append(np.asarray([self._last_length], dtype=np.int64))
+        if not values:
+            return RunLengthArray(np.array([]), np.array([], dtype=np.int64))
+        return RunLengthArray.from_runs(np.concatenate(values), np.concatenate(lengths))
+
+def encode_stream(chunks: Iterable) -> RunLengthArray:
+    """Кодирует последовательность порций одного столбца."""
+    encoder = RunLengthEncoder()
+    for chunk in chunks:
+        encoder.update(chunk)
+    return encoder.finish()
+
+def _sensor_column(size: int, run_length: int, seed: int = 42) -> np.ndarray:
+    """Показания датчика: значение держится в среднем run_length отсчётов, затем меняется."""
+    rng = np.random.default_rng(seed)
+    runs = 2 * (size // run_length + 1) # с запасом, чтобы сумма длин точно покрыла size
+    lengths = rng.geometric(1 / run_length, runs)
+    values = np.cumsum(rng.integers(-5, 6, runs)) + 1000
+    return np.repeat(values, lengths)[:size]
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк потокового RLE-кодека на столбце показаний датчика.")
+    parser.add_argument('--size', type=parse_count, default=10 ** 7, help='Длина столбца (10M, 100M)')
+    parser.add_argument('--run-length', type=int, default=100, help='Средняя длина серии')
+    parser.add_argument('--chunk-size', type=parse_count, default=10 ** 6, help='Размер порции при кодировании')
+    parser.add_argument('--lookups', type=int, default=10 ** 6, help='Число случайных обращений по позиции')
+    parser.add_argument('--directory', type=str, default=None, help='Куда сохранить столбец (по умолчанию - не сохранять)')
+    args = parser.parse_args()
+
+    column = _sensor_column(args.size, args.run_length)
+    started = time.perf_counter()
+    whole = RunLengthArray.encode(column)
+    whole_time = time.perf_counter() - started
+    started = time.perf_counter()
+    encoded = encode_stream(column[start:start + args.chunk_size] for start in range(0, len(column), args.chunk_size))
+    stream_time = time.perf_counter() - started
+    compact = encoded.narrowed()
+    print(f"Столбец: {len(column)} значений {column.dtype}, {column.nbytes / 2 ** 20:.1f} МБ; серий: {encoded.runs}")
+    print(f"rle_with_numpy целиком:        {whole_time:.3f} с")
+    print(f"Порциями по {args.chunk_size}:      {stream_time:.3f} с, совпадает: "
+          f"{np.array_equal(whole.values, encoded.values) and np.array_equal(whole.ends, encoded.ends)}")
+    print(f"Сжатый размер: {compact.nbytes / 2 ** 20:.2f} МБ ({compact.values.dtype}/{compact.ends.dtype}), "
+          f"сжатие в {column.nbytes / max(compact.nbytes, 1):.1f} раз")
+
+    started = time.perf_counter()
+    decoded = compact.decode()
+    print(f"Декодирование: {time.perf_counter() - started:.3f} с, совпадает: {np.array_equal(decoded, column)}")
+    del decoded
+
+    positions = np.random.default_rng(0).integers(0, args.size, args.lookups)
+    started = time.perf_counter()
+    picked = compact[positions]
+    lookup_time = time.perf_counter() - started
+    print(f"Случайный доступ: {args.lookups} позиций за {lookup_time:.3f} с "
+          f"({lookup_time / args.lookups * 1e9:.0f} нс на позицию), совпадает: {np.array_equal(picked, column[positions])}")
+
+    if args.directory:
+        compact.save(args.directory)
+        mapped = RunLengthArray.load(args.directory)
+        print(f"Сохранено в {args.directory}; через memmap совпадает: "
+              f"{np.array_equal(mapped[positions[:1000]], column[positions[:1000]])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Описательная статистика за один проход по потоку (раздел CrunchieMunchies из np_tasks.py).
+
+np.mean, np.sort, np.median, np.std и np.percentile - каждый отдельный
+полный проход, а поиск наименьшего процентиля вызывает np.percentile в
+цикле. StreamingStats принимает данные порциями (update) и хранит только
+сводку:
+
+* число значений, среднее и сумму квадратов отклонений - порции
+  объединяются по формулам Велфорда/Чана, поэтому дисперсия считается
+  без второго прохода и без потери точности на больших средних;
+* минимум и максимум;
+* точную гистограмму (различные значения и их число), пока значения
+  целые и различных не больше max_distinct. По ней квантили совпадают с
+  np.percentile (линейная интерполяция);
+* иначе - KLL-скетч (KllSketch) с приближёнными квантилями: ошибка по
+  рангу порядка 1/k при памяти O(k log(n/k)). Когда гистограмма
+  перестаёт помещаться, её значения переносятся в скетч с весами.
+
+Сводки разных порций, потоков или процессов объединяются через merge.
+Квантили и обратная к ним функция (наименьший процентиль выше порога)
+считаются по одной кусочно-линейной функции ранг -> значение, без
+перебора процентилей. NaN пропускаются и считаются в nan_count.
+
+Запуск из каталога numpy_pandas_tasks:
+    python stream_stats.py --size 100M --chunk-size 1M --kind int
+    python stream_stats.py --size 10M --kind float --workers 2
+"""
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import numpy as np
+from np_bench import parse_count
+
+DEFAULT_MAX_DISTINCT = 1 << 16
+DEFAULT_SKETCH_K = 200
+
+class KllSketch:
+    """KLL-скетч квантилей: уровни-компакторы, элемент уровня h весит 2**h.
+
+    Переполненный уровень сортируется, и каждый второй элемент (со
+    случайным сдвигом) поднимается на уровень выше, а остальные
+    отбрасываются.
+    """
+    def __init__(self, k: int = DEFAULT_SKETCH_K, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            items = np.sort(items)
+            if len(items) % 2: # нечётный элемент остаётся на уровне
+                kept, items = items[-1:], items[:-1]
+            else:
+                kept = items[:0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # С новым уровнем ёмкость нижних уменьшилась - проверяем их заново
+            level = 0 if level + 2 == len(self.levels) else level + 1
+
+    def update(self, values) -> 'KllSketch':
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def update_weighted(self, values, counts) -> 'KllSketch':
+        """Добавляет values[i] с весом counts[i]: бит h веса кладёт значение на уровень h."""
+        values, counts = np.asarray(values, dtype=np.float64), np.asarray(counts, dtype=np.int64)
+        top = int(counts.max()).bit_length() if len(counts) else 0
+        while len(self.levels) < top:
+            self.levels.append(np.empty(0))
+        for level in range(top):
+            picked = values[(counts >> level) & 1 == 1]
+            self.levels[level] = np.concatenate([self.levels[level], picked])
+        self.n += int(counts.sum())
+        self._compress()
+        return self
+
+    def merge(self, other: 'KllSketch') -> 'KllSketch':
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def weighted(self):
+        """Отсортированные значения скетча и их веса."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    @property
+    def size(self) -> int:
+        """Число хранимых элементов."""
+        return sum(len(items) for items in self.levels)
+
+class StreamingStats:
+    """Сводка потока чисел: update(порция) ... затем mean, std, percentile и т.д."""
+    def __init__(self, max_distinct: int = DEFAULT_MAX_DISTINCT, sketch_k: int = DEFAULT_SKETCH_K,
+                 seed: Optional[int] = None):
+        self.max_distinct = max_distinct
+        self.sketch_k = sketch_k
+        self.seed = seed
+        self.count = 0
+        self.nan_count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # Точная гистограмма: отсортированные различные значения и их число; None - уже не помещается
+        self._values: Optional[np.ndarray] = np.empty(0)
+        self._counts: Optional[np.ndarray] = np.empty(0, dtype=np.int64)
+        self._sketch: Optional[KllSketch] = None
+
+    @property
+    def exact(self) -> bool:
+        """Квантили точные (хранится гистограмма), а не по скетчу."""
+        return self._values is not None
+
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        if count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self._m2 = count, mean, m2
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _to_sketch(self):
+        self._sketch = KllSketch(self.sketch_k, self.seed).update_weighted(self._values, self._counts)
+        self._values = self._counts = None
+
+    def _merge_histogram(self, values: np.ndarray, counts: np.ndarray):
+        values, inverse = np.unique(np.concatenate([self._values, values]), return_inverse=True)
+        self._counts = np.bincount(inverse, weights=np.concatenate([self._counts, counts])).astype(np.int64)
+        self._values = values
+        if len(values) > self.max_distinct:
+            self._to_sketch()
+
+    @staticmethod
+    def _histogram(chunk: np.ndarray):
+        """Различные значения порции и их число: bincount для узкого диапазона, иначе np.unique."""
+        low, high = chunk.min(), chunk.max()
+        if high - low < 4 * len(chunk):
+            counts = np.bincount((chunk - low).astype(np.int64))
+            present = np.flatnonzero(counts)
+            return present + low, counts[present]
+        return np.unique(chunk, return_counts=True)
+
+    def update(self, chunk) -> 'StreamingStats':
+        """Добавляет порцию значений (любой формы)."""
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        finite = ~np.isnan(chunk)
+        if not finite.all():
+            self.nan_count += int(len(chunk) - finite.sum())
+            chunk = chunk[finite]
+        if len(chunk) == 0:
+            return self
+        mean = chunk.mean()
+        self._merge_moments(len(chunk), float(mean), float(np.square(chunk - mean).sum()))
+        self.min, self.max = min(self.min, float(chunk.min())), max(self.max, float(chunk.max()))
+        if self.exact and np.array_equal(chunk, np.floor(chunk)):
+            self._merge_histogram(*self._histogram(chunk))
+        elif self.exact:
+            self._to_sketch()
+            self._sketch.update(chunk)
+        else:
+            self._sketch.update(chunk)
+        return self
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        """Добавляет сводку другой порции, потока или процесса."""
+        self._merge_moments(other.count, other.mean, other._m2)
+        self.nan_count += other.nan_count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        if self.exact and other.exact:
+            self._merge_histogram(other._values, other._counts)
+            return self
+        if self.exact:
+            self._to_sketch()
+        if other.exact:
+            self._sketch.update_weighted(other._values, other._counts)
+        else:
+            self._sketch.merge(other._sketch)
+        return self
+
+    @classmethod
+    def of(cls, chunks, **kwargs) -> 'StreamingStats':
+        """Сводка по последовательности порций."""
+        stats = cls(**kwargs)
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    def var(self, ddof: int = 0) -> float:
+        return self._m2 / (self.count - ddof) if self.count > ddof else math.nan
+
+    def std(self, ddof: int = 0) -> float:
+        return math.sqrt(self.var(ddof))
+
+    def _curve(self):
+        """Кусочно-линейная функция ранг -> значение (ранги 0..count-1), как у np.percentile.
+
+        Для гистограммы у каждого значения две точки - первый и последний
+        ранг, так что интерполяция точная. Для скетча - одна точка в
+        середине рангов, которые представляет элемент.
+        """
+        if self.exact:
+            ends = np.cumsum(self._counts)
+            ranks = np.column_stack([ends - self._counts, ends - 1]).ravel().astype(np.float64)
+            return ranks, np.repeat(self._values, 2)
+        values, weights = self._sketch.weighted()
+        return np.cumsum(weights) - (weights + 1) / 2, values
+
+    def percentile(self, q):
+        """Процентили (0..100, число или массив) с линейной интерполяцией."""
+        if self.count == 0:
+            raise ValueError("Нет данных")
+        ranks, values = self._curve()
+        return np.interp(np.asarray(q, dtype=np.float64) / 100 * (self.count - 1), ranks, values)
+
+    def quantile(self, q):
+        return self.percentile(np.asarray(q, dtype=np.float64) * 100)
+
+    def median(self) -> float:
+        return float(self.percentile(50))
+
+    def count_above(self, threshold: float) -> int:
+        """Сколько значений больше threshold (по скетчу - оценка)."""
+        if self.exact:
+            return int(self._counts[self._values > threshold].sum())
+        values, weights = self._sketch.weighted()
+        return int(weights[values > threshold].sum())
+
+    def cdf(self, threshold: float) -> float:
+        """Доля значений не больше threshold."""
+        return 1 - self.count_above(threshold) / self.count if self.count else math.nan
+
+    def percentile_above(self, threshold: float) -> float:
+        """Точная нижняя грань процентилей, значение которых больше threshold.
+
+        Обращение функции ранг -> значение: процентили строго больше
+        результата превышают threshold. -inf - если все значения больше,
+        inf - если таких процентилей нет.
+        """
+        ranks, values = self._curve()
+        i = int(np.searchsorted(values, threshold, side='right'))
+        if i == 0:
+            return -math.inf
+        if i == len(values):
+            return math.inf
+        rank = ranks[i - 1] + (threshold - values[i - 1]) / (values[i] - values[i - 1]) * (ranks[i] - ranks[i - 1])
+        return rank / (self.count - 1) * 100 if self.count > 1 else -math.inf
+
+    def smallest_percentile_above(self, threshold: float, step: float = 1, lowest: float = 0) -> Optional[float]:
+        """Наименьший процентиль из lowest, lowest + step, ... (до 100), значение которого больше threshold."""
+        bound = self.percentile_above(threshold)
+        if bound == math.inf:
+            return None
+        n = 0 if bound == -math.inf else max(0, math.floor((bound - lowest) / step) + 1)
+        # Поправка на округление у самой границы
+        while n > 0 and self.percentile(lowest + (n - 1) * step) > threshold:
+            n -= 1
+        while lowest + n * step <= 100 and not self.percentile(lowest + n * step) > threshold:
+            n += 1
+        return lowest + n * step if lowest + n * step <= 100 else None
+
+    def sorted_values(self) -> np.ndarray:
+        """Все значения по возрастанию - только пока хранится точная гистограмма."""
+        if not self.exact:
+            raise ValueError("Значения не сохранены: гистограмма заменена скетчем")
+        return np.repeat(self._values, self._counts)
+
+def _chunk(kind: str, size: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if kind == 'int': # калорийность: небольшой целый диапазон
+        return np.round(rng.normal(107, 20, size)).clip(0, 300)
+    return rng.lognormal(4.6, 0.25, size)
+
+def _stats_of_part(args) -> StreamingStats:
+    """Сводка по части порций - выполняется в отдельном процессе."""
+    kind, starts, size, chunk_size = args
+    return StreamingStats.of((_chunk(kind, min(chunk_size, size - start), start) for start in starts), seed=0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк потоковой статистики против вызовов NumPy.")
+    parser.add_argument('--size', type=parse_count, default=10 ** 7)
+    parser.add_argument('--chunk-size', type=parse_count, default=10 ** 6)
+    parser.add_argument('--kind', choices=['int', 'float'], default='int',
+                        help='int - целые из небольшого диапазона (гистограмма), float - скетч')
+    parser.add_argument('--threshold', type=float, default=60)
+    parser.add_argument('--workers', type=int, default=0, help='Процессов для сводок по частям (0 - не запускать)')
+    parser.add_argument('--numpy-limit', type=parse_count, default=10 ** 8,
+                        help='Сравнивать с NumPy, только если значений не больше')
+    args = parser.parse_args()
+
+    starts = range(0, args.size, args.chunk_size)
+    started = time.perf_counter()
+    stats = StreamingStats(seed=0)
+    for start in starts:
+        stats.update(_chunk(args.kind, min(args.chunk_size, args.size - start), start))
+    stream_time = time.perf_counter() - started
+    percentiles = np.arange(1, 100)
+    estimates = stats.percentile(percentiles)
+    print(f"{args.size} значений ({args.kind}), порции по {args.chunk_size}: {stream_time:.3f} с "
+          f"(включая генерацию); точная гистограмма: {stats.exact}")
+    if not stats.exact:
+        print(f"KLL-скетч: {stats._sketch.size} элементов, k = {stats.sketch_k}")
+
+    if args.workers:
+        parts = [(args.kind, starts[i::args.workers], args.size, args.chunk_size) for i in range(args.workers)]
+        started = time.perf_counter()
+        with ProcessPoolExecutor(args.workers) as pool:
+            merged = StreamingStats(seed=0)
+            for part in pool.map(_stats_of_part, parts):
+                merged.merge(part)
+        print(f"{args.workers} процесса + merge: {time.perf_counter() - started:.3f} с; "
+              f"среднее {merged.mean:.6f} / {stats.mean:.6f}, std {merged.std():.6f} / {stats.std():.6f}")
+
+    if args.size > args.numpy_limit:
+        return
+    data = np.concatenate([_chunk(args.kind, min(args.chunk_size, args.size - start), start) for start in starts])
+    timings = {}
+    started = time.perf_counter()
+    exact_mean = np.mean(data)
+    timings['np.mean'] = time.perf_counter() - started
+    started = time.perf_counter()
+    exact_std = np.std(data)
+    timings['np.std'] = time.perf_counter() - started
+    started = time.perf_counter()
+    ordered = np.sort(data)
+    timings['np.sort'] = time.perf_counter() - started
+    started = time.perf_counter()
+    np.median(data)
+    timings['np.median'] = time.perf_counter() - started
+    started = time.perf_counter()
+    exact = np.array([np.percentile(data, p) for p in percentiles])
+    timings['np.percentile x99'] = time.perf_counter() - started
+    started = time.perf_counter()
+    for p in percentiles: # как цикл в np_tasks.py, но по всем процентилям
+        if np.percentile(data, p) > args.threshold:
+            break
+    timings['поиск процентиля'] = time.perf_counter() - started
+    for name, elapsed in timings.items():
+        print(f"{name:<20} {elapsed:.3f} с")
+    started = time.perf_counter()
+    found = stats.smallest_percentile_above(args.threshold, lowest=1)
+    print(f"{'обращение CDF':<20} {time.perf_counter() - started:.6f} с: процентиль {found}, "
+          f"перебор NumPy: {p if np.percentile(data, p) > args.threshold else None}")
+
+    print(f"Ошибка среднего: {abs(stats.mean - exact_mean) / abs(exact_mean):.2e}, "
+          f"std: {abs(stats.std() - exact_std) / exact_std:.2e} (относительная)")
+    # Ошибка ранга: насколько доля percentiles / 100 вне диапазона рангов, занятых оценкой
+    left = np.searchsorted(ordered, estimates, side='left') / len(data)
+    right = np.searchsorted(ordered, estimates, side='right') / len(data)
+    rank_error = np.maximum(0, np.maximum(left - percentiles / 100, percentiles / 100 - right))
+    print(f"Процентили 1..99: макс. отклонение значения {np.max(np.abs(estimates - exact)):.4g}, "
+          f"макс. ошибка ранга {rank_error.max():.4%}")
+
+if __name__ == "__main__":
+    main()
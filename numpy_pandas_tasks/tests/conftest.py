@@ -0,0 +1,44 @@
+"""Модули каталога импортируются плоско, как при запуске скриптов из numpy_pandas_tasks."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+_ADULT_VALUES = {
+    'workclass': ['Private', 'Self-emp-not-inc', 'State-gov', '?'],
+    'education': ['Bachelors', 'HS-grad', 'Masters', '11th', 'Some-college', 'Doctorate'],
+    'marital-status': ['Married-civ-spouse', 'Never-married', 'Divorced', 'Married-spouse-absent'],
+    'occupation': ['Tech-support', 'Sales', 'Exec-managerial', 'Craft-repair', '?'],
+    'relationship': ['Husband', 'Wife', 'Not-in-family', 'Own-child'],
+    'race': ['White', 'Black', 'Asian-Pac-Islander'],
+    'sex': ['Male', 'Female'],
+    'native-country': ['United-States', 'Mexico', 'India', '?'],
+    'salary': ['<=50K', '>50K'],
+}
+
+def write_adult(path, rows: int, seed: int = 0, trailing: str = '\n') -> str:
+    """Небольшой файл в формате adult.data: пробелы после запятых и '?' вместо пропусков."""
+    rng = np.random.default_rng(seed)
+    pick = {column: rng.choice(values, rows) for column, values in _ADULT_VALUES.items()}
+    lines = []
+    for i in range(rows):
+        lines.append(', '.join(str(value) for value in (
+            rng.integers(17, 91), pick['workclass'][i], rng.integers(10_000, 500_000), pick['education'][i],
+            rng.integers(1, 17), pick['marital-status'][i], pick['occupation'][i], pick['relationship'][i],
+            pick['race'][i], pick['sex'][i], rng.integers(0, 100_000), rng.integers(0, 5000),
+            rng.choice([3, 40, 60, 99]), pick['native-country'][i], pick['salary'][i])))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + trailing)
+    return str(path)
+
+@pytest.fixture
+def adult_file(tmp_path):
+    return write_adult(tmp_path / 'adult.data', 60)
+
+@pytest.fixture
+def make_adult(tmp_path):
+    """write_adult для файлов во временном каталоге теста (conftest нельзя импортировать напрямую)."""
+    return lambda name, rows, **options: write_adult(tmp_path / name, rows, **options)
@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+import pytest
+import adult_loader
+from adult_loader import CATEGORICAL_COLUMNS, DTYPES, cache_path, load_adult
+
+def _assert_same(frame, expected):
+    assert frame.dtypes.equals(expected.dtypes)
+    for column in CATEGORICAL_COLUMNS:
+        assert list(frame[column].cat.categories) == list(expected[column].cat.categories)
+    assert frame.equals(expected)
+
+def test_dtypes_and_missing_values(adult_file):
+    frame = load_adult(adult_file, cache_dir=None)
+    assert len(frame) == 60
+    assert {column: str(dtype) for column, dtype in frame[list(DTYPES)].dtypes.items()} == DTYPES
+    # Пробелы после запятых сняты, '?' стал пропуском и не попал в категории
+    assert '?' not in frame['workclass'].cat.categories and frame['workclass'].isna().any()
+    assert not frame['education'].str.startswith(' ').any()
+
+# Маленькие порции дают разные наборы категорий, которые concat_frames сводит в общий
+@pytest.mark.parametrize('options', [dict(chunksize=1), dict(chunksize=7), dict(processes=2), dict(processes=3)])
+def test_chunked_and_parallel_match_plain_read(adult_file, options):
+    _assert_same(load_adult(adult_file, cache_dir=None, **options), load_adult(adult_file, cache_dir=None))
+
+@pytest.mark.parametrize('trailing', ['\n\n', ''])
+def test_parallel_edge_cases(make_adult, trailing):
+    path = make_adult('small.data', 3, seed=1, trailing=trailing)
+    expected = load_adult(path, cache_dir=None)
+    assert len(expected) == 3
+    # Процессов больше, чем строк: лишние диапазоны пустые и не читаются
+    _assert_same(load_adult(path, cache_dir=None, processes=8), expected)
+    _assert_same(load_adult(path, cache_dir=None, processes=2), expected)
+
+def test_cache_hit_returns_same_frame(adult_file, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    expected = load_adult(adult_file, cache_dir=None)
+    _assert_same(load_adult(adult_file, cache_dir=cache_dir), expected)
+    assert os.path.exists(cache_path(adult_file, cache_dir))
+
+    def no_parse(*args):
+        raise AssertionError("файл читается повторно вместо кэша")
+    monkeypatch.setattr(adult_loader, '_read_c', no_parse)
+    monkeypatch.setattr(adult_loader, '_read_parallel', no_parse)
+    _assert_same(load_adult(adult_file, cache_dir=cache_dir), expected)
+    _assert_same(load_adult(adult_file, cache_dir=cache_dir, processes=2), expected)
+    monkeypatch.undo()
+    # Изменённый файл даёт новый ключ кэша
+    with open(adult_file) as f:
+        first_line = f.readline()
+    with open(adult_file, 'a') as f:
+        f.write(first_line)
+    assert len(load_adult(adult_file, cache_dir=cache_dir)) == 61
+
+def test_pyarrow_engine_matches_c(adult_file):
+    pytest.importorskip('pyarrow')
+    _assert_same(load_adult(adult_file, engine='pyarrow', cache_dir=None), load_adult(adult_file, cache_dir=None))
@@ -0,0 +1,20 @@
+import pytest
+from adult_loader import iter_adult_chunks, load_adult
+from census_engine import CensusAggregates, compare_results, multi_pass_results
+
+@pytest.mark.parametrize('chunksize', [1, 7, 60])
+def test_single_pass_matches_multi_pass(adult_file, chunksize):
+    expected = multi_pass_results(load_adult(adult_file, cache_dir=None))
+    actual = CensusAggregates.from_chunks(iter_adult_chunks(adult_file, chunksize)).results()
+    assert compare_results(expected, actual) == []
+
+@pytest.mark.parametrize('chunksize', [1, 7, 60])
+def test_merged_parts_match_multi_pass(adult_file, chunksize):
+    data = load_adult(adult_file, cache_dir=None)
+    chunks = list(iter_adult_chunks(adult_file, chunksize))
+    # Куски файла считаются отдельно (как в разных процессах) и объединяются по порядку
+    middle = max(1, len(chunks) // 2)
+    merged = CensusAggregates.from_chunks(chunks[:middle])
+    merged.merge(CensusAggregates.from_chunks(chunks[middle:]))
+    assert merged.rows == len(data)
+    assert compare_results(multi_pass_results(data), merged.results()) == []
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pytest
+from dedup_ops import deduplicate, rows_not_all_equal
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(11).integers(0, 4, (3000, 3), dtype=np.int16)
+
+def _expected(array):
+    rows, index, inverse, counts = np.unique(array, axis=0, return_index=True, return_inverse=True,
+                                             return_counts=True)
+    return rows, index, counts, inverse.reshape(-1)
+
+# memory_limit=20000 даёт много разделов, которые пишутся во временный каталог
+@pytest.mark.parametrize('memory_limit', [2 ** 28, 20000])
+def test_sorted_matches_np_unique(array, memory_limit):
+    result = deduplicate(array, order='sorted', return_inverse=True, memory_limit=memory_limit)
+    for got, expected in zip(result, _expected(array)):
+        assert np.array_equal(got, expected)
+
+@pytest.mark.parametrize('memory_limit', [2 ** 28, 20000])
+def test_first_keeps_input_order(array, memory_limit):
+    rows, index, counts, _ = _expected(array)
+    result = deduplicate(array, return_inverse=True, memory_limit=memory_limit)
+    order = np.argsort(index)
+    assert np.array_equal(result.rows, rows[order])
+    assert np.array_equal(result.index, index[order])
+    assert np.array_equal(result.counts, counts[order])
+    assert np.array_equal(result.rows[result.inverse], array)
+
+def test_npy_source_and_outputs(array, tmp_path):
+    source, out, inverse_out = (str(tmp_path / name) for name in ('in.npy', 'rows.npy', 'inverse.npy'))
+    np.save(source, array)
+    result = deduplicate(source, order='sorted', return_inverse=True, memory_limit=20000, chunk_rows=500,
+                         out=out, inverse_out=inverse_out, tmp_dir=str(tmp_path))
+    rows, _, _, inverse = _expected(array)
+    assert np.array_equal(np.load(out), rows) and np.array_equal(np.load(inverse_out), inverse)
+    assert np.array_equal(result.rows, rows)
+    # Временный каталог с разделами удалён
+    assert sorted(os.listdir(tmp_path)) == ['in.npy', 'inverse.npy', 'rows.npy']
+
+def test_rows_not_all_equal(array):
+    array[::4] = array[::4, :1]
+    expected = ~np.all(array == array[:, :1], axis=1)
+    assert np.array_equal(rows_not_all_equal(array, chunk_rows=7), expected)
+
+def test_rejects_float_input():
+    with pytest.raises(ValueError):
+        deduplicate(np.zeros((3, 2)))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from distance_engine import PairwiseDistances
+
+def _reference(X, Y):
+    return np.sqrt(((X[:, np.newaxis, :] - Y[np.newaxis, :, :]) ** 2).sum(axis=2))
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(7)
+    return rng.normal(size=(53, 4)), rng.normal(size=(71, 4))
+
+# Маленький memory_limit дробит матрицу на много плиток; workers > 1 включает пул потоков
+ENGINES = [PairwiseDistances(), PairwiseDistances(memory_limit=2000, workers=1),
+           PairwiseDistances(memory_limit=2000, workers=3)]
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_pairwise_matches_full_matrix(engine, points, tmp_path):
+    X, Y = points
+    expected = _reference(X, Y)
+    assert np.allclose(engine.pairwise(X, Y), expected)
+    out = np.lib.format.open_memmap(str(tmp_path / 'd.npy'), mode='w+', dtype=np.float64, shape=expected.shape)
+    assert engine.pairwise(X, Y, out=out) is out
+    assert np.allclose(out, expected)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_reductions_match_full_matrix(engine, points):
+    X, Y = points
+    expected = _reference(X, Y)
+    distances, indices = engine.min_distance(X, Y)
+    assert np.array_equal(indices, expected.argmin(axis=1))
+    assert np.allclose(distances, expected.min(axis=1))
+    distances, indices = engine.top_k(X, Y, 5)
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :5])
+    assert np.allclose(np.take_along_axis(expected, indices, axis=1), distances)
+    radius = np.median(expected)
+    assert np.array_equal(engine.radius_count(X, Y, radius), (expected <= radius).sum(axis=1))
+
+def test_top_k_rejects_bad_k(points):
+    X, Y = points
+    with pytest.raises(ValueError):
+        PairwiseDistances().top_k(X, Y, len(Y) + 1)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from group_ops import GroupPredicate, group_filter, group_mask, prefix_category
+from group_ops import _category_baseline, _filter_baseline, _synthetic
+
+def test_group_filter_matches_groupby_filter():
+    data = _synthetic(5000, 40)
+    assert group_filter(data, 'occupation', GroupPredicate('age', 'mean', '<=', 54),
+                        GroupPredicate('hours-per-week', 'min', '>', 1)).equals(
+        data.groupby('occupation', observed=True).filter(
+            lambda group: group['age'].mean() <= 54 and group['hours-per-week'].min() > 1))
+    assert group_filter(data, 'occupation', GroupPredicate('age', 'mean', '<=', 40),
+                        GroupPredicate('hours-per-week', 'min', '>', 5)).equals(_filter_baseline(data))
+
+def test_group_mask_skips_missing_keys():
+    data = pd.DataFrame({'key': ['a', None, 'b', 'a', 'b', None], 'value': [1, 100, 5, 3, 7, 0]})
+    expected = data.groupby('key').filter(lambda group: group['value'].max() > 4).index
+    mask = group_mask(data, 'key', GroupPredicate('value', 'max', '>', 4))
+    assert list(data.index[mask]) == list(expected) == [2, 4]
+
+def test_prefix_category_matches_apply():
+    statuses = _synthetic(2000, 5)['marital-status'].astype(object)
+    statuses[::7] = None
+    result = prefix_category(statuses, 'Married', 'Married', 'Single')
+    expected = statuses.map(lambda x: 'Married' if x.startswith('Married') else 'Single', na_action='ignore')
+    assert result.isna().equals(expected.isna())
+    assert result.dropna().astype(str).equals(expected.dropna().astype(str))
+    categorical = _synthetic(2000, 5)['marital-status']
+    assert np.array_equal(prefix_category(categorical, 'Married', 'Married', 'Single').astype(str),
+                          _category_baseline(categorical).astype(str))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from match_ops import rows_matching_all, rows_matching_all_isin
+
+@pytest.fixture
+def arrays():
+    rng = np.random.default_rng(3)
+    A = rng.integers(0, 40, (3000, 3))
+    A[:300] = [7, 11, 25] # строки, которые подходят ко всем строкам B
+    B = rng.integers(0, 40, (60, 2))
+    B[:, 0] = rng.choice([7, 11, 25], len(B))
+    return A, B
+
+# Маленький memory_limit дробит B на блоки и A на пачки
+@pytest.mark.parametrize('method', ['auto', 'bitset', 'sorted'])
+@pytest.mark.parametrize('memory_limit', [2 ** 26, 4000])
+def test_matches_isin(arrays, method, memory_limit):
+    A, B = arrays
+    expected = rows_matching_all_isin(A, B)
+    assert expected.sum() >= 300
+    assert np.array_equal(rows_matching_all(A, B, method, memory_limit), expected)
+
+def test_wide_range_and_float_values():
+    rng = np.random.default_rng(5)
+    A, B = rng.integers(-10 ** 6, 10 ** 6, (500, 4)), rng.integers(-10 ** 6, 10 ** 6, (3, 2))
+    A[::5, 0], A[::5, 1], A[::5, 2] = B[0, 0], B[1, 1], B[2, 0]
+    for values in (A, B), (A / 2, B / 2):
+        assert np.array_equal(rows_matching_all(*values, method='sorted'), rows_matching_all_isin(*values))
+    assert np.array_equal(rows_matching_all(A, B, method='bitset'), rows_matching_all_isin(A, B))
+
+def test_edge_cases():
+    A = np.arange(6).reshape(3, 2)
+    assert rows_matching_all(A, np.empty((0, 2), dtype=int)).all()
+    assert not rows_matching_all(A, np.empty((2, 0), dtype=int)).any()
+    with pytest.raises(ValueError):
+        rows_matching_all(A, A, method='hash')
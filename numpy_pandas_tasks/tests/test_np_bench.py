@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from np_bench import PAIRS, crossover, median_ci, parse_count
+
+# Обе реализации пары должны давать одинаковый ответ на входах бенчмарка
+@pytest.mark.parametrize('name', sorted(PAIRS))
+@pytest.mark.parametrize('dtype', ['int8', 'int64', 'float64'])
+def test_pair_implementations_agree(name, dtype):
+    pair = PAIRS[name]
+    for distribution in pair.distributions:
+        for size in (1, 10, 2500):
+            args = pair.make(np.random.default_rng(size), size, np.dtype(dtype), distribution)
+            expected = pair.python(*(arg.tolist() for arg in args))
+            result = pair.numpy(*args)
+            if isinstance(expected, tuple):
+                assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+            else:
+                assert result == expected
+
+def test_parse_count():
+    assert [parse_count(v) for v in ('100', '10k', '1.5M', '1G')] == [100, 10 ** 4, 1_500_000, 10 ** 9]
+
+def test_median_ci_contains_median():
+    median, low, high = median_ci([3.0, 1.0, 2.0, 5.0, 4.0], np.random.default_rng(0))
+    assert median == 3.0 and low <= median <= high
+    assert median_ci([2.0], np.random.default_rng(0)) == (2.0, 2.0, 2.0)
+
+def test_crossover():
+    assert crossover([(10, 1.0, 2.0), (1000, 2.0, 1.0)]) == '~100'
+    assert crossover([(10, 2.0, 1.0), (1000, 4.0, 1.0)]) == '<= 10'
+    assert crossover([(10, 1.0, 2.0)]) is None
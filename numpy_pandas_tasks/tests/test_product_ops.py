@@ -0,0 +1,41 @@
+import itertools
+import numpy as np
+import pytest
+from product_ops import CartesianProduct, _meshgrid_product
+
+COLUMNS = [np.arange(3), np.array([0.5, 1.5, 2.5, 3.5]), np.array(['a', 'b'])]
+
+def test_xy_order_matches_meshgrid():
+    product = CartesianProduct(*COLUMNS)
+    positions = _meshgrid_product([np.arange(len(c)) for c in COLUMNS])
+    combinations = np.concatenate(list(product.chunks(5)))
+    for i, (name, column) in enumerate(zip(product.dtype.names, COLUMNS)):
+        assert np.array_equal(combinations[name], column[positions[:, i]])
+
+def test_ij_order_matches_itertools():
+    product = CartesianProduct(*COLUMNS, indexing='ij')
+    assert [tuple(row) for row in product.to_array()] == list(itertools.product(*COLUMNS))
+    assert product[-1] == tuple(c[-1] for c in COLUMNS)
+
+def test_stack_matches_meshgrid():
+    arr1 = np.array([[1, 'A'], [2, 'B'], [3, 'C']])
+    assert np.array_equal(CartesianProduct(*arr1.T).stack(), _meshgrid_product(list(arr1.T)))
+
+def test_products_larger_than_int64():
+    product = CartesianProduct(*[np.arange(10 ** 5)] * 4, indexing='ij')
+    assert product.size == 10 ** 20
+    start = 10 ** 19 + 99_998
+    chunks = list(product.chunks(3, start=start, stop=start + 5))
+    assert [tuple(row) for row in np.concatenate(chunks)] == [product[k] for k in range(start, start + 5)]
+    assert tuple(product[np.array([0, 5])][1]) == (0, 0, 0, 5)
+    assert tuple(next(product.chunks(2, start=product.size - 1))[0]) == (99999,) * 4
+    assert [tuple(row) for row in product[np.array([-1, 3, -(10 ** 18)])]] == \
+        [product[-1], product[3], product[product.size - 10 ** 18]]
+
+def test_negative_array_index_wraps_like_scalar():
+    product = CartesianProduct(*COLUMNS)
+    keys = np.array([-1, 0, -24, 5, -7])
+    assert [tuple(row) for row in product[keys]] == [product[int(k)] for k in keys]
+    for bad in ([-25], [24], [0, -100]):
+        with pytest.raises(IndexError):
+            product[np.array(bad)]
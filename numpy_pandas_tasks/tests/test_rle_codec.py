@@ -0,0 +1,39 @@
+import tracemalloc
+import numpy as np
+from rle_codec import RunLengthArray, _sensor_column, encode_stream
+
+def test_stream_matches_whole_and_decodes():
+    column = _sensor_column(100_000, 7)
+    whole = RunLengthArray.encode(column)
+    stream = encode_stream(column[i:i + 999] for i in range(0, len(column), 999))
+    assert np.array_equal(whole.values, stream.values) and np.array_equal(whole.ends, stream.ends)
+    assert np.array_equal(stream.decode(), column)
+    assert np.array_equal(stream[123:4567], column[123:4567])
+
+def test_narrowed_memmap_lookups_do_not_copy_ends(tmp_path):
+    column = _sensor_column(2_000_000, 2)
+    RunLengthArray.encode(column).save(str(tmp_path))
+    mapped = RunLengthArray.load(str(tmp_path))
+    assert mapped.ends.dtype == np.uint32
+    positions = np.array([0, 12345, len(column) - 1])
+    tracemalloc.start()
+    try:
+        picked = mapped[positions]
+        scalar = mapped[777_777]
+        part = mapped.decode(1_000_000, 1_000_100)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < mapped.ends.nbytes // 10
+    assert np.array_equal(picked, column[positions]) and scalar == column[777_777]
+    assert np.array_equal(part, column[1_000_000:1_000_100])
+
+def test_slices_match_ndarray():
+    x = np.array([1, 1, 2, 2, 2, 3, 9, 9])
+    r = RunLengthArray.encode(x)
+    assert np.array_equal(r[::-1], [9, 9, 3, 2, 2, 2, 1, 1]) and np.array_equal(r[6:1:-2], [9, 2, 2])
+    column = _sensor_column(5000, 3)
+    rle = RunLengthArray.encode(column)
+    for key in (slice(None, None, -1), slice(4000, 17, -3), slice(None, 100, -7), slice(-5, None, -2),
+                slice(None, None, 4), slice(33, 4500, 11), slice(10, 3), slice(3, 10, -1), slice(-1, -2, -1)):
+        assert np.array_equal(rle[key], column[key]), key
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from stream_stats import KllSketch, StreamingStats
+
+PERCENTILES = [0, 1, 12.5, 25, 50, 77.7, 99, 100]
+
+def _chunks(values, size):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+@pytest.fixture
+def calories():
+    return np.random.default_rng(1).integers(50, 900, 20000).astype(np.float64)
+
+def test_exact_moments_and_percentiles(calories):
+    stats = StreamingStats.of(_chunks(calories, 777))
+    assert stats.exact and stats.count == len(calories)
+    assert stats.mean == pytest.approx(calories.mean())
+    assert stats.std() == pytest.approx(calories.std())
+    assert stats.std(ddof=1) == pytest.approx(calories.std(ddof=1))
+    assert (stats.min, stats.max) == (calories.min(), calories.max())
+    assert np.allclose(stats.percentile(PERCENTILES), np.percentile(calories, PERCENTILES))
+    assert stats.median() == np.median(calories)
+    assert np.array_equal(stats.sorted_values(), np.sort(calories))
+    assert stats.count_above(600) == (calories > 600).sum()
+
+def test_smallest_percentile_above_matches_loop(calories):
+    stats = StreamingStats.of([calories])
+    for threshold in (49, 300, 641.5, 899):
+        expected = next((p for p in range(101) if np.percentile(calories, p) > threshold), None)
+        assert stats.smallest_percentile_above(threshold) == expected
+    assert stats.smallest_percentile_above(900) is None
+
+def test_merge_matches_single_pass(calories):
+    parts = [StreamingStats.of(_chunks(part, 500)) for part in np.array_split(calories, 4)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    single = StreamingStats.of([calories])
+    assert merged.count == single.count and merged.exact
+    assert merged.mean == pytest.approx(single.mean) and merged.var() == pytest.approx(single.var())
+    assert np.allclose(merged.percentile(PERCENTILES), single.percentile(PERCENTILES))
+
+def test_large_mean_keeps_precision():
+    values = 1e9 + np.random.default_rng(2).normal(size=10000)
+    stats = StreamingStats.of(_chunks(values, 999))
+    assert stats.var() == pytest.approx(values.var(), rel=1e-6)
+
+def test_nan_is_counted_and_skipped():
+    stats = StreamingStats().update([1.0, np.nan, 3.0, np.nan])
+    assert (stats.count, stats.nan_count, stats.mean) == (2, 2, 2.0)
+
+# Гистограмма переполняется (max_distinct) или приходят дробные значения - переход на скетч
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(4).integers(0, 10 ** 6, 50000).astype(np.float64),
+    np.random.default_rng(4).normal(100, 15, 50000),
+])
+def test_sketch_rank_error(values):
+    stats = StreamingStats(max_distinct=1000, seed=0)
+    for part in np.array_split(values, 5):
+        stats.merge(StreamingStats.of(_chunks(part, 1000), max_distinct=1000, seed=0))
+    assert not stats.exact
+    assert stats.mean == pytest.approx(values.mean()) and stats.std() == pytest.approx(values.std())
+    ordered = np.sort(values)
+    for q in PERCENTILES[1:-1]:
+        rank = np.searchsorted(ordered, stats.percentile(q)) / len(values)
+        assert abs(rank - q / 100) < 0.02
+    with pytest.raises(ValueError):
+        stats.sorted_values()
+
+def test_kll_weighted_update_keeps_total_weight():
+    sketch = KllSketch(k=50, seed=0).update_weighted(np.arange(100.0), np.full(100, 7))
+    sketch.merge(KllSketch(k=50, seed=1).update(np.arange(1000.0)))
+    values, weights = sketch.weighted()
+    assert sketch.n == 1700 and np.all(np.diff(values) >= 0)
+    assert sketch.size < 1700 and weights.sum() == sketch.n
@@ -0,0 +1,14 @@
+-- Индексы для отчётов из sql_queires.sql (создаёт и удаляет sakila_runner.py)
+
+-- Task 2: фильм -> экземпляры -> прокаты без чтения самих таблиц (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_report_film_actor_film ON film_actor (film_id, actor_id);
+CREATE INDEX IF NOT EXISTS idx_report_inventory_film ON inventory (film_id, inventory_id);
+CREATE INDEX IF NOT EXISTS idx_report_rental_inventory ON rental (inventory_id, rental_id);
+
+-- Task 3: сумма платежей по прокату берётся прямо из индекса
+CREATE INDEX IF NOT EXISTS idx_report_payment_rental ON payment (rental_id) INCLUDE (amount);
+CREATE INDEX IF NOT EXISTS idx_report_film_category_film ON film_category (film_id, category_id);
+
+-- Task 5: фильтр по имени категории и переход к фильмам категории
+CREATE INDEX IF NOT EXISTS idx_report_category_name ON category (name, category_id);
+CREATE INDEX IF NOT EXISTS idx_report_film_category_category ON film_category (category_id, film_id);
@@ -0,0 +1,270 @@
+"""Запуск и бенчмарк отчётов Sakila из sql_queires.sql.
+
+Запросы читаются из sql_queires.sql (разделы "-- Task N"), переписанные
+версии - из sql_queries_optimized.sql, индексы - из sakila_indexes.sql.
+Запросы выполняются через QueryRunner и выгружаются через DataExporter из
+task_1/main.py, поэтому подключение к базе (config.py) и формат результатов
+те же, что в task_1; имя базы задаётся --dbname.
+
+Команды:
+* run - выполнить отчёты и сохранить результаты в JSON или XML;
+* explain - сохранить планы EXPLAIN (ANALYZE, BUFFERS) всех запросов;
+* bench - замерить запросы без индексов и с индексами (медиана по клиенту и
+  серверное время по EXPLAIN ANALYZE), сверить результаты исходных и
+  переписанных запросов и записать отчёт в JSON;
+* scale - увеличить данные в N раз: прокаты и платежи копируются со
+  сдвигом ключей и времени на микросекунды (часы проката не меняются).
+  Повторный запуск сначала удаляет прежние копии, так что коэффициент
+  можно менять.
+
+Запуск из каталога sql:
+    python sakila_runner.py --dbname sakila scale 100
+    python sakila_runner.py --dbname sakila bench --repeat 5
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+import psycopg2
+
+SQL_DIR = os.path.dirname(os.path.abspath(__file__))
+# QueryRunner и DataExporter берём из task_1, как если бы скрипт запускался оттуда
+sys.path.insert(0, os.path.join(SQL_DIR, '..', 'task_1'))
+from config import DB_CONFIG
+from main import QueryRunner, DataExporter
+from sakila_sql import (QUERIES_FILE, OPTIMIZED_FILE, comparable_rows, index_name, load_index_statements,
+                        load_sql_sections)
+
+BENCH_RESULTS = 'sakila_bench.json'
+
+# Копии прокатов и платежей для scale: ключи сдвигаются на k * max_id,
+# время - на k микросекунд (в исходных данных время с точностью до секунды)
+SCALE_STATE_TABLE = 'sakila_scale_state'
+
+class SakilaReports(QueryRunner):
+    """Исходные и переписанные отчёты Sakila: выполнение, планы и метрики - как у QueryRunner в task_1."""
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.queries = load_sql_sections(QUERIES_FILE)
+        self.optimized = {f"{name}_optimized": query for name, query in load_sql_sections(OPTIMIZED_FILE).items()}
+
+    def all_queries(self) -> Dict[str, str]:
+        return {**self.queries, **self.optimized}
+
+    def run(self, queries: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+        results = {name: self._execute_query(query, name) for name, query in queries.items()}
+        self.conn.rollback()
+        return results
+
+    def create_indexes(self):
+        with self.conn.cursor() as cursor:
+            for statement in load_index_statements():
+                cursor.execute(statement)
+        self.conn.commit()
+        self.analyze()
+
+    def drop_indexes(self):
+        with self.conn.cursor() as cursor:
+            for statement in load_index_statements():
+                cursor.execute(f"DROP INDEX IF EXISTS {index_name(statement)};")
+        self.conn.commit()
+        self.analyze()
+
+    def analyze(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("ANALYZE;")
+        self.conn.commit()
+
+    def measure(self, name: str, query: str, repeat: int) -> Dict[str, Any]:
+        """Медиана времени выполнения на клиенте и серверное время по EXPLAIN ANALYZE."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = self._execute_query(query, name)
+            timings.append(time.perf_counter() - started)
+            self.conn.rollback()
+        planning_ms, execution_ms = self.explain_timing(query)
+        return {
+            'median_s': statistics.median(timings),
+            'min_s': min(timings),
+            'planning_ms': planning_ms,
+            'execution_ms': execution_ms,
+            'rows': len(rows),
+        }
+
+    def scale(self, factor: int):
+        """Оставляет в rental и payment исходные строки и добавляет factor - 1 их копий."""
+        if factor < 1:
+            raise ValueError(f"Коэффициент должен быть не меньше 1, получено {factor}")
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {SCALE_STATE_TABLE} (
+                    base_rental_id INTEGER NOT NULL,
+                    base_payment_id INTEGER NOT NULL,
+                    factor INTEGER NOT NULL
+                );
+            """)
+            cursor.execute(f"SELECT base_rental_id, base_payment_id FROM {SCALE_STATE_TABLE};")
+            state = cursor.fetchone()
+            if state is None:
+                cursor.execute("SELECT (SELECT MAX(rental_id) FROM rental), (SELECT MAX(payment_id) FROM payment);")
+                state = cursor.fetchone()
+                cursor.execute(f"INSERT INTO {SCALE_STATE_TABLE} VALUES (%s, %s, 1);", state)
+            base_rental, base_payment = state
+            # Удаляем копии от прошлого запуска (платежи ссылаются на прокаты)
+            cursor.execute("DELETE FROM payment WHERE payment_id > %s;", (base_payment,))
+            cursor.execute("DELETE FROM rental WHERE rental_id > %s;", (base_rental,))
+            params = {'copies': factor - 1, 'base_rental': base_rental, 'base_payment': base_payment}
+            cursor.execute("""
+                INSERT INTO rental (rental_id, rental_date, inventory_id, customer_id, return_date, staff_id, last_update)
+                SELECT r.rental_id + k * %(base_rental)s, r.rental_date + k * INTERVAL '1 microsecond',
+                       r.inventory_id, r.customer_id, r.return_date + k * INTERVAL '1 microsecond',
+                       r.staff_id, r.last_update
+                FROM rental r
+                CROSS JOIN generate_series(1, %(copies)s) AS k
+                WHERE r.rental_id <= %(base_rental)s;
+            """, params)
+            cursor.execute("""
+                INSERT INTO payment (payment_id, customer_id, staff_id, rental_id, amount, payment_date)
+                SELECT p.payment_id + k * %(base_payment)s, p.customer_id, p.staff_id,
+                       p.rental_id + k * %(base_rental)s, p.amount, p.payment_date + k * INTERVAL '1 microsecond'
+                FROM payment p
+                CROSS JOIN generate_series(1, %(copies)s) AS k
+                WHERE p.payment_id <= %(base_payment)s;
+            """, params)
+            cursor.execute(f"UPDATE {SCALE_STATE_TABLE} SET factor = %s;", (factor,))
+            # Последовательности должны выдавать ключи после скопированных строк
+            cursor.execute("SELECT setval(pg_get_serial_sequence('rental', 'rental_id'), MAX(rental_id)) FROM rental;")
+            cursor.execute("SELECT setval(pg_get_serial_sequence('payment', 'payment_id'), MAX(payment_id)) FROM payment;")
+        self.conn.commit()
+        self.analyze()
+
+    def check_equal(self, expected: Dict[str, list], actual: Dict[str, list], label: str) -> bool:
+        same = True
+        for name, rows in actual.items():
+            original = name[:-len('_optimized')] if name.endswith('_optimized') else name
+            if comparable_rows(original, rows) != comparable_rows(original, expected[original]):
+                print(f"РЕЗУЛЬТАТЫ РАЗЛИЧАЮТСЯ: {name} ({label})")
+                same = False
+        return same
+
+def run_reports(reports: SakilaReports, args):
+    queries = dict(reports.queries)
+    if args.optimized:
+        queries.update({name[:-len('_optimized')]: query for name, query in reports.optimized.items()})
+    results = reports.run(queries)
+    text = DataExporter.to_json(results) if args.format == 'json' else DataExporter.to_xml(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"Результаты {len(results)} отчётов записаны в {args.output}")
+
+def explain_reports(reports: SakilaReports, args):
+    os.makedirs(args.plans_dir, exist_ok=True)
+    for name, query in reports.all_queries().items():
+        path = os.path.join(args.plans_dir, f"{name}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(reports.explain(query))
+        print(f"План {name} записан в {path}")
+
+def bench_reports(reports: SakilaReports, args):
+    queries = reports.all_queries()
+    results: Dict[str, Dict[str, Any]] = {}
+    outputs = {}
+    for phase, prepare in (('без индексов', reports.drop_indexes), ('с индексами', reports.create_indexes)):
+        prepare()
+        outputs[phase] = reports.run(queries)
+        for name, query in queries.items():
+            results.setdefault(name, {})[phase] = reports.measure(name, query, args.repeat)
+        if args.plans_dir:
+            os.makedirs(args.plans_dir, exist_ok=True)
+            suffix = 'indexed' if phase == 'с индексами' else 'plain'
+            for name, query in queries.items():
+                with open(os.path.join(args.plans_dir, f"{name}_{suffix}.txt"), 'w', encoding='utf-8') as f:
+                    f.write(reports.explain(query))
+    if not args.keep_indexes:
+        reports.drop_indexes()
+
+    with reports.conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM rental;")
+        rentals = cursor.fetchone()[0]
+    reports.conn.rollback()
+
+    print(f"\n--- Отчёты Sakila (прокатов: {rentals}) ---")
+    print(f"{'запрос':<18} {'без инд., мс':>13} {'с инд., мс':>11} {'ускорение':>10} {'сервер, мс':>11}")
+    baseline = results['task_7']['без индексов']['median_s']
+    for name, phases in results.items():
+        before, after = phases['без индексов'], phases['с индексами']
+        print(f"{name:<18} {before['median_s'] * 1000:>13.1f} {after['median_s'] * 1000:>11.1f} "
+              f"{before['median_s'] / after['median_s']:>9.1f}x {after['execution_ms']:>11.1f}")
+    optimized = results['task_7_optimized']['с индексами']['median_s']
+    print(f"Task 7: исходный без индексов {baseline * 1000:.1f} мс -> переписанный с индексами "
+          f"{optimized * 1000:.1f} мс ({baseline / optimized:.1f}x)")
+
+    plain = outputs['без индексов']
+    same = reports.check_equal(plain, {name: rows for name, rows in plain.items() if name.endswith('_optimized')},
+                               'переписанный запрос')
+    same &= reports.check_equal(plain, outputs['с индексами'], 'с индексами')
+    print(f"Результаты совпадают: {same}")
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'server_version': reports.conn.server_version,
+        'rentals': rentals,
+        'repeat': args.repeat,
+        'results_match': same,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Отчёт записан в {args.output}")
+    if not same:
+        sys.exit(1)
+
+def scale_data(reports: SakilaReports, args):
+    started = time.perf_counter()
+    reports.scale(args.factor)
+    print(f"Данные увеличены в {args.factor} раз за {time.perf_counter() - started:.1f} с")
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчёты Sakila: запуск, планы, бенчмарк и увеличение данных.")
+    parser.add_argument('--dbname', type=str, default='sakila', help='База с данными Sakila')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Выполнить отчёты и сохранить результаты')
+    run_parser.add_argument('--format', choices=['json', 'xml'], default='json')
+    run_parser.add_argument('--output', type=str, default='sakila_reports.json')
+    run_parser.add_argument('--optimized', action='store_true', help='Использовать переписанные запросы')
+    run_parser.set_defaults(handler=run_reports)
+
+    explain_parser = subparsers.add_parser('explain', help='Сохранить планы EXPLAIN ANALYZE')
+    explain_parser.add_argument('--plans-dir', type=str, default='plans')
+    explain_parser.set_defaults(handler=explain_reports)
+
+    bench_parser = subparsers.add_parser('bench', help='Сравнить запросы без индексов и с индексами')
+    bench_parser.add_argument('--repeat', type=int, default=5)
+    bench_parser.add_argument('--plans-dir', type=str, default=None, help='Сохранить планы обоих прогонов')
+    bench_parser.add_argument('--keep-indexes', action='store_true', help='Не удалять индексы после замера')
+    bench_parser.add_argument('--output', type=str, default=BENCH_RESULTS)
+    bench_parser.set_defaults(handler=bench_reports)
+
+    scale_parser = subparsers.add_parser('scale', help='Увеличить прокаты и платежи в N раз')
+    scale_parser.add_argument('factor', type=int, help='Во сколько раз (1 - вернуть исходный объём)')
+    scale_parser.set_defaults(handler=scale_data)
+
+    args = parser.parse_args()
+    try:
+        conn = psycopg2.connect(**{**DB_CONFIG, 'dbname': args.dbname})
+    except psycopg2.OperationalError as e:
+        print(f"ОШИБКА ПОДКЛЮЧЕНИЯ: Не удалось подключиться к базе. Детали: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        args.handler(SakilaReports(conn), args)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Разбор SQL-файлов отчётов Sakila и сравнение результатов (без подключения к базе).
+
+Используется sakila_runner.py; вынесено отдельно, чтобы разбор файлов и
+сравнение результатов можно было проверять без psycopg2.
+"""
+import os
+import re
+from decimal import Decimal
+from typing import Any, Dict, List
+
+SQL_DIR = os.path.dirname(os.path.abspath(__file__))
+QUERIES_FILE = os.path.join(SQL_DIR, 'sql_queires.sql')
+OPTIMIZED_FILE = os.path.join(SQL_DIR, 'sql_queries_optimized.sql')
+INDEXES_FILE = os.path.join(SQL_DIR, 'sakila_indexes.sql')
+
+# Для запросов с LIMIT строки с равными значениями на границе могут попасть
+# в ответ в любом порядке, поэтому сравниваются только значения этой колонки
+COMPARE_COLUMNS = {
+    'task_2': 'total_rentals',
+    'task_3': 'payment',
+}
+
+def load_sql_sections(path: str) -> Dict[str, str]:
+    """Разбивает файл на запросы по строкам "-- Task N"; ключи - task_1, task_2, ..."""
+    sections: Dict[str, List[str]] = {}
+    current = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = re.match(r'--\s*Task\s+(\d+)\s*$', line.strip())
+            if match:
+                current = f"task_{match.group(1)}"
+                sections[current] = []
+            elif current is not None:
+                sections[current].append(line)
+    return {name: ''.join(lines).strip() for name, lines in sections.items()}
+
+def load_index_statements(path: str = INDEXES_FILE) -> List[str]:
+    """Команды CREATE INDEX из файла (без комментариев)."""
+    with open(path, encoding='utf-8') as f:
+        text = '\n'.join(line for line in f.read().splitlines() if not line.lstrip().startswith('--'))
+    return [statement.strip() + ';' for statement in text.split(';') if statement.strip()]
+
+def index_name(statement: str) -> str:
+    """Имя индекса из команды CREATE INDEX IF NOT EXISTS."""
+    return re.search(r'INDEX\s+IF\s+NOT\s+EXISTS\s+(\w+)', statement, re.IGNORECASE).group(1)
+
+def _normalize(value):
+    if isinstance(value, Decimal) or isinstance(value, float):
+        return round(float(value), 6)
+    return value
+
+def comparable_rows(name: str, rows: List[Dict[str, Any]]) -> list:
+    """Результат в виде, не зависящем от порядка строк и от выбора строк среди равных на границе LIMIT."""
+    column = COMPARE_COLUMNS.get(name)
+    if column is not None:
+        return sorted(_normalize(row[column]) for row in rows)
+    return sorted(tuple((key, _normalize(value)) for key, value in row.items()) for row in rows)
@@ -0,0 +1,45 @@
+-- Переписанные запросы из sql_queires.sql (результат тот же, проверяет sakila_runner.py)
+
+-- Task 7
+-- Исходный запрос дважды выполняет одно и то же соединение семи таблиц под UNION ALL.
+-- Здесь каждый город один раз относится к группам (город может попасть в обе),
+-- а прокаты соединяются с таблицами один раз.
+
+WITH CityGroups AS (
+    SELECT
+        ci.city_id,
+        g.group_name
+    FROM city ci
+    CROSS JOIN LATERAL (
+        VALUES
+            ('Starts with a', left(ci.city, 1) IN ('a', 'A')),
+            ('Contains -', strpos(ci.city, '-') > 0)
+    ) AS g(group_name, matches)
+    WHERE g.matches
+),
+CategorySums AS (
+    SELECT
+        cg.group_name,
+        cat.name AS category_name,
+        SUM(EXTRACT(EPOCH FROM (r.return_date - r.rental_date)) / 3600) AS total_hours
+    FROM rental r
+    JOIN customer c ON r.customer_id = c.customer_id
+    JOIN address a ON c.address_id = a.address_id
+    JOIN CityGroups cg ON a.city_id = cg.city_id
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film_category fc ON i.film_id = fc.film_id
+    JOIN category cat ON fc.category_id = cat.category_id
+    WHERE r.return_date - r.rental_date IS NOT NULL
+    GROUP BY cg.group_name, cat.name
+),
+RankedCategories AS (
+    SELECT
+        group_name,
+        category_name,
+        total_hours,
+        RANK() OVER (PARTITION BY group_name ORDER BY total_hours DESC) as rnk
+    FROM CategorySums
+)
+SELECT group_name, category_name, total_hours
+FROM RankedCategories
+WHERE rnk = 1;
@@ -0,0 +1,8 @@
+"""Модули каталога sql импортируются плоско, как при запуске sakila_runner.py из sql."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'db: нужна база Sakila в PostgreSQL (имя базы - SAKILA_DBNAME)')
@@ -0,0 +1,40 @@
+"""Исходные и переписанные запросы на настоящей базе Sakila (пропускается без PostgreSQL)."""
+import os
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+pytestmark = pytest.mark.db
+
+@pytest.fixture(scope='module')
+def reports():
+    from sakila_runner import DB_CONFIG, SakilaReports
+    try:
+        conn = psycopg2.connect(**{**DB_CONFIG, 'dbname': os.environ.get('SAKILA_DBNAME', 'sakila')})
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"нет подключения к базе Sakila: {e}")
+    try:
+        yield SakilaReports(conn)
+    finally:
+        conn.close()
+
+def test_optimized_queries_match_originals(reports):
+    from sakila_runner import comparable_rows
+    assert reports.optimized
+    for name, query in reports.optimized.items():
+        original = name[:-len('_optimized')]
+        expected = reports.run({original: reports.queries[original]})[original]
+        actual = reports.run({name: query})[name]
+        assert comparable_rows(original, actual) == comparable_rows(original, expected), name
+
+def test_indexes_do_not_change_results(reports):
+    from sakila_runner import comparable_rows
+    reports.drop_indexes()
+    plain = reports.run(reports.queries)
+    reports.create_indexes()
+    try:
+        indexed = reports.run(reports.queries)
+    finally:
+        reports.drop_indexes()
+    for name in reports.queries:
+        assert comparable_rows(name, indexed[name]) == comparable_rows(name, plain[name]), name
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from sakila_sql import (QUERIES_FILE, OPTIMIZED_FILE, comparable_rows, index_name, load_index_statements,
+                        load_sql_sections)
+
+def test_load_sql_sections_splits_on_task_headers(tmp_path):
+    path = tmp_path / 'queries.sql'
+    path.write_text("-- общий комментарий\nSELECT 0;\n-- Task 1\nSELECT 1;\n\n--Task 12  \n"
+                    "-- комментарий внутри\nSELECT 12\nFROM t;\n", encoding='utf-8')
+    assert load_sql_sections(str(path)) == {
+        'task_1': 'SELECT 1;',
+        'task_12': '-- комментарий внутри\nSELECT 12\nFROM t;',
+    }
+
+def test_repository_query_files():
+    queries, optimized = load_sql_sections(QUERIES_FILE), load_sql_sections(OPTIMIZED_FILE)
+    assert list(queries) == [f"task_{i}" for i in range(1, 8)]
+    assert set(optimized) <= set(queries)
+    assert all(query.rstrip().endswith(';') for query in {**queries, **optimized}.values())
+
+def test_load_index_statements(tmp_path):
+    path = tmp_path / 'indexes.sql'
+    path.write_text("-- Task 2\nCREATE INDEX IF NOT EXISTS a_idx ON t (x);\n\n-- комментарий; с точкой с запятой\n"
+                    "CREATE INDEX IF NOT EXISTS b_idx\n    ON t (y) INCLUDE (z);\n", encoding='utf-8')
+    statements = load_index_statements(str(path))
+    assert statements == ["CREATE INDEX IF NOT EXISTS a_idx ON t (x);",
+                          "CREATE INDEX IF NOT EXISTS b_idx\n    ON t (y) INCLUDE (z);"]
+    assert [index_name(statement) for statement in statements] == ['a_idx', 'b_idx']
+
+def test_repository_indexes_have_unique_names():
+    names = [index_name(statement) for statement in load_index_statements()]
+    assert len(names) == 7 and len(set(names)) == len(names)
+
+def test_comparable_rows_ignores_order_and_numeric_type():
+    first = [{'city': 'b', 'hours': Decimal('1.0000001')}, {'city': 'a', 'hours': Decimal('2.5')}]
+    second = [{'city': 'a', 'hours': 2.5}, {'city': 'b', 'hours': 1.0}]
+    assert comparable_rows('task_7', first) == comparable_rows('task_7', second)
+    assert comparable_rows('task_7', first) != comparable_rows('task_7', [{'city': 'a', 'hours': 2.5}])
+
+def test_comparable_rows_limit_queries_compare_only_values():
+    # Среди равных значений на границе LIMIT могут попасть разные строки
+    first = [{'title': 'x', 'total_rentals': 5}, {'title': 'y', 'total_rentals': 3}]
+    second = [{'title': 'z', 'total_rentals': 3}, {'title': 'x', 'total_rentals': 5}]
+    assert comparable_rows('task_2', first) == comparable_rows('task_2', second)
+    assert comparable_rows('task_2', first) != comparable_rows('task_2', [{'title': 'x', 'total_rentals': 4}] + first[1:])
@@ -0,0 +1,339 @@
+"""Бенчмарки для task_1.
+
+Запускается из каталога task_1 (как и main.py). Все замеры выполняются в
+отдельной схеме bench, которая создаётся заново и удаляется в конце, поэтому
+рабочие таблицы rooms и students не затрагиваются.
+
+Примеры:
+    python benchmark.py load data/students.json data/rooms.json --modes batch copy --repeat 3
+    python benchmark.py analytics --students 10000000 --rooms 500000
+    python benchmark.py export --rows 1000000     # без базы данных
+    python benchmark.py engines --students 1000000 --rooms 50000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import Tuple
+import psycopg2
+from config import DB_CONFIG, STREAM_CHUNK_SIZE
+from main import DataLoader, QueryRunner, DataExporter, StreamingExporter, ColumnarExporter, pa
+from inmemory import InMemoryAnalytics
+from room_stats import RoomStatsManager
+
+BENCH_SCHEMA = 'bench'
+
+# Способ загрузки одной таблицы для каждого режима DataLoader
+LOAD_MODES = {
+    'batch': lambda loader, path, table, chunk_size: loader.load_data(path, table),
+    'stream': lambda loader, path, table, chunk_size: loader.load_data_streaming(path, table, chunk_size),
+    'copy': lambda loader, path, table, chunk_size: loader.load_data_copy(path, table, chunk_size),
+}
+
+# Способ получить все отчёты и список выполняемых запросов для каждого режима QueryRunner
+ANALYTICS_MODES = {
+    'separate': (lambda runner: runner.get_reports(), list(QueryRunner.REPORT_QUERIES.values())),
+    'combined': (lambda runner: runner.get_reports_combined(), [QueryRunner.ROOM_STATS_QUERY]),
+    'room_stats': (lambda runner: runner.get_reports_from_room_stats(), [QueryRunner.ROOM_STATS_TABLE_QUERY]),
+}
+
+def prepare_schema(conn):
+    """Создаёт пустую схему bench с копиями таблиц rooms/students и переключает на неё search_path."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA};")
+        for table in ('rooms', 'students'):
+            cursor.execute(f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL);")
+        cursor.execute(f"SET search_path TO {BENCH_SCHEMA};")
+    conn.commit()
+
+def drop_schema(conn):
+    """Удаляет схему bench вместе со всеми данными бенчмарка."""
+    conn.rollback() # Сбрасываем транзакцию, если бенчмарк прервался с ошибкой
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+        cursor.execute("SET search_path TO DEFAULT;")
+    conn.commit()
+
+def count_rows(conn, table_name: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+        count = cursor.fetchone()[0]
+    conn.commit()
+    return count
+
+def bench_load(conn, args):
+    """Сравнивает режимы загрузки DataLoader на одних и тех же файлах."""
+    loader = DataLoader(conn)
+    summary = []
+    for mode in args.modes:
+        load_table = LOAD_MODES[mode]
+        timings = []
+        rows = 0
+        for _ in range(args.repeat):
+            with conn.cursor() as cursor:
+                cursor.execute("TRUNCATE students, rooms;")
+            conn.commit()
+
+            started = time.perf_counter()
+            load_table(loader, args.rooms, 'rooms', args.chunk_size)
+            load_table(loader, args.students, 'students', args.chunk_size)
+            timings.append(time.perf_counter() - started)
+            rows = count_rows(conn, 'students')
+        summary.append((mode, statistics.median(timings), min(timings), rows))
+
+    print("\n--- Сравнение режимов загрузки ---")
+    print(f"{'режим':<8} {'медиана, с':>12} {'минимум, с':>12} {'студентов':>12} {'записей/с':>12}")
+    for mode, median, best, rows in summary:
+        print(f"{mode:<8} {median:>12.3f} {best:>12.3f} {rows:>12} {rows / median:>12.0f}")
+
+    loaded = {rows for _, _, _, rows in summary}
+    if len(loaded) > 1:
+        print("ПРЕДУПРЕЖДЕНИЕ: режимы загрузили разное количество строк, смотрите ошибки выше.", file=sys.stderr)
+
+def generate_synthetic(conn, students: int, rooms: int, seed: float = 0.42):
+    """Заполняет таблицы схемы bench синтетическими данными на стороне сервера."""
+    print(f"Генерация {rooms} комнат и {students} студентов...")
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT setseed(%s);", (seed,))
+        cursor.execute("INSERT INTO rooms (id, name) SELECT g, 'Room ' || g FROM generate_series(1, %s) g;", (rooms,))
+        cursor.execute("""
+            INSERT INTO students (id, name, sex, birthday, room_id)
+            SELECT
+                g,
+                'Student ' || g,
+                CASE WHEN random() < 0.5 THEN 'M' ELSE 'F' END,
+                DATE '1995-01-01' + (random() * 3650)::int,
+                1 + (random() * (%s - 1))::int
+            FROM generate_series(1, %s) g;
+        """, (rooms, students))
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE rooms;")
+        cursor.execute("VACUUM ANALYZE students;")
+    conn.autocommit = False
+
+def count_relation_scans(plan: dict, relation: str) -> int:
+    """Считает узлы плана, читающие указанную таблицу."""
+    count = int(plan.get('Relation Name') == relation)
+    return count + sum(count_relation_scans(child, relation) for child in plan.get('Plans', []))
+
+def explain_query(conn, query: str) -> Tuple[int, int]:
+    """Возвращает число прочитанных разделяемых буферов и число чтений students для запроса."""
+    with conn.cursor() as cursor:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query)
+        plan = cursor.fetchone()[0][0]['Plan']
+    conn.rollback()
+    blocks = plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0)
+    return blocks, count_relation_scans(plan, 'students')
+
+def comparable_reports(results: dict) -> dict:
+    """Приводит отчёты к виду, не зависящему от порядка строк с равными значениями в top-5."""
+    return {
+        "rooms_with_student_count": results["rooms_with_student_count"],
+        "top5_rooms_smallest_avg_age": [row['avg_age'] for row in results["top5_rooms_smallest_avg_age"]],
+        "top5_rooms_largest_age_diff": [row['age_difference'] for row in results["top5_rooms_largest_age_diff"]],
+        "rooms_with_mixed_sexes": results["rooms_with_mixed_sexes"],
+    }
+
+def bench_analytics(conn, args):
+    """Сравнивает отдельные запросы отчётов с однопроходным запросом на синтетических данных."""
+    if 'room_stats' in args.modes:
+        # LIKE ... INCLUDING ALL не копирует room_stats и триггеры: создаём их в схеме bench,
+        # чтобы сводка заполнялась при генерации данных
+        RoomStatsManager(conn).install()
+    generate_synthetic(conn, args.students, args.rooms)
+    runner = QueryRunner(conn)
+    summary = []
+    reports = {}
+    for mode in args.modes:
+        get_reports, queries = ANALYTICS_MODES[mode]
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            reports[mode] = get_reports(runner)
+            timings.append(time.perf_counter() - started)
+            conn.rollback()
+
+        blocks = scans = 0
+        for query in queries:
+            query_blocks, query_scans = explain_query(conn, query)
+            blocks += query_blocks
+            scans += query_scans
+        summary.append((mode, statistics.median(timings), blocks, scans))
+
+    print("\n--- Сравнение режимов отчётов ---")
+    print(f"{'режим':<10} {'медиана, с':>12} {'буферов':>14} {'чтений students':>16}")
+    for mode, median, blocks, scans in summary:
+        print(f"{mode:<10} {median:>12.3f} {blocks:>14} {scans:>16}")
+
+    expected = comparable_reports(reports[args.modes[0]])
+    for mode in args.modes[1:]:
+        same = comparable_reports(reports[mode]) == expected
+        print(f"Результаты {mode} совпадают с {args.modes[0]}: {same}")
+
+def dump_table_jsonl(conn, query: str, path: str):
+    """Выгружает результат запроса (по одному JSON-объекту в строке) в файл JSON Lines."""
+    runner = QueryRunner(conn)
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in runner.iter_query(query):
+            f.write(json.dumps(row, default=str, ensure_ascii=False))
+            f.write('\n')
+    conn.rollback()
+
+def normalized_reports(results: dict) -> dict:
+    """Приводит числа к float с округлением, чтобы сравнивать Decimal из базы с float из памяти."""
+    def normalize(value):
+        return round(float(value), 9) if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool) else value
+    comparable = comparable_reports(results)
+    return {
+        name: [normalize(row) if not isinstance(row, dict) else {k: normalize(v) for k, v in row.items()} for row in rows]
+        for name, rows in comparable.items()
+    }
+
+def bench_engines(conn, args):
+    """Проверяет совпадение InMemoryAnalytics с SQL на синтетических данных и сравнивает скорость."""
+    generate_synthetic(conn, args.students, args.rooms)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rooms_path = os.path.join(tmp_dir, 'rooms.jsonl')
+        students_path = os.path.join(tmp_dir, 'students.jsonl')
+        dump_table_jsonl(conn, "SELECT id, name FROM rooms", rooms_path)
+        dump_table_jsonl(conn, "SELECT id, name, sex, birthday, room_id AS room FROM students", students_path)
+
+        # Возраст считается от даты сервера, чтобы сравнение не зависело от часового пояса клиента
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT CURRENT_DATE;")
+            today = cursor.fetchone()[0]
+        conn.rollback()
+
+        started = time.perf_counter()
+        engine = InMemoryAnalytics.from_json(students_path, rooms_path, today=today)
+        load_time = time.perf_counter() - started
+
+    sql_timings, memory_timings = [], []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        sql_results = QueryRunner(conn).get_reports()
+        sql_timings.append(time.perf_counter() - started)
+        conn.rollback()
+
+        started = time.perf_counter()
+        memory_results = engine.get_reports()
+        memory_timings.append(time.perf_counter() - started)
+
+    print("\n--- Сравнение движков отчётов ---")
+    print(f"Загрузка JSON в память: {load_time:.3f} с")
+    print(f"PostgreSQL (4 запроса):  {statistics.median(sql_timings):.3f} с")
+    print(f"InMemoryAnalytics:       {statistics.median(memory_timings):.3f} с")
+
+    same = normalized_reports(sql_results) == normalized_reports(memory_results)
+    print(f"Результаты совпадают: {same}")
+    if not same:
+        sys.exit(1)
+
+def synthetic_report_batches(rows: int, batch_size: int, seed: int = 42):
+    """Порции строк в форме QueryRunner.iter_query_batches: имя комнаты, счётчик, средний возраст, дата."""
+    rng = random.Random(seed)
+    columns = ['room_name', 'students_count', 'avg_age', 'first_birthday']
+    type_codes = [25, 20, 1700, 1082] # text, bigint, numeric, date
+    start = datetime.date(1995, 1, 1)
+    batches = []
+    for offset in range(0, rows, batch_size):
+        batches.append((columns, type_codes, [
+            (f"Room {i}", rng.randint(0, 50), Decimal(rng.randint(1700, 2600)) / 100, start + datetime.timedelta(days=rng.randint(0, 3650)))
+            for i in range(offset, min(rows, offset + batch_size))
+        ]))
+    return batches
+
+def bench_export(args):
+    """Сравнивает скорость сериализации отчёта в разные форматы (база данных не нужна)."""
+    batches = synthetic_report_batches(args.rows, args.batch_size)
+    # JSON/XML работают со словарями - их построение в замер не входит
+    records = {'report': [dict(zip(columns, row)) for columns, _, rows in batches for row in rows]}
+
+    def to_file(write):
+        def run(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                write(f)
+        return run
+
+    writers = {
+        'json': to_file(lambda f: f.write(DataExporter.to_json(records))),
+        'xml': to_file(lambda f: f.write(DataExporter.to_xml(records))),
+        'json-stream': to_file(lambda f: StreamingExporter.write_json(records, f)),
+        'xml-stream': to_file(lambda f: StreamingExporter.write_xml(records, f)),
+        'csv': lambda path: ColumnarExporter.write_csv(iter(batches), path),
+    }
+    if pa is not None:
+        writers['arrow'] = lambda path: ColumnarExporter.write_arrow(iter(batches), path)
+        writers['parquet'] = lambda path: ColumnarExporter.write_parquet(iter(batches), path)
+    else:
+        print("pyarrow не установлен: форматы arrow и parquet пропущены.", file=sys.stderr)
+
+    print(f"\n--- Сериализация {args.rows} строк ---")
+    print(f"{'формат':<12} {'медиана, с':>12} {'строк/с':>14} {'размер, МБ':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, write in writers.items():
+            path = os.path.join(tmp_dir, f"report.{name}")
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                write(path)
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            size_mb = os.path.getsize(path) / 2 ** 20
+            print(f"{name:<12} {median:>12.3f} {args.rows / median:>14.0f} {size_mb:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки загрузки и запросов task_1.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load_parser = subparsers.add_parser('load', help='Сравнить режимы загрузки DataLoader')
+    load_parser.add_argument('students', type=str, help='Путь к JSON файлу со студентами')
+    load_parser.add_argument('rooms', type=str, help='Путь к JSON файлу с комнатами')
+    load_parser.add_argument('--modes', nargs='+', choices=list(LOAD_MODES), default=['batch', 'copy'])
+    load_parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE)
+    load_parser.add_argument('--repeat', type=int, default=3)
+    load_parser.set_defaults(handler=bench_load)
+
+    analytics_parser = subparsers.add_parser('analytics', help='Сравнить отдельные и однопроходный запросы отчётов')
+    analytics_parser.add_argument('--students', type=int, default=10_000_000)
+    analytics_parser.add_argument('--rooms', type=int, default=500_000)
+    analytics_parser.add_argument('--modes', nargs='+', choices=list(ANALYTICS_MODES), default=['separate', 'combined'])
+    analytics_parser.add_argument('--repeat', type=int, default=3)
+    analytics_parser.set_defaults(handler=bench_analytics)
+
+    engines_parser = subparsers.add_parser('engines', help='Сверить и сравнить InMemoryAnalytics с SQL')
+    engines_parser.add_argument('--students', type=int, default=1_000_000)
+    engines_parser.add_argument('--rooms', type=int, default=50_000)
+    engines_parser.add_argument('--repeat', type=int, default=3)
+    engines_parser.set_defaults(handler=bench_engines)
+
+    export_parser = subparsers.add_parser('export', help='Сравнить скорость форматов экспорта (без базы данных)')
+    export_parser.add_argument('--rows', type=int, default=1_000_000)
+    export_parser.add_argument('--batch-size', type=int, default=10_000)
+    export_parser.add_argument('--repeat', type=int, default=3)
+    export_parser.set_defaults(handler=bench_export, needs_db=False)
+
+    args = parser.parse_args()
+    if not getattr(args, 'needs_db', True):
+        args.handler(args)
+        return
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        prepare_schema(conn)
+        args.handler(conn, args)
+    finally:
+        drop_schema(conn)
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,28 @@ DB_CONFIG = {
     'password': 'postgres', # Ваш пароль
     'host': 'localhost',    # Обычно 'localhost'
     'port': '5432'          # Стандартный порт PostgreSQL
-}
\ No newline at end of file
+}
+
+# Параметры потоковой загрузки
+STREAM_CHUNK_SIZE = 10000   # Сколько записей отправлять в базу за один раз
+JSON_READ_BUFFER = 1 << 16  # Размер блока чтения JSON файла (в символах)
+
+# Параметры параллельной загрузки
+PARALLEL_WORKERS = 4        # Количество потоков и соединений в пуле
+LOAD_MAX_RETRIES = 3        # Сколько раз повторять порцию при сбое соединения или deadlock
+LOAD_RETRY_BACKOFF = 0.5    # Начальная пауза между повторами (в секундах), удваивается
+
+# Файл локального состояния для инкрементальной загрузки
+LOAD_STATE_PATH = '.load_state.sqlite'
+
+# Сколько строк за раз забирать с сервера при потоковом чтении результатов
+QUERY_ITERSIZE = 10000
+
+# Дисковый кэш результатов отчётов
+RESULT_CACHE_DIR = '.query_cache'
+RESULT_CACHE_MAX_BYTES = 256 * 2 ** 20
+
+# Масштабный бенчмарк (scale_bench.py)
+SCALE_BENCH_RESULTS = 'bench_results.json'     # Куда писать результаты последнего запуска
+SCALE_BENCH_BASELINE = 'bench_baseline.json'   # Сохранённая база для поиска регрессий
+SCALE_BENCH_TOLERANCE = 0.2                    # Допустимое ухудшение времени и памяти (доля)
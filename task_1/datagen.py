@@ -0,0 +1,154 @@
+"""Генератор синтетических файлов rooms.json и students.json для task_1.
+
+Файлы имеют тот же вид, что и data/rooms.json и data/students.json (JSON
+массив, по записи в строке), либо JSON Lines. Записи генерируются и пишутся
+блоками, поэтому память не зависит от размера: 100 млн студентов
+генерируются так же, как 10 тысяч. При одинаковых параметрах и seed файлы
+получаются побайтно одинаковыми.
+
+Неравномерность заполнения комнат задаётся параметром skew: вес комнаты
+пропорционален 1 / rank ** skew (закон Ципфа), ранги случайно перемешаны
+между комнатами. skew = 0 - равномерное распределение, skew = 1 - несколько
+комнат-«общежитий» и длинный хвост почти пустых комнат.
+
+Запуск из каталога task_1:
+    python datagen.py /tmp/data --students 10M --rooms 500K --skew 0.8 --male-ratio 0.55
+"""
+import argparse
+import datetime
+import os
+import time
+from typing import Iterator, List
+import numpy as np
+
+GENERATOR_BLOCK = 100_000 # Записей в одном блоке; от него зависит порядок случайных чисел
+BIRTHDAY_FROM = datetime.date(1995, 1, 1)
+BIRTHDAY_TO = datetime.date(2007, 12, 31)
+
+FIRST_NAMES = {
+    'M': ['John', 'Peter', 'Michael', 'David', 'James', 'Robert', 'Daniel', 'Thomas', 'Alex', 'Ivan'],
+    'F': ['Jane', 'Mary', 'Anna', 'Emily', 'Sarah', 'Laura', 'Olga', 'Maria', 'Kate', 'Elena'],
+}
+LAST_NAMES = ['Doe', 'Smith', 'Jones', 'Brown', 'Taylor', 'Wilson', 'Clark', 'Lewis', 'Walker', 'Young',
+              'Hall', 'Allen', 'King', 'Wright', 'Scott', 'Green', 'Baker', 'Adams', 'Nelson', 'Hill']
+
+_SUFFIXES = {'K': 10 ** 3, 'M': 10 ** 6, 'B': 10 ** 9}
+
+def parse_count(value: str) -> int:
+    """Разбирает количество вида 10000, 10K, 2.5M или 1B."""
+    value = value.strip().upper().replace('_', '')
+    if value and value[-1] in _SUFFIXES:
+        return int(float(value[:-1]) * _SUFFIXES[value[-1]])
+    return int(value)
+
+class DatasetGenerator:
+    """Класс для потоковой генерации файлов комнат и студентов с заданным распределением."""
+    def __init__(self, students: int, rooms: int, skew: float = 0.0, male_ratio: float = 0.5,
+                 seed: int = 42, json_lines: bool = False):
+        if rooms < 1:
+            raise ValueError("Нужна хотя бы одна комната.")
+        if not 0.0 <= male_ratio <= 1.0:
+            raise ValueError("Доля мужчин должна быть в диапазоне [0, 1].")
+        self.students = students
+        self.rooms = rooms
+        self.skew = skew
+        self.male_ratio = male_ratio
+        self.seed = seed
+        self.json_lines = json_lines
+
+    def _rng(self, stream: int, block: int) -> np.random.Generator:
+        # Отдельный поток случайных чисел на каждый блок: блоки не зависят друг от друга
+        return np.random.default_rng([self.seed, stream, block])
+
+    def _room_cdf(self) -> np.ndarray:
+        """Накопленные вероятности попадания студента в комнату с id = индекс + 1."""
+        ranks = self._rng(0, 0).permutation(self.rooms) + 1
+        weights = ranks.astype(np.float64) ** -self.skew
+        cdf = np.cumsum(weights)
+        return cdf / cdf[-1]
+
+    def iter_room_lines(self) -> Iterator[List[str]]:
+        for start in range(1, self.rooms + 1, GENERATOR_BLOCK):
+            stop = min(start + GENERATOR_BLOCK, self.rooms + 1)
+            yield [f'{{"id": {i}, "name": "Room {i}"}}' for i in range(start, stop)]
+
+    def iter_student_lines(self) -> Iterator[List[str]]:
+        cdf = self._room_cdf()
+        first_day = np.datetime64(BIRTHDAY_FROM, 'D')
+        day_span = (BIRTHDAY_TO - BIRTHDAY_FROM).days + 1
+        first_names = {sex: np.array(names) for sex, names in FIRST_NAMES.items()}
+        last_names = np.array(LAST_NAMES)
+
+        for block, start in enumerate(range(1, self.students + 1, GENERATOR_BLOCK)):
+            stop = min(start + GENERATOR_BLOCK, self.students + 1)
+            size = stop - start
+            rng = self._rng(1, block)
+            room_ids = np.minimum(np.searchsorted(cdf, rng.random(size), side='right'), self.rooms - 1) + 1
+            male = rng.random(size) < self.male_ratio
+            birthdays = (first_day + rng.integers(0, day_span, size)).astype(str)
+            first = np.where(male, first_names['M'][rng.integers(0, len(FIRST_NAMES['M']), size)],
+                             first_names['F'][rng.integers(0, len(FIRST_NAMES['F']), size)])
+            last = last_names[rng.integers(0, len(LAST_NAMES), size)]
+            sexes = np.where(male, 'M', 'F')
+            yield [
+                f'{{"id": {i}, "birthday": "{birthday}", "name": "{f} {l}", "room": {room}, "sex": "{sex}"}}'
+                for i, birthday, f, l, room, sex in zip(
+                    range(start, stop), birthdays.tolist(), first.tolist(), last.tolist(),
+                    room_ids.tolist(), sexes.tolist())
+            ]
+
+    def _write(self, path: str, blocks: Iterator[List[str]]) -> int:
+        """Пишет блоки строк в файл; в формате JSON массива добавляет скобки и запятые."""
+        written = 0
+        separator = '\n' if self.json_lines else ',\n  '
+        with open(path, 'w', encoding='utf-8') as f:
+            if not self.json_lines:
+                f.write('[\n  ')
+            for lines in blocks:
+                if written and lines:
+                    f.write(separator)
+                f.write(separator.join(lines))
+                written += len(lines)
+            f.write('\n' if self.json_lines else '\n]\n')
+        return written
+
+    def write_rooms(self, path: str) -> int:
+        return self._write(path, self.iter_room_lines())
+
+    def write_students(self, path: str) -> int:
+        return self._write(path, self.iter_student_lines())
+
+    def write(self, directory: str) -> dict:
+        """Создаёт rooms и students в каталоге и возвращает пути к файлам."""
+        os.makedirs(directory, exist_ok=True)
+        extension = 'jsonl' if self.json_lines else 'json'
+        paths = {
+            'rooms': os.path.join(directory, f'rooms.{extension}'),
+            'students': os.path.join(directory, f'students.{extension}'),
+        }
+        self.write_rooms(paths['rooms'])
+        self.write_students(paths['students'])
+        return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических файлов комнат и студентов.")
+    parser.add_argument('directory', type=str, help='Каталог для rooms.json и students.json')
+    parser.add_argument('--students', type=parse_count, default=parse_count('100K'), help='Количество студентов (10K, 100M, ...)')
+    parser.add_argument('--rooms', type=parse_count, default=None, help='Количество комнат (по умолчанию студентов / 20)')
+    parser.add_argument('--skew', type=float, default=0.0, help='Неравномерность комнат: 0 - равномерно, 1 - закон Ципфа')
+    parser.add_argument('--male-ratio', type=float, default=0.5, help='Доля студентов мужского пола')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json-lines', action='store_true', help='Писать JSON Lines вместо JSON массива')
+    args = parser.parse_args()
+
+    rooms = args.rooms or max(1, args.students // 20)
+    generator = DatasetGenerator(args.students, rooms, args.skew, args.male_ratio, args.seed, args.json_lines)
+    started = time.perf_counter()
+    paths = generator.write(args.directory)
+    elapsed = time.perf_counter() - started
+    print(f"Сгенерировано комнат: {rooms}, студентов: {args.students} за {elapsed:.1f} с.")
+    for table, path in paths.items():
+        print(f"  {table}: {path} ({os.path.getsize(path) / 2 ** 20:.1f} МБ)")
+
+if __name__ == "__main__":
+    main()
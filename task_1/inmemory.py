@@ -0,0 +1,157 @@
+"""Вычисление отчётов QueryRunner в памяти, без PostgreSQL.
+
+Студенты хранятся колонками: room_id (int32), sex (category) и birthday
+(datetime64[D]); имена студентов отчётам не нужны и не загружаются, поэтому
+на одного студента уходит около 13 байт. Отчёты считаются векторными
+группировками и имеют тот же вид, что и у QueryRunner, так что их можно
+сразу передавать в DataExporter.
+
+Запуск из каталога task_1:
+    python inmemory.py data/students.json data/rooms.json json
+"""
+import argparse
+import datetime
+import sys
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from config import STREAM_CHUNK_SIZE
+from json_stream import chunked, iter_json_records
+from reports import build_room_reports
+
+def ages_in_years(birthdays: np.ndarray, today: datetime.date) -> np.ndarray:
+    """Полное число лет на дату today - то же, что EXTRACT(YEAR FROM AGE(birthday)) в PostgreSQL."""
+    years = birthdays.astype('datetime64[Y]')
+    months = birthdays.astype('datetime64[M]')
+    birth_year = years.astype(np.int64) + 1970
+    birth_month = (months - years).astype(np.int64) + 1
+    birth_day = (birthdays - months).astype(np.int64) + 1
+    # День рождения в этом году ещё не наступил - вычитаем год
+    not_yet = (birth_month > today.month) | ((birth_month == today.month) & (birth_day > today.day))
+    return (today.year - birth_year - not_yet).astype(np.int16)
+
+class InMemoryAnalytics:
+    """Класс для расчёта отчётов по комнатам в памяти (аналог QueryRunner без базы данных)."""
+    def __init__(self, rooms: pd.DataFrame, students: pd.DataFrame, today: Optional[datetime.date] = None):
+        self.rooms = rooms
+        self.students = students
+        self.today = today or datetime.date.today()
+
+    @staticmethod
+    def _load_rooms(rooms_path: str) -> pd.DataFrame:
+        ids, names = [], []
+        for item in iter_json_records(rooms_path):
+            ids.append(item['id'])
+            names.append(item['name'])
+        rooms = pd.DataFrame({'id': np.array(ids, dtype=np.int64), 'name': names})
+        # Как ON CONFLICT (id) DO NOTHING: при повторе id остаётся первая запись
+        return rooms.drop_duplicates('id', keep='first').reset_index(drop=True)
+
+    @staticmethod
+    def _load_students(students_path: str, chunk_size: int) -> pd.DataFrame:
+        id_parts, room_parts, sex_parts, birthday_parts = [], [], [], []
+        sex_codes: Dict[str, int] = {}
+        for chunk in chunked(iter_json_records(students_path), chunk_size):
+            count = len(chunk)
+            id_parts.append(np.fromiter((item['id'] for item in chunk), dtype=np.int64, count=count))
+            room_parts.append(np.fromiter((item['room'] for item in chunk), dtype=np.int32, count=count))
+            sex_parts.append(np.fromiter((sex_codes.setdefault(item['sex'], len(sex_codes)) for item in chunk),
+                                         dtype=np.int8, count=count))
+            birthday_parts.append(np.array([item['birthday'] for item in chunk], dtype='datetime64[D]'))
+
+        if not id_parts:
+            return pd.DataFrame({
+                'room_id': np.array([], dtype=np.int32),
+                'sex': pd.Categorical([]),
+                'birthday': np.array([], dtype='datetime64[D]'),
+            })
+
+        ids = np.concatenate(id_parts)
+        del id_parts
+        # Как ON CONFLICT (id) DO NOTHING: при повторе id остаётся первая запись
+        _, first = np.unique(ids, return_index=True)
+        keep = np.sort(first) if len(first) != len(ids) else slice(None)
+        del ids
+
+        categories = sorted(sex_codes, key=sex_codes.get)
+        return pd.DataFrame({
+            'room_id': np.concatenate(room_parts)[keep],
+            'sex': pd.Categorical.from_codes(np.concatenate(sex_parts)[keep], categories=categories),
+            'birthday': np.concatenate(birthday_parts)[keep],
+        })
+
+    @classmethod
+    def from_json(cls, students_path: str, rooms_path: str, chunk_size: int = STREAM_CHUNK_SIZE,
+                  today: Optional[datetime.date] = None) -> 'InMemoryAnalytics':
+        """Загружает JSON (массив или JSON Lines) потоково, порциями по chunk_size записей."""
+        return cls(cls._load_rooms(rooms_path), cls._load_students(students_path, chunk_size), today)
+
+    def get_room_stats(self) -> List[Dict[str, Any]]:
+        """Возвращает те же показатели по комнатам, что и QueryRunner.get_room_stats, в порядке имён комнат."""
+        rooms = self.rooms.sort_values(['name', 'id'], kind='stable').reset_index(drop=True)
+        room_ids = rooms['id'].to_numpy()
+
+        # Номер комнаты (в порядке имён) для каждого студента; студенты без комнаты не учитываются, как при JOIN
+        order = np.argsort(room_ids, kind='stable')
+        sorted_ids = room_ids[order]
+        student_rooms = self.students['room_id'].to_numpy()
+        if len(sorted_ids):
+            positions = np.minimum(np.searchsorted(sorted_ids, student_rooms), len(sorted_ids) - 1)
+            known = sorted_ids[positions] == student_rooms
+        else:
+            positions = np.zeros(len(student_rooms), dtype=np.int64)
+            known = np.zeros(len(student_rooms), dtype=bool)
+        room_index = order[positions[known]]
+
+        ages = ages_in_years(self.students['birthday'].to_numpy()[known], self.today)
+        sex_codes = self.students['sex'].cat.codes.to_numpy()[known]
+
+        counts = np.bincount(room_index, minlength=len(rooms))
+        age_sums = np.bincount(room_index, weights=ages, minlength=len(rooms))
+        grouped = pd.DataFrame({'room': room_index, 'age': ages, 'sex': sex_codes}).groupby('room', sort=False)
+        extremes = grouped.agg(min_age=('age', 'min'), max_age=('age', 'max'), min_sex=('sex', 'min'), max_sex=('sex', 'max'))
+        extremes = extremes.reindex(range(len(rooms)))
+
+        min_ages = extremes['min_age'].tolist()
+        max_ages = extremes['max_age'].tolist()
+        mixed = (extremes['min_sex'] != extremes['max_sex']) & extremes['min_sex'].notna()
+        stats = []
+        for i, (name, count, age_sum) in enumerate(zip(rooms['name'].tolist(), counts.tolist(), age_sums.tolist())):
+            stats.append({
+                'room_name': name,
+                'students_count': count,
+                'avg_age': age_sum / count if count else None,
+                'min_age': int(min_ages[i]) if count else None,
+                'max_age': int(max_ages[i]) if count else None,
+                'has_mixed_sexes': bool(mixed.iat[i]),
+            })
+        return stats
+
+    def get_reports(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Возвращает четыре отчёта в том же виде, что и QueryRunner.get_reports."""
+        return build_room_reports(self.get_room_stats())
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчёты по комнатам без базы данных.")
+    parser.add_argument('students', type=str, help='Путь к JSON файлу со студентами')
+    parser.add_argument('rooms', type=str, help='Путь к JSON файлу с комнатами')
+    parser.add_argument('format', type=str, choices=['json', 'xml'], help='Формат вывода (json или xml)')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help='Размер порции при чтении JSON')
+    args = parser.parse_args()
+
+    try:
+        engine = InMemoryAnalytics.from_json(args.students, args.rooms, args.chunk_size)
+    except FileNotFoundError as e:
+        print(f"ОШИБКА ФАЙЛА: {e}. Проверьте правильность путей к файлам.", file=sys.stderr)
+        sys.exit(1)
+
+    # DataExporter импортируется здесь, чтобы сам движок не зависел от psycopg2
+    from main import DataExporter
+    results = engine.get_reports()
+    output = DataExporter.to_json(results) if args.format == 'json' else DataExporter.to_xml(results)
+    print("\n--- Результаты запросов ---")
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import io
+import itertools
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+from config import JSON_READ_BUFFER
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def iter_json_records(file_path: str, buffer_size: int = JSON_READ_BUFFER) -> Iterator[Any]:
+    """Потоково читает элементы JSON файла, не загружая его в память целиком.
+
+    Поддерживаются два формата: JSON-массив верхнего уровня ([{...}, {...}])
+    и JSON Lines (по одному объекту в строке). Формат определяется по первому
+    значащему символу файла.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+
+        def read_more() -> bool:
+            """Дочитывает следующий блок файла, отбрасывая уже разобранную часть буфера."""
+            nonlocal buffer, pos
+            chunk = f.read(buffer_size)
+            if not chunk:
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                pos = _JSON_WHITESPACE.match(buffer, pos).end()
+                if pos < len(buffer) or not read_more():
+                    return
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            return # пустой файл
+
+        if buffer[pos] != '[':
+            # JSON Lines: дочитываем оборванную строку и дальше идём по файлу построчно
+            head = io.StringIO(buffer[pos:] + f.readline())
+            for line in itertools.chain(head, f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos += 1
+        skip_whitespace()
+        if buffer[pos:pos + 1] == ']':
+            return
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Элемент обрезан границей буфера - дочитываем и пробуем снова
+                if read_more():
+                    continue
+                raise
+            # Число или литерал на самой границе буфера тоже может быть обрезан
+            if end == len(buffer) and read_more():
+                continue
+            pos = end
+            yield item
+
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise ValueError(f"Неожиданный конец JSON-массива в файле {file_path}")
+            delimiter = buffer[pos]
+            pos += 1
+            if delimiter == ']':
+                return
+            if delimiter != ',':
+                raise ValueError(f"Некорректный разделитель {delimiter!r} в файле {file_path}")
+            skip_whitespace()
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Разбивает итерируемый объект на списки длиной не более size."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# SQLite ограничивает количество параметров в одном запросе
+_SQLITE_MAX_PARAMS = 900
+
+def row_digest(record: tuple) -> bytes:
+    """Возвращает короткий хэш содержимого строки для сравнения между запусками."""
+    payload = json.dumps(record, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+def file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """Считает SHA-256 файла, читая его блоками."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class LoadStateStore:
+    """Локальное хранилище отпечатков файлов и хэшей строк для инкрементальной загрузки.
+
+    Хранит для каждого загруженного файла размер, время изменения и SHA-256,
+    а для каждой строки таблицы - хэш её содержимого. Состояние обновляется
+    только после фиксации транзакции в PostgreSQL, поэтому при сбое строки
+    просто будут отправлены повторно.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS file_fingerprints (
+                file_path TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (file_path, table_name)
+            );
+            CREATE TABLE IF NOT EXISTS row_digests (
+                table_name TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                digest BLOB NOT NULL,
+                PRIMARY KEY (table_name, id)
+            ) WITHOUT ROWID;
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def reset(self, table_name: Optional[str] = None):
+        """Забывает состояние таблицы (или всех таблиц), чтобы следующая загрузка была полной."""
+        if table_name is None:
+            self.conn.execute("DELETE FROM file_fingerprints;")
+            self.conn.execute("DELETE FROM row_digests;")
+        else:
+            self.conn.execute("DELETE FROM file_fingerprints WHERE table_name = ?;", (table_name,))
+            self.conn.execute("DELETE FROM row_digests WHERE table_name = ?;", (table_name,))
+        self.conn.commit()
+
+    def check_file(self, file_path: str, table_name: str) -> Tuple[bool, Tuple[int, int, Optional[str]]]:
+        """Проверяет, изменился ли файл с прошлой загрузки.
+
+        Сначала сравниваются размер и время изменения; SHA-256 считается только
+        если они отличаются (например, файл перезаписан тем же содержимым).
+        Возвращает признак "не изменился" и новый отпечаток для save_file.
+        """
+        stat = os.stat(file_path)
+        stored = self.conn.execute(
+            "SELECT size, mtime_ns, digest FROM file_fingerprints WHERE file_path = ? AND table_name = ?;",
+            (os.path.abspath(file_path), table_name),
+        ).fetchone()
+        if stored is not None and stored[0] == stat.st_size and stored[1] == stat.st_mtime_ns:
+            return True, (stat.st_size, stat.st_mtime_ns, stored[2])
+
+        digest = file_digest(file_path)
+        unchanged = stored is not None and stored[2] == digest
+        return unchanged, (stat.st_size, stat.st_mtime_ns, digest)
+
+    def save_file(self, file_path: str, table_name: str, fingerprint: Tuple[int, int, Optional[str]]):
+        size, mtime_ns, digest = fingerprint
+        self.conn.execute(
+            "INSERT OR REPLACE INTO file_fingerprints (file_path, table_name, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?);",
+            (os.path.abspath(file_path), table_name, size, mtime_ns, digest),
+        )
+        self.conn.commit()
+
+    def get_row_digests(self, table_name: str, ids: Iterable[Any]) -> Dict[Any, bytes]:
+        """Возвращает сохранённые хэши строк для переданных id."""
+        ids = list(ids)
+        result = {}
+        for start in range(0, len(ids), _SQLITE_MAX_PARAMS):
+            batch = ids[start:start + _SQLITE_MAX_PARAMS]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT id, digest FROM row_digests WHERE table_name = ? AND id IN ({placeholders});",
+                (table_name, *batch),
+            )
+            result.update(rows)
+        return result
+
+    def save_row_digests(self, table_name: str, digests: List[Tuple[Any, bytes]]):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO row_digests (table_name, id, digest) VALUES (?, ?, ?);",
+            ((table_name, row_id, digest) for row_id, digest in digests),
+        )
+        self.conn.commit()
@@ -1,78 +1,418 @@
 import argparse # легко принимает аргументы из терминала при запуске
+import csv
+import io
 import json
+import os
 import psycopg2 # связь Python & PostgreSQL
 import psycopg2.extras # Важно для словарей и быстрой вставки
+import psycopg2.pool # Пул соединений для параллельной загрузки
 import sys # работа с интерпретатором
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any # type hinting
-from config import DB_CONFIG
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Callable, TextIO # type hinting
+from xml.sax.saxutils import escape as xml_escape
+try:
+    import pyarrow as pa # нужен только для форматов arrow и parquet
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+from config import (DB_CONFIG, STREAM_CHUNK_SIZE,
+                    PARALLEL_WORKERS, LOAD_MAX_RETRIES, LOAD_RETRY_BACKOFF, LOAD_STATE_PATH, QUERY_ITERSIZE,
+                    RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+from json_stream import iter_json_records, chunked
+from load_state import LoadStateStore, row_digest
+from metrics import metrics, StatementStats
+from reports import build_room_reports
+from room_stats import RoomStatsManager
+from schema import SchemaManager
+from result_cache import ResultCache, ensure_data_versions, bump_data_version, read_data_version
+
+# Экранирование спецсимволов для текстового формата COPY
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def records_to_copy_buffer(records: Iterable[tuple]) -> io.StringIO:
+    """Собирает кортежи в буфер в текстовом формате COPY (табуляция между полями, \\N для NULL)."""
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write('\t'.join('\\N' if value is None else str(value).translate(_COPY_ESCAPES) for value in record))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
 
 class DataLoader:
-    """Класс для загрузки данных из JSON файлов в базу данных."""
+    """Класс для загрузки данных из JSON файлов в базу данных.
+
+    Каждая транзакция загрузки увеличивает поколение таблицы в data_versions,
+    что автоматически делает недействительными закэшированные отчёты.
+    """
+    # Колонки таблиц в порядке, в котором их возвращает функция преобразования записи
+    TABLE_COLUMNS = {
+        'rooms': ('id', 'name'),
+        'students': ('id', 'name', 'sex', 'birthday', 'room_id'),
+    }
+
     def __init__(self, conn):
         self.conn = conn
 
+    @staticmethod
+    def _get_insert_spec(table_name: str) -> Tuple[str, Callable[[Dict[str, Any]], tuple]]:
+        """Возвращает запрос вставки и функцию преобразования JSON-объекта в кортеж для таблицы."""
+        if table_name == 'rooms':
+            query = "INSERT INTO rooms (id, name) VALUES (%s, %s) ON CONFLICT (id) DO NOTHING;"
+            return query, lambda item: (item['id'], item['name'])
+        if table_name == 'students':
+            query = "INSERT INTO students (id, name, sex, birthday, room_id) VALUES (%s, %s, %s, %s, %s) ON CONFLICT (id) DO NOTHING;"
+            return query, lambda item: (item['id'], item['name'], item['sex'], item['birthday'], item['room'])
+        raise ValueError(f"Неизвестное имя таблицы: {table_name}")
+
+    @classmethod
+    def _get_upsert_query(cls, table_name: str) -> str:
+        """Возвращает запрос вставки, который обновляет существующую строку, если её содержимое изменилось."""
+        columns = cls.TABLE_COLUMNS[table_name]
+        updated = [column for column in columns if column != 'id']
+        return (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = EXCLUDED.{c}' for c in updated)} "
+            f"WHERE ({', '.join(f'{table_name}.{c}' for c in updated)}) "
+            f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in updated)});"
+        )
+
     def load_data(self, file_path: str, table_name: str):
         """Загружает данные из JSON файла в указанную таблицу."""
         print(f"Загрузка данных из {file_path} в таблицу {table_name}...")
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with metrics.stage('load_step', step='json_load', table=table_name):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
 
             if not data:
                 print(f"Предупреждение: Файл {file_path} пуст.")
                 return
 
             with self.conn.cursor() as cursor:
-                if table_name == 'rooms':
-                    query = "INSERT INTO rooms (id, name) VALUES (%s, %s) ON CONFLICT (id) DO NOTHING;"
-                    records = [(item['id'], item['name']) for item in data]
-                elif table_name == 'students':
-                    query = "INSERT INTO students (id, name, sex, birthday, room_id) VALUES (%s, %s, %s, %s, %s) ON CONFLICT (id) DO NOTHING;"
-                    records = [(item['id'], item['name'], item['sex'], item['birthday'], item['room']) for item in data]
-                else:
-                    raise ValueError(f"Неизвестное имя таблицы: {table_name}")
+                query, to_record = self._get_insert_spec(table_name)
+                with metrics.stage('load_step', step='build_records', table=table_name):
+                    records = [to_record(item) for item in data]
 
                 # Используем execute_batch для быстрой массовой вставки
-                psycopg2.extras.execute_batch(cursor, query, records)
-                self.conn.commit()
+                with metrics.stage('load_step', step='execute_batch', table=table_name):
+                    psycopg2.extras.execute_batch(cursor, query, records)
+                bump_data_version(cursor, table_name)
+                with metrics.stage('load_step', step='commit', table=table_name):
+                    self.conn.commit()
+                metrics.count('rows_loaded', len(records), table=table_name)
                 print(f"Успешно загружено {len(records)} записей в таблицу {table_name}.")
 
         except (Exception, psycopg2.Error) as error:
             print(f"Ошибка при загрузке данных в {table_name}: {error}")
             self.conn.rollback() # Откатываем изменения в случае ошибки
 
-class QueryRunner:
-    """Класс для выполнения аналитических SQL-запросов."""
-    def __init__(self, conn):
-        self.conn = conn
+    def load_data_streaming(self, file_path: str, table_name: str, chunk_size: int = STREAM_CHUNK_SIZE):
+        """Потоково загружает JSON-массив или JSON Lines файл порциями по chunk_size записей.
 
-    def _execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Вспомогательный метод для выполнения запроса и возврата результата в виде списка словарей."""
-        results = []
+        В памяти одновременно находится только одна порция, поэтому потребление
+        памяти не зависит от размера файла. Каждая порция фиксируется отдельно:
+        при повторном запуске уже загруженные строки отсекает ON CONFLICT.
+        """
+        print(f"Потоковая загрузка данных из {file_path} в таблицу {table_name}...")
+        total = 0
         try:
-            # Используем DictCursor, чтобы получать строки как словари (ключ: значение)
-            with self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-                cursor.execute(query)
-                results = [dict(row) for row in cursor.fetchall()]
+            query, to_record = self._get_insert_spec(table_name)
+            started = time.perf_counter()
+            with self.conn.cursor() as cursor:
+                for chunk in metrics.timed_iter(chunked(iter_json_records(file_path), chunk_size),
+                                                'load_step', step='json_parse', table=table_name):
+                    with metrics.stage('load_step', step='build_records', table=table_name):
+                        records = [to_record(item) for item in chunk]
+                    with metrics.stage('load_step', step='execute_batch', table=table_name):
+                        psycopg2.extras.execute_batch(cursor, query, records)
+                    bump_data_version(cursor, table_name)
+                    with metrics.stage('load_step', step='commit', table=table_name):
+                        self.conn.commit()
+                    metrics.count('rows_loaded', len(records), table=table_name)
+                    total += len(records)
+                    elapsed = time.perf_counter() - started
+                    print(f"  {table_name}: {total} записей, {total / elapsed:.0f} записей/с")
+
+            metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
+            if total == 0:
+                print(f"Предупреждение: Файл {file_path} пуст.")
+                return
+            print(f"Успешно загружено {total} записей в таблицу {table_name}.")
+
         except (Exception, psycopg2.Error) as error:
-            print(f"Ошибка выполнения запроса: {error}")
-        return results
+            print(f"Ошибка при загрузке данных в {table_name} (зафиксировано записей: {total}): {error}")
+            self.conn.rollback() # Откатываем только незафиксированную порцию
 
-    def get_rooms_with_student_count(self):
-        """Возвращает список комнат и количество студентов в каждой."""
-        query = """
+    def load_data_copy(self, file_path: str, table_name: str, chunk_size: int = STREAM_CHUNK_SIZE):
+        """Массово загружает файл через COPY во временную таблицу и одно слияние INSERT ... SELECT.
+
+        Файл читается потоково, каждая порция передаётся через COPY FROM STDIN
+        из буфера в памяти. Затем строки переносятся в целевую таблицу одним
+        запросом с ON CONFLICT (id) DO NOTHING - семантика та же, что у load_data.
+        Всё выполняется в одной транзакции.
+        """
+        print(f"Загрузка данных через COPY из {file_path} в таблицу {table_name}...")
+        try:
+            _, to_record = self._get_insert_spec(table_name)
+            columns = ', '.join(self.TABLE_COLUMNS[table_name])
+            staging = f"{table_name}_staging"
+            total = 0
+            started = time.perf_counter()
+
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;")
+                for chunk in metrics.timed_iter(chunked(iter_json_records(file_path), chunk_size),
+                                                'load_step', step='json_parse', table=table_name):
+                    with metrics.stage('load_step', step='copy_buffer', table=table_name):
+                        buffer = records_to_copy_buffer(to_record(item) for item in chunk)
+                    metrics.count('copy_chars', len(buffer.getvalue()), table=table_name)
+                    with metrics.stage('load_step', step='copy', table=table_name):
+                        cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN", buffer)
+                    total += len(chunk)
+                    elapsed = time.perf_counter() - started
+                    print(f"  {table_name}: {total} записей в промежуточной таблице, {total / elapsed:.0f} записей/с")
+
+                metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
+                if total == 0:
+                    print(f"Предупреждение: Файл {file_path} пуст.")
+                    self.conn.rollback()
+                    return
+
+                with metrics.stage('load_step', step='merge', table=table_name):
+                    cursor.execute(
+                        f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT (id) DO NOTHING;"
+                    )
+                inserted = cursor.rowcount
+                bump_data_version(cursor, table_name)
+            with metrics.stage('load_step', step='commit', table=table_name):
+                self.conn.commit()
+            metrics.count('rows_loaded', inserted, table=table_name)
+            print(f"Успешно загружено {inserted} новых записей из {total} в таблицу {table_name}.")
+
+        except (Exception, psycopg2.Error) as error:
+            print(f"Ошибка при загрузке данных в {table_name}: {error}")
+            self.conn.rollback() # Откатываем изменения в случае ошибки
+
+    def load_data_incremental(self, file_path: str, table_name: str, state: LoadStateStore,
+                              chunk_size: int = STREAM_CHUNK_SIZE):
+        """Загружает только новые и изменённые строки файла.
+
+        Если отпечаток файла совпадает с сохранённым, файл не читается вовсе.
+        Иначе файл разбирается потоково, хэш каждой строки сравнивается с
+        хэшем из state, и в базу отправляются только отличающиеся строки -
+        через upsert, так что изменённые строки обновляются, а не игнорируются.
+        """
+        print(f"Инкрементальная загрузка данных из {file_path} в таблицу {table_name}...")
+        unchanged, fingerprint = state.check_file(file_path, table_name)
+        if unchanged:
+            print(f"Файл {file_path} не изменился с прошлой загрузки, пропускаем.")
+            return
+
+        total = 0
+        sent = 0
+        try:
+            _, to_record = self._get_insert_spec(table_name)
+            query = self._get_upsert_query(table_name)
+            started = time.perf_counter()
+            with self.conn.cursor() as cursor:
+                for chunk in metrics.timed_iter(chunked(iter_json_records(file_path), chunk_size),
+                                                'load_step', step='json_parse', table=table_name):
+                    with metrics.stage('load_step', step='build_records', table=table_name):
+                        records = [to_record(item) for item in chunk]
+                    with metrics.stage('load_step', step='diff_state', table=table_name):
+                        digests = {record[0]: row_digest(record) for record in records}
+                        known = state.get_row_digests(table_name, digests)
+                        changed = [record for record in records if known.get(record[0]) != digests[record[0]]]
+                    total += len(records)
+                    if not changed:
+                        continue
+
+                    with metrics.stage('load_step', step='execute_batch', table=table_name):
+                        psycopg2.extras.execute_batch(cursor, query, changed)
+                    bump_data_version(cursor, table_name)
+                    with metrics.stage('load_step', step='commit', table=table_name):
+                        self.conn.commit()
+                    metrics.count('rows_loaded', len(changed), table=table_name)
+                    # Состояние обновляем только после фиксации в базе
+                    state.save_row_digests(table_name, [(record[0], digests[record[0]]) for record in changed])
+                    sent += len(changed)
+                    elapsed = time.perf_counter() - started
+                    print(f"  {table_name}: просмотрено {total}, отправлено {sent}, {total / elapsed:.0f} записей/с")
+
+            state.save_file(file_path, table_name, fingerprint)
+            metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
+            print(f"Успешно обработано {total} записей, новых или изменённых: {sent} (таблица {table_name}).")
+
+        except (Exception, psycopg2.Error) as error:
+            print(f"Ошибка при загрузке данных в {table_name}: {error}")
+            self.conn.rollback() # Откатываем только незафиксированную порцию
+
+class ParallelLoader:
+    """Класс для параллельной загрузки данных через пул соединений.
+
+    Комнаты загружаются и фиксируются первыми в одном потоке, затем студенты
+    раскладываются по hash-партициям (по id) и загружаются параллельно.
+    Одна и та же запись всегда попадает в одну партицию, поэтому потоки не
+    конкурируют за одни и те же ключи. Каждая порция фиксируется отдельно и
+    при сбое соединения или deadlock повторяется с нарастающей паузой.
+    """
+    def __init__(self, pool: psycopg2.pool.AbstractConnectionPool, workers: int = PARALLEL_WORKERS,
+                 chunk_size: int = STREAM_CHUNK_SIZE, method: str = 'copy', max_retries: int = LOAD_MAX_RETRIES):
+        if method not in ('batch', 'copy'):
+            raise ValueError(f"Неизвестный способ записи порций: {method}")
+        self.pool = pool
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.method = method
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._loaded = 0
+
+    def _write_chunk(self, cursor, table_name: str, records: List[tuple]):
+        """Записывает одну порцию через execute_batch или COPY во временную таблицу."""
+        if self.method == 'batch':
+            query, _ = DataLoader._get_insert_spec(table_name)
+            with metrics.stage('load_step', step='execute_batch', table=table_name):
+                psycopg2.extras.execute_batch(cursor, query, records)
+        else:
+            columns = ', '.join(DataLoader.TABLE_COLUMNS[table_name])
+            staging = f"{table_name}_staging"
+            cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;")
+            with metrics.stage('load_step', step='copy_buffer', table=table_name):
+                buffer = records_to_copy_buffer(records)
+            with metrics.stage('load_step', step='copy', table=table_name):
+                cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN", buffer)
+            with metrics.stage('load_step', step='merge', table=table_name):
+                cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT (id) DO NOTHING;")
+        # Последним действием перед фиксацией: строка data_versions блокируется лишь на время COMMIT
+        bump_data_version(cursor, table_name)
+
+    def load_chunk(self, table_name: str, partition: int, records: List[tuple]) -> int:
+        """Загружает и фиксирует порцию, повторяя её при временных ошибках."""
+        for attempt in range(1, self.max_retries + 1):
+            conn = self.pool.getconn()
+            try:
+                with conn.cursor() as cursor:
+                    self._write_chunk(cursor, table_name, records)
+                with metrics.stage('load_step', step='commit', table=table_name):
+                    conn.commit()
+                self.pool.putconn(conn)
+                break
+            except psycopg2.OperationalError as error:
+                # Сюда попадают и обрывы соединения, и deadlock/serialization (TransactionRollbackError)
+                broken = conn.closed != 0
+                if not broken:
+                    conn.rollback()
+                self.pool.putconn(conn, close=broken)
+                if attempt == self.max_retries:
+                    raise
+                metrics.count('load_retries', table=table_name)
+                delay = LOAD_RETRY_BACKOFF * 2 ** (attempt - 1)
+                print(f"  {table_name}[{partition}]: попытка {attempt} не удалась ({error}), повтор через {delay:.1f} с")
+                time.sleep(delay)
+            except Exception:
+                if conn.closed == 0:
+                    conn.rollback()
+                self.pool.putconn(conn)
+                raise
+
+        with self._lock:
+            self._loaded += len(records)
+        metrics.count('rows_loaded', len(records), table=table_name)
+        return len(records)
+
+    def load_table_sequential(self, file_path: str, table_name: str) -> int:
+        """Загружает таблицу порциями в текущем потоке; каждая порция фиксируется до возврата."""
+        _, to_record = DataLoader._get_insert_spec(table_name)
+        total = 0
+        for chunk in chunked(iter_json_records(file_path), self.chunk_size):
+            total += self.load_chunk(table_name, 0, [to_record(item) for item in chunk])
+        metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
+        return total
+
+    def load_table_partitioned(self, file_path: str, table_name: str) -> int:
+        """Загружает таблицу hash-партициями по id параллельно в self.workers потоков."""
+        _, to_record = DataLoader._get_insert_spec(table_name)
+        buffers: List[List[tuple]] = [[] for _ in range(self.workers)]
+        # Ограничиваем число порций в очереди, чтобы разбор файла не убегал вперёд записи
+        in_flight = threading.BoundedSemaphore(self.workers * 2)
+        futures: List[Future] = []
+        failed = threading.Event()
+        self._loaded = 0
+        started = time.perf_counter()
+
+        def on_done(future: Future):
+            in_flight.release()
+            if future.exception() is not None:
+                failed.set()
+
+        def submit(executor: ThreadPoolExecutor, partition: int, records: List[tuple]):
+            in_flight.acquire()
+            future = executor.submit(self.load_chunk, table_name, partition, records)
+            future.add_done_callback(on_done)
+            futures.append(future)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for item in iter_json_records(file_path):
+                partition = hash(item['id']) % self.workers
+                buffers[partition].append(to_record(item))
+                if len(buffers[partition]) >= self.chunk_size:
+                    submit(executor, partition, buffers[partition])
+                    buffers[partition] = []
+                    elapsed = time.perf_counter() - started
+                    print(f"  {table_name}: {self._loaded} записей, {self._loaded / elapsed:.0f} записей/с")
+                    # Первая же упавшая порция останавливает разбор файла
+                    if failed.is_set():
+                        break
+            else:
+                for partition, records in enumerate(buffers):
+                    if records:
+                        submit(executor, partition, records)
+
+        metrics.count('bytes_read', os.path.getsize(file_path), table=table_name)
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise RuntimeError(f"Не удалось загрузить {len(errors)} порций таблицы {table_name}: {errors[0]}")
+        return sum(f.result() for f in futures)
+
+    def load(self, rooms_path: str, students_path: str):
+        """Загружает комнаты (с фиксацией) и затем параллельно студентов."""
+        conn = self.pool.getconn()
+        try:
+            ensure_data_versions(conn)
+        finally:
+            self.pool.putconn(conn)
+
+        print(f"Загрузка данных из {rooms_path} в таблицу rooms...")
+        rooms_count = self.load_table_sequential(rooms_path, 'rooms')
+        print(f"Успешно загружено {rooms_count} записей в таблицу rooms.")
+
+        print(f"Параллельная загрузка данных из {students_path} в таблицу students ({self.workers} потоков)...")
+        started = time.perf_counter()
+        students_count = self.load_table_partitioned(students_path, 'students')
+        elapsed = time.perf_counter() - started
+        print(f"Успешно загружено {students_count} записей в таблицу students "
+              f"({students_count / elapsed if elapsed else 0:.0f} записей/с).")
+
+class QueryRunner:
+    """Класс для выполнения аналитических SQL-запросов."""
+    # Запросы отчётов: ключ совпадает с именем раздела в результатах
+    REPORT_QUERIES = {
+        # Список комнат и количество студентов в каждой
+        "rooms_with_student_count": """
             SELECT r.name AS room_name, COUNT(s.id) AS students_count
             FROM rooms r
             LEFT JOIN students s ON r.id = s.room_id
             GROUP BY r.id, r.name
             ORDER BY r.name;
-        """
-        return self._execute_query(query)
-
-    def get_top5_rooms_smallest_avg_age(self):
-        """Возвращает 5 комнат с самым маленьким средним возрастом студентов."""
-        query = """
+        """,
+        # 5 комнат с самым маленьким средним возрастом студентов
+        "top5_rooms_smallest_avg_age": """
             SELECT
                 r.name AS room_name,
                 AVG(EXTRACT(YEAR FROM AGE(s.birthday))) AS avg_age
@@ -82,12 +422,9 @@ class QueryRunner:
             HAVING COUNT(s.id) > 0
             ORDER BY avg_age
             LIMIT 5;
-        """
-        return self._execute_query(query)
-
-    def get_top5_rooms_largest_age_diff(self):
-        """Возвращает 5 комнат с самой большой разницей в возрасте студентов."""
-        query = """
+        """,
+        # 5 комнат с самой большой разницей в возрасте студентов
+        "top5_rooms_largest_age_diff": """
             SELECT
                 r.name AS room_name,
                 (MAX(EXTRACT(YEAR FROM AGE(s.birthday))) - MIN(EXTRACT(YEAR FROM AGE(s.birthday)))) AS age_difference
@@ -97,20 +434,202 @@ class QueryRunner:
             HAVING COUNT(s.id) > 1 -- Разница имеет смысл только если студентов больше одного
             ORDER BY age_difference DESC
             LIMIT 5;
-        """
-        return self._execute_query(query)
-
-    def get_rooms_with_mixed_sexes(self):
-        """Возвращает список комнат, где живут студенты разного пола."""
-        query = """
+        """,
+        # Комнаты, где живут студенты разного пола
+        "rooms_with_mixed_sexes": """
             SELECT r.name AS room_name
             FROM rooms r
             JOIN students s ON r.id = s.room_id
             GROUP BY r.id, r.name
             HAVING COUNT(DISTINCT s.sex) > 1
             ORDER BY r.name;
+        """,
+    }
+
+    # Все показатели по комнатам за один проход по students.
+    # Возраст вычисляется один раз на студента; "разный пол" определяется как
+    # MIN(sex) <> MAX(sex), что равносильно COUNT(DISTINCT sex) > 1, но не
+    # требует сортировки и позволяет обойтись одной хэш-агрегацией.
+    ROOM_STATS_QUERY = """
+        WITH student_ages AS (
+            SELECT id, room_id, sex, EXTRACT(YEAR FROM AGE(birthday)) AS age
+            FROM students
+        )
+        SELECT
+            r.name AS room_name,
+            COUNT(a.id) AS students_count,
+            AVG(a.age) AS avg_age,
+            MIN(a.age) AS min_age,
+            MAX(a.age) AS max_age,
+            COALESCE(MIN(a.sex) <> MAX(a.sex), FALSE) AS has_mixed_sexes
+        FROM rooms r
+        LEFT JOIN student_ages a ON r.id = a.room_id
+        GROUP BY r.id, r.name
+        ORDER BY r.name;
+    """
+
+    # Те же показатели, что и ROOM_STATS_QUERY, но из сводной таблицы room_stats (см. room_stats.py).
+    # Минимальный и максимальный возраст точные; средний возраст считается по средней
+    # дате рождения как дробное число лет, а не как среднее полных лет каждого студента.
+    ROOM_STATS_TABLE_QUERY = """
+        SELECT
+            r.name AS room_name,
+            COALESCE(rs.students_count, 0) AS students_count,
+            (CURRENT_DATE - DATE '1970-01-01' - rs.birthday_days_sum::numeric / NULLIF(rs.birthdays_count, 0))
+                / 365.25 AS avg_age,
+            EXTRACT(YEAR FROM AGE(rs.max_birthday)) AS min_age,
+            EXTRACT(YEAR FROM AGE(rs.min_birthday)) AS max_age,
+            COALESCE(rs.min_sex <> rs.max_sex, FALSE) AS has_mixed_sexes
+        FROM rooms r
+        LEFT JOIN room_stats rs ON rs.room_id = r.id
+        ORDER BY r.name;
+    """
+
+    def __init__(self, conn, cache: ResultCache = None):
+        self.conn = conn
+        self.cache = cache
+        self._cursor_counter = 0
+        if cache is not None:
+            ensure_data_versions(conn)
+
+    def _execute_query(self, query: str, name: str = 'adhoc') -> List[Dict[str, Any]]:
+        """Вспомогательный метод для выполнения запроса и возврата результата в виде списка словарей.
+
+        Если задан кэш, результат ищется по тексту запроса и текущей версии
+        данных; при попадании сам запрос в базе не выполняется. name - метка
+        запроса в метриках.
         """
-        return self._execute_query(query)
+        results = []
+        try:
+            cache_key = None
+            if self.cache is not None:
+                with metrics.stage('query_step', step='cache_lookup', query=name):
+                    cache_key = self.cache.make_key(query, read_data_version(self.conn))
+                    cached = self.cache.get(cache_key)
+                if cached is not None:
+                    metrics.count('cache_hits', query=name)
+                    return cached
+
+            # Используем DictCursor, чтобы получать строки как словари (ключ: значение)
+            with self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                with metrics.stage('query_step', step='execute', query=name):
+                    cursor.execute(query)
+                with metrics.stage('query_step', step='fetchall', query=name):
+                    rows = cursor.fetchall()
+                with metrics.stage('query_step', step='to_dict', query=name):
+                    results = [dict(row) for row in rows]
+            metrics.count('rows_fetched', len(results), query=name)
+
+            if cache_key is not None:
+                self.cache.put(cache_key, results)
+        except (Exception, psycopg2.Error) as error:
+            print(f"Ошибка выполнения запроса: {error}")
+        return results
+
+    def explain(self, query: str) -> str:
+        """Выполняет запрос под EXPLAIN (ANALYZE, BUFFERS) и возвращает план в текстовом виде."""
+        with self.conn.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.conn.rollback() # EXPLAIN ANALYZE выполняет запрос - ничего не оставляем в транзакции
+        return plan
+
+    def explain_timing(self, query: str) -> Tuple[float, float]:
+        """Возвращает серверное время планирования и выполнения запроса в мс по EXPLAIN (ANALYZE)."""
+        with self.conn.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, TIMING OFF, FORMAT JSON) " + query)
+            plan = cursor.fetchone()[0][0]
+        self.conn.rollback()
+        return plan['Planning Time'], plan['Execution Time']
+
+    def get_queries(self, analytics: str) -> Dict[str, str]:
+        """Возвращает запросы, которые выполняются в выбранном режиме отчётов."""
+        if analytics == 'combined':
+            return {"room_stats": self.ROOM_STATS_QUERY}
+        if analytics == 'room_stats':
+            return {"room_stats_table": self.ROOM_STATS_TABLE_QUERY}
+        return dict(self.REPORT_QUERIES)
+
+    def iter_query(self, query: str, itersize: int = QUERY_ITERSIZE) -> Iterator[Dict[str, Any]]:
+        """Выполняет запрос через именованный (серверный) курсор и отдаёт строки по мере получения.
+
+        С сервера за один раз забирается itersize строк, поэтому в памяти
+        никогда не находится весь результат. RealDictCursor сразу отдаёт
+        словари, без отдельного преобразования dict(row).
+        """
+        self._cursor_counter += 1
+        cursor_name = f"report_cursor_{self._cursor_counter}"
+        with self.conn.cursor(name=cursor_name, cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.itersize = itersize
+            cursor.execute(query.strip().rstrip(';'))
+            yield from cursor
+
+    def iter_query_batches(self, query: str, batch_size: int = QUERY_ITERSIZE) -> Iterator[Tuple[List[str], List[int], List[tuple]]]:
+        """Выполняет запрос серверным курсором и отдаёт результат порциями кортежей.
+
+        Каждая порция - (имена колонок, OID типов PostgreSQL, строки). Первая
+        порция отдаётся всегда, даже пустая, чтобы по ней можно было построить схему.
+        """
+        self._cursor_counter += 1
+        cursor_name = f"report_cursor_{self._cursor_counter}"
+        with self.conn.cursor(name=cursor_name) as cursor:
+            cursor.execute(query.strip().rstrip(';'))
+            first = True
+            while True:
+                with metrics.stage('query_step', step='fetchmany', query='batches'):
+                    rows = cursor.fetchmany(batch_size)
+                if not rows and not first:
+                    return
+                columns = [column.name for column in cursor.description]
+                type_codes = [column.type_code for column in cursor.description]
+                yield columns, type_codes, rows
+                first = False
+
+    def iter_reports(self, itersize: int = QUERY_ITERSIZE) -> Dict[str, Iterator[Dict[str, Any]]]:
+        """Возвращает отчёты в виде ленивых итераторов; запрос выполняется при первом чтении."""
+        return {name: self.iter_query(query, itersize) for name, query in self.REPORT_QUERIES.items()}
+
+    def get_rooms_with_student_count(self):
+        """Возвращает список комнат и количество студентов в каждой."""
+        return self._execute_query(self.REPORT_QUERIES["rooms_with_student_count"], "rooms_with_student_count")
+
+    def get_top5_rooms_smallest_avg_age(self):
+        """Возвращает 5 комнат с самым маленьким средним возрастом студентов."""
+        return self._execute_query(self.REPORT_QUERIES["top5_rooms_smallest_avg_age"], "top5_rooms_smallest_avg_age")
+
+    def get_top5_rooms_largest_age_diff(self):
+        """Возвращает 5 комнат с самой большой разницей в возрасте студентов."""
+        return self._execute_query(self.REPORT_QUERIES["top5_rooms_largest_age_diff"], "top5_rooms_largest_age_diff")
+
+    def get_rooms_with_mixed_sexes(self):
+        """Возвращает список комнат, где живут студенты разного пола."""
+        return self._execute_query(self.REPORT_QUERIES["rooms_with_mixed_sexes"], "rooms_with_mixed_sexes")
+
+    def get_reports(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Выполняет все отчёты отдельными запросами."""
+        return {
+            "rooms_with_student_count": self.get_rooms_with_student_count(),
+            "top5_rooms_smallest_avg_age": self.get_top5_rooms_smallest_avg_age(),
+            "top5_rooms_largest_age_diff": self.get_top5_rooms_largest_age_diff(),
+            "rooms_with_mixed_sexes": self.get_rooms_with_mixed_sexes()
+        }
+
+    def get_room_stats(self) -> List[Dict[str, Any]]:
+        """Возвращает показатели по всем комнатам, упорядоченные по имени комнаты."""
+        return self._execute_query(self.ROOM_STATS_QUERY, 'room_stats')
+
+    def get_reports_combined(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Строит все отчёты по результату одного запроса, читающего students один раз."""
+        return self.build_reports(self.get_room_stats())
+
+    def get_reports_from_room_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Строит все отчёты по сводной таблице room_stats, не читая students."""
+        return self.build_reports(self._execute_query(self.ROOM_STATS_TABLE_QUERY, 'room_stats_table'))
+
+    @staticmethod
+    def build_reports(room_stats: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Строит четыре отчёта из показателей по комнатам (см. reports.build_room_reports)."""
+        return build_room_reports(room_stats)
 
 class DataExporter:
     """Класс для экспорта данных в разные форматы."""
@@ -118,58 +637,378 @@ class DataExporter:
     def to_json(data: Dict[str, Any]) -> str:
         """Конвертирует словарь с результатами запросов в JSON строку."""
         # default=str нужен для корректной обработки дат и других типов данных
-        return json.dumps(data, indent=4, default=str, ensure_ascii=False)
+        with metrics.stage('export_step', step='json_dumps'):
+            return json.dumps(data, indent=4, default=str, ensure_ascii=False)
 
     @staticmethod
     def to_xml(data: Dict[str, Any]) -> str:
         """Конвертирует словарь с результатами запросов в XML строку."""
-        root = ET.Element("results")
-        for query_name, records in data.items():
-            query_element = ET.SubElement(root, query_name)
-            for record in records:
-                record_element = ET.SubElement(query_element, "record")
-                for key, val in record.items():
-                    field = ET.SubElement(record_element, str(key))
-                    field.text = str(val)
+        with metrics.stage('export_step', step='build_tree'):
+            root = ET.Element("results")
+            for query_name, records in data.items():
+                query_element = ET.SubElement(root, query_name)
+                for record in records:
+                    record_element = ET.SubElement(query_element, "record")
+                    for key, val in record.items():
+                        field = ET.SubElement(record_element, str(key))
+                        field.text = str(val)
         # 'unicode' для поддержки кириллицы
-        return ET.tostring(root, encoding='unicode', short_empty_elements=False)
+        with metrics.stage('export_step', step='tostring'):
+            return ET.tostring(root, encoding='unicode', short_empty_elements=False)
+
+class StreamingExporter:
+    """Класс для потокового экспорта результатов в файл по мере получения строк.
+
+    Вывод посимвольно совпадает с DataExporter.to_json/to_xml, но в памяти
+    держится только текущая запись, поэтому отчёты могут быть любого размера.
+    """
+    @staticmethod
+    def write_json(reports: Dict[str, Iterable[Dict[str, Any]]], out: TextIO):
+        """Пишет результаты в формате json.dumps(data, indent=4)."""
+        out.write('{')
+        for index, (query_name, records) in enumerate(reports.items()):
+            out.write(',\n    ' if index else '\n    ')
+            out.write(json.dumps(query_name, ensure_ascii=False) + ': ')
+            has_records = False
+            for record in records:
+                out.write(',\n        ' if has_records else '[\n        ')
+                # Запись находится на третьем уровне вложенности - сдвигаем её строки на 8 пробелов
+                out.write(json.dumps(record, indent=4, default=str, ensure_ascii=False).replace('\n', '\n        '))
+                has_records = True
+            out.write('\n    ]' if has_records else '[]')
+        out.write('\n}' if reports else '}')
+
+    @staticmethod
+    def write_xml(reports: Dict[str, Iterable[Dict[str, Any]]], out: TextIO):
+        """Пишет результаты в том же XML, что строит DataExporter.to_xml."""
+        out.write('<results>')
+        for query_name, records in reports.items():
+            out.write(f'<{query_name}>')
+            for record in records:
+                fields = ''.join(f'<{key}>{xml_escape(str(val))}</{key}>' for key, val in record.items())
+                out.write(f'<record>{fields}</record>')
+            out.write(f'</{query_name}>')
+        out.write('</results>')
+
+# OID типов PostgreSQL, которые выгружаются в колоночные форматы со своим типом.
+# numeric выгружается как float64: точности достаточно для отчётов, а Spark/pandas читают его без преобразований.
+_PG_BOOL, _PG_INT8, _PG_INT2, _PG_INT4, _PG_TEXT = 16, 20, 21, 23, 25
+_PG_FLOAT4, _PG_FLOAT8, _PG_NUMERIC = 700, 701, 1700
+_PG_DATE, _PG_TIMESTAMP, _PG_TIMESTAMPTZ = 1082, 1114, 1184
+
+# Колонки отчётов QueryRunner.REPORT_QUERIES и OID их типов (как в cursor.description).
+# По ним строится схема для готовых списков словарей (кэш, сводные режимы), где курсора нет:
+# тип не зависит от первого значения, а у пустого отчёта остаются колонки.
+REPORT_COLUMNS = {
+    "rooms_with_student_count": [("room_name", _PG_TEXT), ("students_count", _PG_INT8)],
+    "top5_rooms_smallest_avg_age": [("room_name", _PG_TEXT), ("avg_age", _PG_NUMERIC)],
+    "top5_rooms_largest_age_diff": [("room_name", _PG_TEXT), ("age_difference", _PG_NUMERIC)],
+    "rooms_with_mixed_sexes": [("room_name", _PG_TEXT)],
+}
+
+def records_to_batches(records: List[Dict[str, Any]],
+                       columns: List[Tuple[str, int]]) -> Iterator[Tuple[List[str], List[int], List[tuple]]]:
+    """Превращает готовый список словарей в одну порцию для ColumnarExporter.
+
+    columns - имена колонок и OID их типов (см. REPORT_COLUMNS); значения
+    берутся по именам, так что порядок ключей в словарях не важен.
+    """
+    names = [name for name, _ in columns]
+    yield names, [type_code for _, type_code in columns], [tuple(record[name] for name in names) for record in records]
+
+class ColumnarExporter:
+    """Класс для экспорта результатов в CSV, Arrow IPC и Parquet порциями прямо из курсора.
+
+    На вход подаются порции (имена колонок, OID типов, кортежи строк) из
+    QueryRunner.iter_query_batches, поэтому строки не превращаются в словари,
+    а даты и числа сохраняют свои типы вместо строкового представления.
+    """
+    EXTENSIONS = {'csv': 'csv', 'arrow': 'arrow', 'parquet': 'parquet'}
+
+    @staticmethod
+    def _arrow_type(type_code):
+        return {
+            _PG_BOOL: pa.bool_(),
+            _PG_TEXT: pa.string(),
+            _PG_INT2: pa.int16(),
+            _PG_INT4: pa.int32(),
+            _PG_INT8: pa.int64(),
+            _PG_FLOAT4: pa.float32(),
+            _PG_FLOAT8: pa.float64(),
+            _PG_NUMERIC: pa.float64(),
+            _PG_DATE: pa.date32(),
+            _PG_TIMESTAMP: pa.timestamp('us'),
+            _PG_TIMESTAMPTZ: pa.timestamp('us', tz='UTC'),
+        }.get(type_code, pa.string())
+
+    @staticmethod
+    def _record_batches(batches) -> Iterator[Any]:
+        """Собирает из порций кортежей RecordBatch с единой схемой."""
+        schema = None
+        for columns, type_codes, rows in batches:
+            values = list(zip(*rows)) if rows else [()] * len(columns)
+            if schema is None:
+                schema = pa.schema([pa.field(name, ColumnarExporter._arrow_type(type_code))
+                                    for name, type_code in zip(columns, type_codes)])
+
+            arrays = []
+            for field, type_code, column in zip(schema, type_codes, values):
+                if type_code == _PG_NUMERIC:
+                    column = [None if value is None else float(value) for value in column]
+                elif pa.types.is_string(field.type):
+                    column = [None if value is None else str(value) for value in column]
+                arrays.append(pa.array(column, type=field.type))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    @staticmethod
+    def write_csv(batches, path: str):
+        """Пишет порции в CSV с заголовком; даты и числа - в их стандартном текстовом виде."""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            header_written = False
+            for columns, _, rows in batches:
+                if not header_written and columns:
+                    writer.writerow(columns)
+                    header_written = True
+                writer.writerows(rows)
+
+    @staticmethod
+    def write_arrow(batches, path: str):
+        """Пишет порции в файл Arrow IPC."""
+        ColumnarExporter._require_pyarrow('arrow')
+        writer = None
+        try:
+            for batch in ColumnarExporter._record_batches(batches):
+                if writer is None:
+                    writer = pa.ipc.new_file(path, batch.schema)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def write_parquet(batches, path: str):
+        """Пишет порции в Parquet; каждая порция становится отдельной группой строк."""
+        ColumnarExporter._require_pyarrow('parquet')
+        writer = None
+        try:
+            for batch in ColumnarExporter._record_batches(batches):
+                if writer is None:
+                    writer = pa.parquet.ParquetWriter(path, batch.schema)
+                writer.write_table(pa.Table.from_batches([batch]))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def _require_pyarrow(fmt: str):
+        if pa is None:
+            raise RuntimeError(f"Для формата {fmt} нужен пакет pyarrow (pip install pyarrow).")
+
+    @staticmethod
+    def write(batches, path: str, fmt: str):
+        writers = {
+            'csv': ColumnarExporter.write_csv,
+            'arrow': ColumnarExporter.write_arrow,
+            'parquet': ColumnarExporter.write_parquet,
+        }
+        writers[fmt](batches, path)
 
 def main():
     """Главная функция для запуска всего процесса."""
     parser = argparse.ArgumentParser(description="Загрузка данных и выполнение запросов к БД студентов.")
     parser.add_argument('students', type=str, help='Путь к JSON файлу со студентами')
     parser.add_argument('rooms', type=str, help='Путь к JSON файлу с комнатами')
-    parser.add_argument('format', type=str, choices=['json', 'xml'], help='Формат вывода (json или xml)')
+    parser.add_argument('format', type=str, choices=['json', 'xml', 'csv', 'arrow', 'parquet'],
+                        help='Формат вывода: json, xml или колоночные csv, arrow (Arrow IPC), parquet')
+    parser.add_argument('--load-mode', type=str, choices=['batch', 'stream', 'copy', 'parallel', 'incremental'], default='batch',
+                        help='Режим загрузки: batch - файл целиком, stream - потоково порциями (JSON или JSON Lines), '
+                             'copy - COPY во временную таблицу и слияние одним запросом, '
+                             'parallel - студенты параллельно hash-партициями через пул соединений, '
+                             'incremental - только новые и изменённые строки')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help='Размер порции для потоковой загрузки')
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS,
+                        help='Количество потоков и соединений для режима parallel')
+    parser.add_argument('--retries', type=int, default=LOAD_MAX_RETRIES,
+                        help='Количество попыток загрузки порции в режиме parallel')
+    parser.add_argument('--analytics', type=str, choices=['separate', 'combined', 'room_stats'], default='separate',
+                        help='Отчёты: separate - четыре отдельных запроса, combined - один проход по students, '
+                             'room_stats - по сводной таблице, которая обновляется при загрузке')
+    parser.add_argument('--state-path', type=str, default=LOAD_STATE_PATH,
+                        help='Файл состояния для режима incremental')
+    parser.add_argument('--reset-state', action='store_true',
+                        help='Забыть состояние режима incremental и загрузить файлы заново')
+    parser.add_argument('--stream-results', action='store_true',
+                        help='Читать результаты серверными курсорами и писать их потоково, не собирая в памяти')
+    parser.add_argument('--itersize', type=int, default=QUERY_ITERSIZE,
+                        help='Сколько строк забирать с сервера за раз при --stream-results')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Файл для результатов (по умолчанию - стандартный вывод); '
+                             'для csv, arrow и parquet - каталог, по файлу на отчёт (по умолчанию results)')
+    parser.add_argument('--init-schema', action='store_true',
+                        help='Создать таблицы и индексы, если их нет')
+    parser.add_argument('--rebuild-indexes', action='store_true',
+                        help='Удалить вторичные индексы перед загрузкой и построить заново после неё')
+    parser.add_argument('--explain', action='store_true',
+                        help='Вывести EXPLAIN (ANALYZE, BUFFERS) для запросов выбранного режима отчётов')
+    parser.add_argument('--cache', action='store_true',
+                        help='Кэшировать результаты отчётов на диске до следующей загрузки новых данных; '
+                             'с --stream-results и колоночными форматами отчёты тогда собираются в памяти')
+    parser.add_argument('--cache-dir', type=str, default=RESULT_CACHE_DIR,
+                        help='Каталог кэша результатов')
+    parser.add_argument('--cache-max-mb', type=int, default=RESULT_CACHE_MAX_BYTES // 2 ** 20,
+                        help='Максимальный размер кэша результатов в МБ')
+    parser.add_argument('--metrics', type=str, default=None,
+                        help='Файл для отчёта о метриках стадий в формате JSON')
+    parser.add_argument('--metrics-prom', type=str, default=None,
+                        help='Файл для метрик в текстовом формате Prometheus')
+    parser.add_argument('--profile-dir', type=str, default=None,
+                        help='Профилировать стадии загрузки, запросов и экспорта через cProfile и сохранить .prof в каталог')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Записать пик памяти Python и крупнейшие выделения каждой стадии (tracemalloc)')
+    parser.add_argument('--server-time', type=str, choices=['explain', 'pg_stat_statements'], default=None,
+                        help='Серверное время запросов: explain - отдельный EXPLAIN ANALYZE каждого запроса, '
+                             'pg_stat_statements - разница статистики до и после отчётов (нужно расширение)')
     args = parser.parse_args()
+    metrics.configure(args.profile_dir, args.trace_memory)
 
     conn = None
+    statement_stats = None
     try:
         # Устанавливаем соединение с базой данных
         conn = psycopg2.connect(**DB_CONFIG)
         print("Соединение с базой данных установлено.")
 
+        schema_manager = SchemaManager(conn)
+        if args.init_schema:
+            schema_manager.create_all()
+            print("Таблицы и индексы созданы.")
+        if args.rebuild_indexes:
+            schema_manager.drop_indexes()
+            print("Вторичные индексы удалены на время загрузки.")
+
+        # Сводная таблица должна существовать до загрузки, чтобы триггеры учли новые строки
+        if args.analytics == 'room_stats':
+            stats_manager = RoomStatsManager(conn)
+            if not stats_manager.is_installed():
+                print("Создание сводной таблицы room_stats...")
+                stats_manager.install()
+
         # 1. Загрузка данных
-        loader = DataLoader(conn)
-        loader.load_data(args.rooms, 'rooms')
-        loader.load_data(args.students, 'students')
+        with metrics.profile('load'):
+            loader = DataLoader(conn)
+            if args.load_mode == 'stream':
+                loader.load_data_streaming(args.rooms, 'rooms', args.chunk_size)
+                loader.load_data_streaming(args.students, 'students', args.chunk_size)
+            elif args.load_mode == 'copy':
+                loader.load_data_copy(args.rooms, 'rooms', args.chunk_size)
+                loader.load_data_copy(args.students, 'students', args.chunk_size)
+            elif args.load_mode == 'parallel':
+                pool = psycopg2.pool.ThreadedConnectionPool(1, args.workers, **DB_CONFIG)
+                try:
+                    ParallelLoader(pool, args.workers, args.chunk_size, max_retries=args.retries).load(args.rooms, args.students)
+                except (Exception, psycopg2.Error) as error:
+                    print(f"Ошибка при параллельной загрузке: {error}")
+                finally:
+                    pool.closeall()
+            elif args.load_mode == 'incremental':
+                state = LoadStateStore(args.state_path)
+                try:
+                    if args.reset_state:
+                        state.reset()
+                    loader.load_data_incremental(args.rooms, 'rooms', state, args.chunk_size)
+                    loader.load_data_incremental(args.students, 'students', state, args.chunk_size)
+                finally:
+                    state.close()
+            else:
+                loader.load_data(args.rooms, 'rooms')
+                loader.load_data(args.students, 'students')
+
+        if args.rebuild_indexes:
+            schema_manager.create_indexes()
+            print("Вторичные индексы построены заново.")
 
         # 2. Выполнение запросов
-        runner = QueryRunner(conn)
-        results = {
-            "rooms_with_student_count": runner.get_rooms_with_student_count(),
-            "top5_rooms_smallest_avg_age": runner.get_top5_rooms_smallest_avg_age(),
-            "top5_rooms_largest_age_diff": runner.get_top5_rooms_largest_age_diff(),
-            "rooms_with_mixed_sexes": runner.get_rooms_with_mixed_sexes()
-        }
+        if args.server_time == 'pg_stat_statements':
+            statement_stats = StatementStats(conn)
+            if not statement_stats.available:
+                print("Расширение pg_stat_statements не установлено - серверное время запросов не собирается.")
+            statement_stats.start()
+
+        with metrics.profile('reports'):
+            if args.explain:
+                explain_runner = QueryRunner(conn)
+                for name, query in explain_runner.get_queries(args.analytics).items():
+                    print(f"\n--- План запроса {name} ---")
+                    print(explain_runner.explain(query))
+
+            cache = ResultCache(args.cache_dir, args.cache_max_mb * 2 ** 20) if args.cache else None
+            runner = QueryRunner(conn, cache)
+            if args.analytics == 'combined':
+                results = runner.get_reports_combined()
+            elif args.analytics == 'room_stats':
+                results = runner.get_reports_from_room_stats()
+            elif (args.stream_results or args.format in ColumnarExporter.EXTENSIONS) and cache is None:
+                results = runner.iter_reports(args.itersize) # запросы выполнятся по мере записи
+            else:
+                # С --cache отчёты читаются списками и при потоковом или колоночном выводе: кэш всё равно
+                # хранит результат целиком, а при попадании запросы в базе не выполняются
+                results = runner.get_reports()
+
+            if cache is not None:
+                stats = cache.stats()
+                print(f"Кэш результатов: попаданий {stats['hits']}, промахов {stats['misses']}, вытеснений {stats['evictions']}.")
+
+        if args.server_time == 'explain':
+            for name, query in runner.get_queries(args.analytics).items():
+                planning_ms, execution_ms = runner.explain_timing(query)
+                metrics.gauge('server_planning_seconds', planning_ms / 1000, query=name)
+                metrics.gauge('server_execution_seconds', execution_ms / 1000, query=name)
 
         # 3. Экспорт результатов
-        if args.format == 'json':
-            output = DataExporter.to_json(results)
-        else: # xml
-            output = DataExporter.to_xml(results)
+        with metrics.profile('export'):
+            if args.format in ColumnarExporter.EXTENSIONS:
+                output_dir = args.output or 'results'
+                os.makedirs(output_dir, exist_ok=True)
+                for name in QueryRunner.REPORT_QUERIES:
+                    path = os.path.join(output_dir, f"{name}.{ColumnarExporter.EXTENSIONS[args.format]}")
+                    if isinstance(results[name], list):
+                        batches = records_to_batches(results[name], REPORT_COLUMNS[name])
+                    else:
+                        # Отдельные запросы выгружаем порциями прямо из курсора, минуя словари
+                        batches = runner.iter_query_batches(QueryRunner.REPORT_QUERIES[name], args.itersize)
+                    ColumnarExporter.write(batches, path, args.format)
+                    metrics.count('bytes_written', os.path.getsize(path), format=args.format)
+                    print(f"Отчёт {name} записан в {path}")
+                return
+
+            if args.stream_results:
+                out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+                try:
+                    if out is sys.stdout:
+                        print("\n--- Результаты запросов ---")
+                    write = StreamingExporter.write_json if args.format == 'json' else StreamingExporter.write_xml
+                    write(results, out)
+                    out.write('\n')
+                finally:
+                    if out is not sys.stdout:
+                        out.close()
+                        metrics.count('bytes_written', os.path.getsize(args.output), format=args.format)
+                return
+
+            if args.format == 'json':
+                output = DataExporter.to_json(results)
+            else: # xml
+                output = DataExporter.to_xml(results)
+            metrics.count('bytes_written', len(output.encode('utf-8')) + 1, format=args.format)
 
-        print("\n--- Результаты запросов ---")
-        print(output)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(output + '\n')
+            else:
+                print("\n--- Результаты запросов ---")
+                print(output)
 
     except psycopg2.OperationalError as e:
         print(f"ОШИБКА ПОДКЛЮЧЕНИЯ: Не удалось подключиться к базе. Проверьте DB_CONFIG. Детали: {e}", file=sys.stderr)
@@ -179,8 +1018,22 @@ def main():
         print(f"Произошла непредвиденная ошибка: {e}", file=sys.stderr)
     finally:
         if conn is not None:
+            if statement_stats is not None:
+                # Запросы --stream-results выполняются во время экспорта, поэтому снимок берём в самом конце
+                try:
+                    statement_stats.stop('reports')
+                except psycopg2.Error as error:
+                    print(f"Не удалось прочитать pg_stat_statements: {error}", file=sys.stderr)
             conn.close()
             print("\nСоединение с базой данных закрыто.")
+        if args.metrics:
+            with open(args.metrics, 'w', encoding='utf-8') as f:
+                f.write(metrics.to_json() + '\n')
+            print(f"Метрики записаны в {args.metrics}")
+        if args.metrics_prom:
+            with open(args.metrics_prom, 'w', encoding='utf-8') as f:
+                f.write(metrics.to_prometheus())
+            print(f"Метрики Prometheus записаны в {args.metrics_prom}")
 
 if __name__ == "__main__":
     main()
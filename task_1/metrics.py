@@ -0,0 +1,236 @@
+"""Метрики стадий task_1: таймеры, счётчики строк и байтов, серверное время запросов.
+
+Все классы пишут в общий объект metrics. Таймеры и счётчики агрегируются
+по имени и меткам (например, load_step с step="execute_batch", table="students"), так
+что замер каждой порции стоит пару вызовов perf_counter. Профилирование
+(cProfile и tracemalloc) включается отдельно и оборачивает только крупные
+стадии (загрузка, запросы, экспорт) через metrics.profile(...).
+
+Отчёт выводится в JSON (metrics.to_json) и в текстовом формате Prometheus
+(metrics.to_prometheus), который можно отдать node_exporter textfile collector.
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+PROMETHEUS_PREFIX = 'task1'
+
+_LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _key(name: str, labels: Dict[str, Any]) -> _LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _prometheus_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + '}'
+
+class Metrics:
+    """Потокобезопасный реестр таймеров, счётчиков и результатов профилирования."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        self.profile_dir: Optional[str] = None
+        self.trace_memory = False
+
+    def reset(self):
+        with self._lock:
+            self.timers: Dict[_LabelKey, list] = {} # [вызовов, сумма секунд, максимум секунд]
+            self.counters: Dict[_LabelKey, float] = {}
+            self.gauges: Dict[_LabelKey, float] = {}
+            self.profiles: Dict[str, Dict[str, Any]] = {}
+
+    def configure(self, profile_dir: Optional[str] = None, trace_memory: bool = False):
+        """Включает cProfile (файлы .prof в profile_dir) и/или tracemalloc для стадий metrics.profile."""
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Замеряет время блока и добавляет его к таймеру stage с метками."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed_iter(self, iterable: Iterable, name: str, **labels) -> Iterator:
+        """Отдаёт элементы iterable, замеряя время получения каждого (например, разбор JSON порциями)."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.observe(name, time.perf_counter() - started, **labels)
+                return
+            self.observe(name, time.perf_counter() - started, **labels)
+            yield item
+
+    @contextmanager
+    def profile(self, name: str):
+        """Крупная стадия: замер времени и, если включено, cProfile и пик памяти tracemalloc.
+
+        cProfile видит только текущий поток и не допускает вложенных профилей,
+        поэтому profile используется только на верхнем уровне main().
+        """
+        profiler = cProfile.Profile() if self.profile_dir else None
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with self.stage('pipeline', stage=name):
+                yield
+        finally:
+            info: Dict[str, Any] = {}
+            if profiler is not None:
+                profiler.disable()
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                stats = pstats.Stats(profiler)
+                top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:15]
+                info['cprofile_path'] = path
+                info['top_cumulative'] = [
+                    {'function': f"{func[0]}:{func[1]}({func[2]})", 'calls': calls, 'cumulative_s': cumulative}
+                    for func, (_, calls, _, cumulative, _) in top
+                ]
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')[:10]
+                info['traced_peak_bytes'] = peak
+                info['traced_current_bytes'] = current
+                info['top_allocations'] = [str(stat) for stat in diff]
+                self.gauge('traced_peak_bytes', peak, stage=name)
+            if info:
+                with self._lock:
+                    self.profiles[name] = info
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'timers': [
+                    {'name': name, 'labels': dict(labels), 'calls': calls, 'total_s': total, 'max_s': longest}
+                    for (name, labels), (calls, total, longest) in sorted(self.timers.items())
+                ],
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'gauges': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+                'profiles': dict(self.profiles),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4, ensure_ascii=False, default=str)
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат Prometheus: таймеры - как пары _seconds_total/_calls_total."""
+        lines = []
+        with self._lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+
+        def family(metric: str, kind: str, samples):
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in samples:
+                lines.append(f"{metric}{_prometheus_labels(labels)} {value}")
+
+        for name in sorted({name for (name, _), _ in timers}):
+            base = f"{PROMETHEUS_PREFIX}_{name}"
+            family(f"{base}_seconds_total", 'counter', [(l, v[1]) for (n, l), v in timers if n == name])
+            family(f"{base}_calls_total", 'counter', [(l, v[0]) for (n, l), v in timers if n == name])
+            family(f"{base}_max_seconds", 'gauge', [(l, v[2]) for (n, l), v in timers if n == name])
+        for name in sorted({name for (name, _), _ in counters}):
+            family(f"{PROMETHEUS_PREFIX}_{name}_total", 'counter', [(l, v) for (n, l), v in counters if n == name])
+        for name in sorted({name for (name, _), _ in gauges}):
+            family(f"{PROMETHEUS_PREFIX}_{name}", 'gauge', [(l, v) for (n, l), v in gauges if n == name])
+        return '\n'.join(lines) + '\n'
+
+# Общий реестр, в который пишут DataLoader, ParallelLoader, QueryRunner и экспортёры
+metrics = Metrics()
+
+class StatementStats:
+    """Серверное время запросов по pg_stat_statements: разница снимков до и после стадии."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.available = self._detect()
+        self._before: Dict[int, tuple] = {}
+
+    def _detect(self) -> bool:
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pg_stat_statements') IS NOT NULL;")
+            available = cursor.fetchone()[0]
+            self._time_column = 'total_time'
+            if available:
+                cursor.execute("SELECT 1 FROM pg_attribute WHERE attrelid = 'pg_stat_statements'::regclass "
+                               "AND attname = 'total_exec_time';")
+                if cursor.fetchone():
+                    self._time_column = 'total_exec_time' # PostgreSQL 13+
+        self.conn.rollback()
+        return available
+
+    def _snapshot(self) -> Dict[int, tuple]:
+        self.conn.rollback() # на случай, если предыдущий запрос оставил транзакцию в ошибке
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT queryid, query, calls, {self._time_column}, rows FROM pg_stat_statements "
+                f"WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+                f"AND userid = (SELECT oid FROM pg_roles WHERE rolname = current_user);"
+            )
+            rows = cursor.fetchall()
+        self.conn.rollback()
+        return {queryid: (query, calls, total_ms, count) for queryid, query, calls, total_ms, count in rows}
+
+    def start(self):
+        if self.available:
+            self._before = self._snapshot()
+
+    def stop(self, stage: str):
+        """Записывает в metrics серверное время каждого запроса, выполненного после start()."""
+        if not self.available:
+            return
+        for queryid, (query, calls, total_ms, count) in self._snapshot().items():
+            _, prev_calls, prev_ms, prev_rows = self._before.get(queryid, (None, 0, 0.0, 0))
+            if calls <= prev_calls:
+                continue
+            label = ' '.join(query.split())[:80]
+            metrics.count('server_query_seconds', (total_ms - prev_ms) / 1000, stage=stage, query=label)
+            metrics.count('server_query_calls', calls - prev_calls, stage=stage, query=label)
+            metrics.count('server_query_rows', count - prev_rows, stage=stage, query=label)
@@ -0,0 +1,167 @@
+"""Асинхронный конвейер: разбор, загрузка и отчёты с перекрытием стадий.
+
+В отличие от main.py, где стадии идут строго друг за другом, здесь
+следующая порция JSON разбирается, пока предыдущая записывается в базу,
+а четыре отчёта после загрузки выполняются одновременно на отдельных
+соединениях. Асинхронного драйвера нет - psycopg2 вызывается из пула
+потоков через run_in_executor; во время сетевого обмена он отпускает GIL,
+поэтому разбор JSON и запись действительно идут параллельно.
+
+Запуск из каталога task_1:
+    python pipeline.py data/students.json data/rooms.json json
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import psycopg2
+import psycopg2.pool
+from config import DB_CONFIG, STREAM_CHUNK_SIZE
+from json_stream import chunked, iter_json_records
+from main import DataLoader, ParallelLoader, QueryRunner, DataExporter
+from result_cache import ensure_data_versions
+
+class StageTimer:
+    """Собирает суммарное время работы и окно (начало-конец) каждой стадии конвейера."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.busy: Dict[str, float] = {}
+        self.windows: Dict[str, Tuple[float, float]] = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.busy[stage] = self.busy.get(stage, 0.0) + end - start
+            first, _ = self.windows.get(stage, (start, end))
+            self.windows[stage] = (first, end)
+
+    def report(self) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"{'стадия':<40} {'работа, с':>10} {'начало, с':>10} {'конец, с':>10}"]
+        for stage, busy in self.busy.items():
+            first, last = self.windows[stage]
+            lines.append(f"{stage:<40} {busy:>10.3f} {first - self.started:>10.3f} {last - self.started:>10.3f}")
+        busy_total = sum(self.busy.values())
+        lines.append(f"Сумма времени стадий: {busy_total:.3f} с, общее время: {total:.3f} с, "
+                     f"выигрыш от перекрытия: {max(busy_total - total, 0.0):.3f} с")
+        return '\n'.join(lines)
+
+async def load_table(loader: ParallelLoader, parse_executor: ThreadPoolExecutor, db_executor: ThreadPoolExecutor,
+                     file_path: str, table_name: str, chunk_size: int, timer: StageTimer) -> int:
+    """Загружает таблицу, разбирая следующую порцию, пока предыдущая пишется в базу."""
+    loop = asyncio.get_running_loop()
+    _, to_record = DataLoader._get_insert_spec(table_name)
+    chunks = chunked(iter_json_records(file_path), chunk_size)
+
+    def parse_next() -> Optional[List[tuple]]:
+        with timer.measure(f"разбор {table_name}"):
+            chunk = next(chunks, None)
+            return None if chunk is None else [to_record(item) for item in chunk]
+
+    def write(records: List[tuple]) -> int:
+        with timer.measure(f"загрузка {table_name}"):
+            return loader.load_chunk(table_name, 0, records)
+
+    total = 0
+    pending = None
+    try:
+        while True:
+            records = await loop.run_in_executor(parse_executor, parse_next)
+            if pending is not None:
+                done, pending = pending, None
+                total += await done
+            if records is None:
+                return total
+            pending = loop.run_in_executor(db_executor, write, records)
+    finally:
+        # Разбор упал (или задачу отменили), а запись ещё идёт: дожидаемся её, чтобы
+        # соединение вернулось в пул до closeall; её собственная ошибка не скрывает исходную
+        if pending is not None:
+            await asyncio.gather(pending, return_exceptions=True)
+
+async def run_reports(pool: psycopg2.pool.AbstractConnectionPool, db_executor: ThreadPoolExecutor,
+                      timer: StageTimer) -> Dict[str, list]:
+    """Выполняет все отчёты QueryRunner одновременно, каждый на своём соединении."""
+    loop = asyncio.get_running_loop()
+
+    def run_report(name: str) -> list:
+        conn = pool.getconn()
+        try:
+            with timer.measure(f"запрос {name}"):
+                result = getattr(QueryRunner(conn), f"get_{name}")()
+            conn.rollback()
+            return result
+        finally:
+            pool.putconn(conn)
+
+    names = list(QueryRunner.REPORT_QUERIES)
+    results = await asyncio.gather(*(loop.run_in_executor(db_executor, run_report, name) for name in names))
+    return dict(zip(names, results))
+
+async def run_pipeline(args) -> Tuple[str, StageTimer]:
+    timer = StageTimer()
+    report_count = len(QueryRunner.REPORT_QUERIES)
+    pool = psycopg2.pool.ThreadedConnectionPool(1, report_count + 1, **DB_CONFIG)
+    parse_executor = ThreadPoolExecutor(max_workers=1)
+    db_executor = ThreadPoolExecutor(max_workers=report_count + 1)
+    try:
+        conn = pool.getconn()
+        try:
+            ensure_data_versions(conn)
+        finally:
+            pool.putconn(conn)
+
+        loader = ParallelLoader(pool, workers=1, chunk_size=args.chunk_size)
+        # Комнаты фиксируются целиком до первой порции студентов, которые на них ссылаются
+        rooms = await load_table(loader, parse_executor, db_executor, args.rooms, 'rooms', args.chunk_size, timer)
+        students = await load_table(loader, parse_executor, db_executor, args.students, 'students', args.chunk_size, timer)
+        print(f"Загружено комнат: {rooms}, студентов: {students}.")
+
+        results = await run_reports(pool, db_executor, timer)
+
+        loop = asyncio.get_running_loop()
+        export = DataExporter.to_json if args.format == 'json' else DataExporter.to_xml
+
+        def serialize() -> str:
+            with timer.measure("сериализация"):
+                return export(results)
+
+        output = await loop.run_in_executor(parse_executor, serialize)
+        return output, timer
+    finally:
+        parse_executor.shutdown()
+        db_executor.shutdown()
+        pool.closeall()
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвейер загрузки и отчётов с перекрытием стадий.")
+    parser.add_argument('students', type=str, help='Путь к JSON файлу со студентами')
+    parser.add_argument('rooms', type=str, help='Путь к JSON файлу с комнатами')
+    parser.add_argument('format', type=str, choices=['json', 'xml'], help='Формат вывода (json или xml)')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help='Размер порции для разбора и загрузки')
+    args = parser.parse_args()
+
+    try:
+        output, timer = asyncio.run(run_pipeline(args))
+    except psycopg2.OperationalError as e:
+        print(f"ОШИБКА ПОДКЛЮЧЕНИЯ: Не удалось подключиться к базе. Проверьте DB_CONFIG. Детали: {e}", file=sys.stderr)
+        sys.exit(1)
+    except FileNotFoundError as e:
+        print(f"ОШИБКА ФАЙЛА: {e}. Проверьте правильность путей к файлам.", file=sys.stderr)
+        sys.exit(1)
+
+    print("\n--- Результаты запросов ---")
+    print(output)
+    print("\n--- Время по стадиям ---")
+    print(timer.report())
+
+if __name__ == "__main__":
+    main()
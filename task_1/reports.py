@@ -0,0 +1,36 @@
+from typing import Any, Dict, List
+
+def build_room_reports(room_stats: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Строит четыре отчёта из показателей по комнатам.
+
+    room_stats должен быть упорядочен по имени комнаты (как QueryRunner.ROOM_STATS_QUERY),
+    тогда результат совпадает с отдельными запросами, включая порядок строк.
+    """
+    def age_difference(row):
+        if row['max_age'] is None or row['min_age'] is None:
+            return None
+        return row['max_age'] - row['min_age']
+
+    # NULL в PostgreSQL при ORDER BY ... ASC идут последними, при DESC - первыми
+    occupied = [row for row in room_stats if row['students_count'] > 0]
+    smallest_avg_age = sorted(occupied, key=lambda row: (row['avg_age'] is None, row['avg_age'] or 0))[:5]
+    largest_age_diff = sorted(
+        (row for row in occupied if row['students_count'] > 1),
+        key=lambda row: (age_difference(row) is None, age_difference(row) or 0),
+        reverse=True,
+    )[:5]
+    return {
+        "rooms_with_student_count": [
+            {'room_name': row['room_name'], 'students_count': row['students_count']} for row in room_stats
+        ],
+        "top5_rooms_smallest_avg_age": [
+            {'room_name': row['room_name'], 'avg_age': row['avg_age']} for row in smallest_avg_age
+        ],
+        "top5_rooms_largest_age_diff": [
+            {'room_name': row['room_name'], 'age_difference': age_difference(row)}
+            for row in largest_age_diff
+        ],
+        "rooms_with_mixed_sexes": [
+            {'room_name': row['room_name']} for row in room_stats if row['has_mixed_sexes']
+        ],
+    }
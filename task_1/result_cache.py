@@ -0,0 +1,138 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Optional
+
+# Счётчик поколений данных: DataLoader увеличивает его в каждой транзакции загрузки
+DATA_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        table_name TEXT PRIMARY KEY,
+        generation BIGINT NOT NULL
+    );
+"""
+
+# Дешёвая версия данных, от которых зависят отчёты. Поколение отражает загрузки
+# через DataLoader, max(id) (по индексу первичного ключа) - вставки в обход него,
+# а CURRENT_DATE нужен, потому что возраст в отчётах зависит от текущей даты.
+DATA_VERSION_QUERY = """
+    SELECT
+        current_database(), inet_server_addr(), inet_server_port(), current_setting('search_path'), CURRENT_DATE,
+        (SELECT generation FROM data_versions WHERE table_name = 'rooms'),
+        (SELECT generation FROM data_versions WHERE table_name = 'students'),
+        (SELECT MAX(id) FROM rooms),
+        (SELECT MAX(id) FROM students);
+"""
+
+def ensure_data_versions(conn):
+    """Создаёт таблицу data_versions, если её ещё нет."""
+    with conn.cursor() as cursor:
+        cursor.execute(DATA_VERSIONS_DDL)
+    conn.commit()
+
+def bump_data_version(cursor, table_name: str):
+    """Увеличивает поколение таблицы в текущей транзакции; вызывается перед каждой фиксацией загрузки.
+
+    Таблица data_versions создаётся здесь же, в транзакции загрузки, а не
+    отдельной фиксацией: иначе создание загрузчика фиксировало бы чужую
+    открытую транзакцию на том же соединении.
+    """
+    cursor.execute(DATA_VERSIONS_DDL)
+    cursor.execute(
+        "INSERT INTO data_versions (table_name, generation) VALUES (%s, 1) "
+        "ON CONFLICT (table_name) DO UPDATE SET generation = data_versions.generation + 1;",
+        (table_name,),
+    )
+
+def read_data_version(conn) -> str:
+    """Возвращает строку, которая меняется при любой загрузке в rooms или students."""
+    with conn.cursor() as cursor:
+        cursor.execute(DATA_VERSION_QUERY)
+        version = cursor.fetchone()
+    return '|'.join(str(part) for part in version)
+
+class ResultCache:
+    """Дисковый кэш результатов запросов с вытеснением давно не использованных записей (LRU).
+
+    Каждая запись - отдельный pickle-файл в каталоге кэша, имя файла - хэш
+    текста запроса и версии данных. Время изменения файла обновляется при
+    каждом попадании и служит меткой последнего использования. Когда общий
+    размер превышает max_bytes, удаляются самые старые файлы.
+    """
+    SUFFIX = '.pickle'
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(query: str, data_version: str) -> str:
+        """Строит ключ из текста запроса и версии данных, от которых он зависит."""
+        payload = f"{data_version}\n{' '.join(query.split())}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Возвращает сохранённый результат или None, если записи нет.
+
+        Повреждённая или устаревшая запись (обрезанный файл, pickle со
+        ссылкой на исчезнувший класс и т.п.) удаляется и считается промахом,
+        иначе она отдавала бы ошибку при каждом запуске.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            self.misses += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        os.utime(path) # отмечаем использование для LRU
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """Сохраняет результат и вытесняет старые записи, если кэш переполнен."""
+        # Пишем во временный файл и переименовываем, чтобы параллельный запуск не прочитал половину записи
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                os.remove(entry.path)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
@@ -0,0 +1,238 @@
+"""Сводная таблица room_stats для отчётов по комнатам.
+
+Таблица хранит по каждой комнате количество студентов, сумму дат рождения,
+минимальную и максимальную дату рождения и наименьшее и наибольшее значение
+sex: пол в комнате разный, если они различаются - это равносильно
+COUNT(DISTINCT sex) > 1 при любых значениях sex, а не только 'M'/'F'.
+Она поддерживается триггерами уровня оператора на students, поэтому любая
+загрузка DataLoader (batch, stream, copy, parallel, incremental) обновляет её
+в той же транзакции, что и сами строки.
+
+Запуск из каталога task_1:
+    python room_stats.py install   # создать таблицу, триггеры и заполнить
+    python room_stats.py verify    # сверить с полным пересчётом по students
+    python room_stats.py rebuild   # пересчитать заново
+    python room_stats.py drop      # удалить таблицу и триггеры
+"""
+import argparse
+import sys
+from typing import Any, Dict, List
+import psycopg2
+import psycopg2.extras
+from config import DB_CONFIG
+
+# Агрегаты одной группы студентов в том же порядке, что и колонки room_stats
+_STATS_COLUMNS = "room_id, students_count, birthdays_count, birthday_days_sum, min_birthday, max_birthday, min_sex, max_sex"
+_STATS_AGGREGATES = """
+    room_id,
+    COUNT(*),
+    COUNT(birthday),
+    COALESCE(SUM(birthday - DATE '1970-01-01'), 0),
+    MIN(birthday),
+    MAX(birthday),
+    MIN(sex),
+    MAX(sex)
+"""
+
+INSTALL_SQL = f"""
+    -- Таблица всё равно заполняется заново, а прежняя версия могла хранить другие колонки
+    DROP TABLE IF EXISTS room_stats;
+    CREATE TABLE room_stats (
+        room_id BIGINT PRIMARY KEY,
+        students_count BIGINT NOT NULL,
+        birthdays_count BIGINT NOT NULL,     -- студентов с известной датой рождения
+        birthday_days_sum BIGINT NOT NULL,   -- сумма дат рождения в днях от 1970-01-01
+        min_birthday DATE,
+        max_birthday DATE,
+        min_sex TEXT,                        -- наименьшее и наибольшее значение sex в комнате
+        max_sex TEXT
+    );
+
+    -- Пересчёт выбранных комнат целиком: MIN/MAX нельзя уменьшить инкрементально
+    CREATE OR REPLACE FUNCTION room_stats_refresh(affected BIGINT[]) RETURNS void AS $$
+        DELETE FROM room_stats WHERE room_id = ANY(affected);
+        INSERT INTO room_stats ({_STATS_COLUMNS})
+        SELECT {_STATS_AGGREGATES}
+        FROM students
+        WHERE room_id = ANY(affected)
+        GROUP BY room_id;
+    $$ LANGUAGE sql;
+
+    -- Вставка только добавляет к счётчикам, поэтому обходится без чтения students
+    CREATE OR REPLACE FUNCTION room_stats_on_insert() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO room_stats AS rs ({_STATS_COLUMNS})
+        SELECT {_STATS_AGGREGATES}
+        FROM new_rows
+        WHERE room_id IS NOT NULL
+        GROUP BY room_id
+        ORDER BY room_id -- единый порядок блокировок для параллельных загрузок
+        ON CONFLICT (room_id) DO UPDATE SET
+            students_count = rs.students_count + EXCLUDED.students_count,
+            birthdays_count = rs.birthdays_count + EXCLUDED.birthdays_count,
+            birthday_days_sum = rs.birthday_days_sum + EXCLUDED.birthday_days_sum,
+            min_birthday = LEAST(rs.min_birthday, EXCLUDED.min_birthday),
+            max_birthday = GREATEST(rs.max_birthday, EXCLUDED.max_birthday),
+            min_sex = LEAST(rs.min_sex, EXCLUDED.min_sex),
+            max_sex = GREATEST(rs.max_sex, EXCLUDED.max_sex);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION room_stats_on_update() RETURNS trigger AS $$
+    BEGIN
+        PERFORM room_stats_refresh(ARRAY(
+            SELECT room_id FROM old_rows WHERE room_id IS NOT NULL
+            UNION
+            SELECT room_id FROM new_rows WHERE room_id IS NOT NULL
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION room_stats_on_delete() RETURNS trigger AS $$
+    BEGIN
+        PERFORM room_stats_refresh(ARRAY(SELECT DISTINCT room_id FROM old_rows WHERE room_id IS NOT NULL));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION room_stats_on_truncate() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM room_stats;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS room_stats_insert ON students;
+    DROP TRIGGER IF EXISTS room_stats_update ON students;
+    DROP TRIGGER IF EXISTS room_stats_delete ON students;
+    DROP TRIGGER IF EXISTS room_stats_truncate ON students;
+    CREATE TRIGGER room_stats_insert AFTER INSERT ON students
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION room_stats_on_insert();
+    CREATE TRIGGER room_stats_update AFTER UPDATE ON students
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION room_stats_on_update();
+    CREATE TRIGGER room_stats_delete AFTER DELETE ON students
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION room_stats_on_delete();
+    CREATE TRIGGER room_stats_truncate AFTER TRUNCATE ON students
+        FOR EACH STATEMENT EXECUTE FUNCTION room_stats_on_truncate();
+"""
+
+DROP_SQL = """
+    DROP TRIGGER IF EXISTS room_stats_insert ON students;
+    DROP TRIGGER IF EXISTS room_stats_update ON students;
+    DROP TRIGGER IF EXISTS room_stats_delete ON students;
+    DROP TRIGGER IF EXISTS room_stats_truncate ON students;
+    DROP FUNCTION IF EXISTS room_stats_on_insert(), room_stats_on_update(),
+        room_stats_on_delete(), room_stats_on_truncate(), room_stats_refresh(BIGINT[]);
+    DROP TABLE IF EXISTS room_stats;
+"""
+
+REBUILD_SQL = f"""
+    TRUNCATE room_stats;
+    INSERT INTO room_stats ({_STATS_COLUMNS})
+    SELECT {_STATS_AGGREGATES}
+    FROM students
+    WHERE room_id IS NOT NULL
+    GROUP BY room_id;
+"""
+
+# Строки, в которых сводка расходится с полным пересчётом по students
+VERIFY_SQL = f"""
+    WITH expected ({_STATS_COLUMNS}) AS (
+        SELECT {_STATS_AGGREGATES}
+        FROM students
+        WHERE room_id IS NOT NULL
+        GROUP BY room_id
+    )
+    SELECT
+        COALESCE(e.room_id, rs.room_id) AS room_id,
+        to_jsonb(e) - 'room_id' AS expected,
+        to_jsonb(rs) - 'room_id' AS stored
+    FROM expected e
+    FULL JOIN room_stats rs ON rs.room_id = e.room_id
+    WHERE e.room_id IS NULL
+       OR rs.room_id IS NULL
+       OR (e.students_count, e.birthdays_count, e.birthday_days_sum, e.min_birthday, e.max_birthday,
+           e.min_sex, e.max_sex)
+          IS DISTINCT FROM
+          (rs.students_count, rs.birthdays_count, rs.birthday_days_sum, rs.min_birthday, rs.max_birthday,
+           rs.min_sex, rs.max_sex)
+    ORDER BY 1;
+"""
+
+class RoomStatsManager:
+    """Класс для установки, пересчёта и проверки сводной таблицы room_stats."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def is_installed(self) -> bool:
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('room_stats') IS NOT NULL;")
+            installed = cursor.fetchone()[0]
+        self.conn.commit()
+        return installed
+
+    def install(self):
+        """Создаёт таблицу и триггеры и заполняет таблицу по текущим данным."""
+        with self.conn.cursor() as cursor:
+            # Блокируем запись в students, чтобы между пересчётом и триггерами не потерять строки
+            cursor.execute("LOCK TABLE students IN SHARE ROW EXCLUSIVE MODE;")
+            cursor.execute(INSTALL_SQL)
+            cursor.execute(REBUILD_SQL)
+        self.conn.commit()
+
+    def rebuild(self):
+        """Пересчитывает room_stats целиком по таблице students."""
+        with self.conn.cursor() as cursor:
+            cursor.execute("LOCK TABLE students IN SHARE MODE;")
+            cursor.execute(REBUILD_SQL)
+        self.conn.commit()
+
+    def drop(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(DROP_SQL)
+        self.conn.commit()
+
+    def verify(self) -> List[Dict[str, Any]]:
+        """Возвращает комнаты, для которых room_stats не совпадает с полным пересчётом."""
+        with self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute(VERIFY_SQL)
+            mismatches = [dict(row) for row in cursor.fetchall()]
+        self.conn.commit()
+        return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Управление сводной таблицей room_stats.")
+    parser.add_argument('command', choices=['install', 'rebuild', 'verify', 'drop'])
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        manager = RoomStatsManager(conn)
+        if args.command == 'install':
+            manager.install()
+            print("Таблица room_stats создана и заполнена.")
+        elif args.command == 'rebuild':
+            manager.rebuild()
+            print("Таблица room_stats пересчитана.")
+        elif args.command == 'drop':
+            manager.drop()
+            print("Таблица room_stats и триггеры удалены.")
+        else:
+            mismatches = manager.verify()
+            if not mismatches:
+                print("Таблица room_stats совпадает с полным пересчётом.")
+                return
+            print(f"Найдено расхождений: {len(mismatches)}", file=sys.stderr)
+            for row in mismatches[:20]:
+                print(f"  комната {row['room_id']}: ожидалось {row['expected']}, в room_stats {row['stored']}", file=sys.stderr)
+            sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Масштабный бенчмарк task_1: генерация, разбор, загрузка, запросы и экспорт.
+
+Для каждого размера из --sizes генерируются файлы (datagen.py), затем
+каждая стадия выполняется --repeat раз. По каждой стадии записываются
+медиана и перцентили времени, пропускная способность (строк в секунду) и
+пиковое потребление памяти процессом (VmHWM, сбрасывается перед каждой
+стадией через /proc/self/clear_refs; где это недоступно - ru_maxrss за всё
+время работы). Результаты пишутся в JSON и сравниваются с сохранённой
+базой: стадии, ставшие медленнее или тяжелее больше чем на --tolerance,
+считаются регрессией, и скрипт завершается с кодом 1.
+
+С флагом --disposable бенчмарк поднимает временный кластер PostgreSQL
+(initdb и pg_ctl из --pg-bin или PATH) во временном каталоге и удаляет его
+после работы. Кластер запускается с fsync=off, поэтому абсолютные цифры
+загрузки выше, чем на обычном сервере - сравнивать их стоит только между
+запусками в том же режиме. Без флага используется DB_CONFIG и схема bench.
+
+Запуск из каталога task_1:
+    python scale_bench.py --sizes 10K 100K 1M --disposable --save-baseline
+    python scale_bench.py --sizes 10K 100K 1M --disposable          # сравнить с базой
+"""
+import argparse
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+import psycopg2
+from config import (DB_CONFIG, STREAM_CHUNK_SIZE, SCALE_BENCH_RESULTS, SCALE_BENCH_BASELINE,
+                    SCALE_BENCH_TOLERANCE)
+from benchmark import prepare_schema, drop_schema
+from datagen import DatasetGenerator, parse_count
+from json_stream import iter_json_records
+from main import DataLoader, QueryRunner, DataExporter
+from schema import SchemaManager
+
+RSS_NOISE_MB = 16 # Рост пиковой памяти меньше этого порога не считается регрессией
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией между соседними значениями (q от 0 до 100)."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def reset_peak_rss() -> bool:
+    """Сбрасывает пиковый RSS процесса (Linux 4.0+); возвращает False, если это невозможно."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def read_peak_rss_mb() -> float:
+    """Пиковый RSS процесса в МБ с момента последнего сброса."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux - в килобайтах
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+class DisposablePostgres:
+    """Временный кластер PostgreSQL: создаётся при входе в with и удаляется при выходе."""
+    SERVER_OPTIONS = "-c listen_addresses='' -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+
+    def __init__(self, pg_bin: Optional[str] = None):
+        self.pg_bin = pg_bin or self._find_bin_dir()
+        self.directory = None
+        self.config = None
+
+    @staticmethod
+    def _find_bin_dir() -> str:
+        initdb = shutil.which('initdb')
+        if initdb:
+            return os.path.dirname(initdb)
+        candidates = sorted(glob.glob('/usr/lib/postgresql/*/bin/initdb'))
+        if candidates:
+            return os.path.dirname(candidates[-1])
+        raise FileNotFoundError("initdb не найден: укажите каталог с программами PostgreSQL через --pg-bin")
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.directory = tempfile.mkdtemp(prefix='task1_pg_')
+        data_dir = os.path.join(self.directory, 'data')
+        port = self._free_port()
+        subprocess.run([os.path.join(self.pg_bin, 'initdb'), '-D', data_dir, '-U', 'postgres', '--auth=trust'],
+                       check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([os.path.join(self.pg_bin, 'pg_ctl'), '-D', data_dir, '-l', os.path.join(self.directory, 'server.log'),
+                        '-o', f"-p {port} -k {self.directory} {self.SERVER_OPTIONS}", '-w', 'start'],
+                       check=True, stdout=subprocess.DEVNULL)
+        self.config = {'dbname': 'postgres', 'user': 'postgres', 'host': self.directory, 'port': str(port)}
+        return self.config
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            subprocess.run([os.path.join(self.pg_bin, 'pg_ctl'), '-D', os.path.join(self.directory, 'data'),
+                            '-m', 'immediate', 'stop'], check=False, stdout=subprocess.DEVNULL)
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+class ScaleBenchmark:
+    """Класс для замера стадий task_1 на синтетических данных разного размера."""
+    def __init__(self, conn, repeat: int, chunk_size: int):
+        self.conn = conn
+        self.repeat = repeat
+        self.chunk_size = chunk_size
+        self.results: List[Dict[str, Any]] = []
+
+    def _measure(self, size: int, stage: str, rows: int, run: Callable[[], Any],
+                 setup: Optional[Callable[[], None]] = None, repeat: Optional[int] = None) -> Any:
+        """Выполняет стадию несколько раз и добавляет её показатели в results."""
+        samples = []
+        result = None
+        reset_peak_rss()
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            result = run()
+            samples.append(time.perf_counter() - started)
+        median = percentile(samples, 50)
+        self.results.append({
+            'size': size,
+            'stage': stage,
+            'rows': rows,
+            'samples_s': samples,
+            'median_s': median,
+            'p50_s': median,
+            'p95_s': percentile(samples, 95),
+            'p99_s': percentile(samples, 99),
+            'throughput_rows_s': rows / median if median else None,
+            'peak_rss_mb': read_peak_rss_mb(),
+        })
+        entry = self.results[-1]
+        print(f"  {stage:<40} медиана {median:>9.3f} с, p95 {entry['p95_s']:>9.3f} с, "
+              f"{entry['throughput_rows_s'] or 0:>12.0f} строк/с, пик {entry['peak_rss_mb']:>8.1f} МБ")
+        return result
+
+    def _truncate(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("TRUNCATE students, rooms;")
+        self.conn.commit()
+
+    def _analyze(self):
+        self.conn.autocommit = True
+        with self.conn.cursor() as cursor:
+            cursor.execute("ANALYZE rooms;")
+            cursor.execute("ANALYZE students;")
+        self.conn.autocommit = False
+
+    def run_size(self, generator: DatasetGenerator, directory: str):
+        size = generator.students
+        print(f"\n--- {size} студентов, {generator.rooms} комнат ---")
+        paths = self._measure(size, 'generate', generator.students + generator.rooms,
+                              lambda: generator.write(directory), repeat=1)
+
+        self._measure(size, 'parse students', size,
+                      lambda: sum(1 for _ in iter_json_records(paths['students'])))
+
+        prepare_schema(self.conn)
+        try:
+            loader = DataLoader(self.conn)
+
+            def load():
+                loader.load_data_copy(paths['rooms'], 'rooms', self.chunk_size)
+                loader.load_data_copy(paths['students'], 'students', self.chunk_size)
+
+            self._measure(size, 'load copy', generator.students + generator.rooms, load, setup=self._truncate)
+            self._analyze()
+
+            runner = QueryRunner(self.conn)
+            results = {}
+            for name in QueryRunner.REPORT_QUERIES:
+                results[name] = self._measure(size, f"query {name}", size, getattr(runner, f"get_{name}"))
+            self.conn.rollback()
+
+            report_rows = sum(len(rows) for rows in results.values())
+            self._measure(size, 'export json', report_rows, lambda: DataExporter.to_json(results))
+            self._measure(size, 'export xml', report_rows, lambda: DataExporter.to_xml(results))
+        finally:
+            drop_schema(self.conn)
+            for path in paths.values():
+                os.remove(path)
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                          tolerance: float) -> List[str]:
+    """Печатает сравнение с базой и возвращает описания регрессий."""
+    previous = {(entry['size'], entry['stage']): entry for entry in baseline}
+    regressions = []
+    print("\n--- Сравнение с базой ---")
+    print(f"{'размер':>10} {'стадия':<40} {'было, с':>10} {'стало, с':>10} {'время':>8} {'память':>8}")
+    for entry in results:
+        base = previous.get((entry['size'], entry['stage']))
+        if base is None:
+            print(f"{entry['size']:>10} {entry['stage']:<40} {'-':>10} {entry['median_s']:>10.3f} {'новая':>8}")
+            continue
+        time_change = entry['median_s'] / base['median_s'] - 1 if base['median_s'] else 0.0
+        rss_growth = entry['peak_rss_mb'] - base['peak_rss_mb']
+        rss_change = rss_growth / base['peak_rss_mb'] if base['peak_rss_mb'] else 0.0
+        marks = []
+        if time_change > tolerance:
+            marks.append(f"время +{time_change:.0%}")
+        if rss_change > tolerance and rss_growth > RSS_NOISE_MB:
+            marks.append(f"память +{rss_change:.0%}")
+        print(f"{entry['size']:>10} {entry['stage']:<40} {base['median_s']:>10.3f} {entry['median_s']:>10.3f} "
+              f"{time_change:>+8.0%} {rss_change:>+8.0%}{'  РЕГРЕССИЯ' if marks else ''}")
+        if marks:
+            regressions.append(f"{entry['size']} / {entry['stage']}: {', '.join(marks)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Масштабный бенчмарк загрузки, запросов и экспорта task_1.")
+    parser.add_argument('--sizes', nargs='+', type=parse_count, default=[parse_count('10K'), parse_count('100K')],
+                        help='Количество студентов для каждого прогона (10K, 1M, 100M, ...)')
+    parser.add_argument('--students-per-room', type=int, default=20)
+    parser.add_argument('--skew', type=float, default=0.0, help='Неравномерность заполнения комнат (см. datagen.py)')
+    parser.add_argument('--male-ratio', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Сколько раз выполнять каждую стадию')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE)
+    parser.add_argument('--data-dir', type=str, default=None, help='Каталог для сгенерированных файлов')
+    parser.add_argument('--disposable', action='store_true', help='Поднять временный кластер PostgreSQL')
+    parser.add_argument('--pg-bin', type=str, default=None, help='Каталог с initdb и pg_ctl')
+    parser.add_argument('--output', type=str, default=SCALE_BENCH_RESULTS, help='Файл результатов (JSON)')
+    parser.add_argument('--baseline', type=str, default=SCALE_BENCH_BASELINE, help='Файл базы для сравнения')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как новую базу')
+    parser.add_argument('--tolerance', type=float, default=SCALE_BENCH_TOLERANCE)
+    args = parser.parse_args()
+
+    params = {key: getattr(args, key) for key in ('students_per_room', 'skew', 'male_ratio', 'seed', 'repeat',
+                                                   'chunk_size', 'disposable')}
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='task1_data_')
+    try:
+        with contextlib.ExitStack() as stack:
+            db_config = stack.enter_context(DisposablePostgres(args.pg_bin)) if args.disposable else DB_CONFIG
+            conn = psycopg2.connect(**db_config)
+            stack.callback(conn.close)
+            if args.disposable:
+                SchemaManager(conn).create_tables()
+            bench = ScaleBenchmark(conn, args.repeat, args.chunk_size)
+            for students in args.sizes:
+                rooms = max(1, students // args.students_per_room)
+                generator = DatasetGenerator(students, rooms, args.skew, args.male_ratio, args.seed)
+                bench.run_size(generator, data_dir)
+            server_version = conn.server_version
+    except psycopg2.OperationalError as e:
+        print(f"ОШИБКА ПОДКЛЮЧЕНИЯ: Не удалось подключиться к базе. Детали: {e}", file=sys.stderr)
+        sys.exit(1)
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        print(f"ОШИБКА ЗАПУСКА POSTGRESQL: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server_version': server_version,
+        'params': params,
+        'results': bench.results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты записаны в {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Результаты сохранены как база: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"База {args.baseline} не найдена - сравнение пропущено (запустите с --save-baseline).")
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('params') != params:
+        print(f"ПРЕДУПРЕЖДЕНИЕ: параметры базы {baseline.get('params')} отличаются от текущих {params}.", file=sys.stderr)
+    regressions = compare_with_baseline(bench.results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"\nНайдено регрессий: {len(regressions)}", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print("\nРегрессий не найдено.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Создание схемы и индексов для task_1.
+
+Запуск из каталога task_1:
+    python schema.py create           # таблицы и индексы
+    python schema.py drop-indexes     # перед массовой загрузкой
+    python schema.py create-indexes   # после массовой загрузки
+"""
+import argparse
+import psycopg2
+from config import DB_CONFIG
+
+TABLES_SQL = """
+    CREATE TABLE IF NOT EXISTS rooms (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        sex CHAR(1) NOT NULL,
+        birthday DATE NOT NULL,
+        room_id INTEGER NOT NULL REFERENCES rooms (id)
+    );
+"""
+
+# Вторичные индексы, которые можно удалять на время массовой загрузки.
+# Покрывающий индекс по room_id содержит все колонки students, нужные отчётам
+# QueryRunner, поэтому соединение с rooms и агрегаты обходятся index-only scan.
+SECONDARY_INDEXES = {
+    'students_room_id_covering_idx': "CREATE INDEX IF NOT EXISTS students_room_id_covering_idx "
+                                     "ON students (room_id) INCLUDE (birthday, sex);",
+}
+
+class SchemaManager:
+    """Класс для создания таблиц и управления вторичными индексами."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def create_tables(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(TABLES_SQL)
+        self.conn.commit()
+
+    def create_indexes(self):
+        """Создаёт вторичные индексы и обновляет статистику планировщика."""
+        with self.conn.cursor() as cursor:
+            for ddl in SECONDARY_INDEXES.values():
+                cursor.execute(ddl)
+            cursor.execute("ANALYZE rooms;")
+            cursor.execute("ANALYZE students;")
+        self.conn.commit()
+
+    def drop_indexes(self):
+        """Удаляет вторичные индексы, чтобы массовая вставка не обновляла их построчно."""
+        with self.conn.cursor() as cursor:
+            for name in SECONDARY_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name};")
+        self.conn.commit()
+
+    def create_all(self):
+        self.create_tables()
+        self.create_indexes()
+
+def main():
+    parser = argparse.ArgumentParser(description="Создание схемы и индексов базы студентов.")
+    parser.add_argument('command', choices=['create', 'drop-indexes', 'create-indexes'])
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        manager = SchemaManager(conn)
+        if args.command == 'create':
+            manager.create_all()
+            print("Таблицы и индексы созданы.")
+        elif args.command == 'drop-indexes':
+            manager.drop_indexes()
+            print("Вторичные индексы удалены.")
+        else:
+            manager.create_indexes()
+            print("Вторичные индексы созданы.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Модули task_1 импортируются плоско, как при запуске скриптов из каталога task_1."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
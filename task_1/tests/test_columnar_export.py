@@ -0,0 +1,36 @@
+import csv
+from decimal import Decimal
+import pytest
+
+pytest.importorskip('psycopg2')
+from main import REPORT_COLUMNS, ColumnarExporter, QueryRunner, records_to_batches
+
+AGES = [{'avg_age': None, 'room_name': 'Room #1'},
+        {'room_name': 'Room #2', 'avg_age': Decimal('19.5000000000000000')},
+        {'room_name': 'Room #3', 'avg_age': Decimal('21')}]
+
+def test_report_columns_cover_all_reports():
+    assert list(REPORT_COLUMNS) == list(QueryRunner.REPORT_QUERIES)
+
+def test_records_to_batches_uses_report_columns():
+    [(columns, type_codes, rows)] = records_to_batches(AGES, REPORT_COLUMNS['top5_rooms_smallest_avg_age'])
+    assert columns == ['room_name', 'avg_age'] and len(type_codes) == 2
+    assert rows[0] == ('Room #1', None)
+    # У пустого отчёта колонки и типы те же
+    [(columns, type_codes, rows)] = records_to_batches([], REPORT_COLUMNS['rooms_with_mixed_sexes'])
+    assert (columns, rows) == (['room_name'], []) and len(type_codes) == 1
+
+def test_empty_report_keeps_csv_header(tmp_path):
+    path = str(tmp_path / 'mixed.csv')
+    ColumnarExporter.write_csv(records_to_batches([], REPORT_COLUMNS['rooms_with_mixed_sexes']), path)
+    with open(path, newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == [['room_name']]
+
+def test_arrow_schema_does_not_depend_on_values():
+    pa = pytest.importorskip('pyarrow')
+    [batch] = ColumnarExporter._record_batches(records_to_batches(AGES, REPORT_COLUMNS['top5_rooms_smallest_avg_age']))
+    assert batch.schema.field('avg_age').type == pa.float64()
+    assert batch.column(1).to_pylist() == [None, 19.5, 21.0]
+    [empty] = ColumnarExporter._record_batches(records_to_batches([], REPORT_COLUMNS['rooms_with_student_count']))
+    assert empty.num_rows == 0
+    assert [(field.name, field.type) for field in empty.schema] == [('room_name', pa.string()), ('students_count', pa.int64())]
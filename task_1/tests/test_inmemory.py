@@ -0,0 +1,74 @@
+import datetime
+import json
+import pytest
+from inmemory import InMemoryAnalytics
+from reports import build_room_reports
+
+TODAY = datetime.date(2026, 3, 1)
+
+ROOMS = [
+    {'id': 1, 'name': 'Room 101'},
+    {'id': 2, 'name': 'Room 102'},
+    {'id': 3, 'name': 'Room 201'},
+    {'id': 4, 'name': 'Room 000'},  # пустая комната
+    {'id': 5, 'name': 'Room 301'},
+    {'id': 6, 'name': 'Room 302'},
+    {'id': 7, 'name': 'Room 303'},
+    {'id': 1, 'name': 'Duplicate'},  # повтор id - остаётся первая запись
+]
+
+STUDENTS = [
+    {'id': 1, 'birthday': '2003-05-15', 'name': 'A', 'room': 1, 'sex': 'M'},
+    {'id': 2, 'birthday': '2004-03-01', 'name': 'B', 'room': 1, 'sex': 'F'},  # день рождения сегодня
+    {'id': 3, 'birthday': '2004-03-02', 'name': 'C', 'room': 1, 'sex': 'M'},  # завтра
+    {'id': 4, 'birthday': '2000-02-29', 'name': 'D', 'room': 2, 'sex': 'F'},
+    {'id': 5, 'birthday': '1999-12-31', 'name': 'E', 'room': 2, 'sex': 'F'},
+    {'id': 6, 'birthday': '2006-07-07', 'name': 'F', 'room': 3, 'sex': 'M'},
+    {'id': 7, 'birthday': '1990-01-01', 'name': 'G', 'room': 5, 'sex': 'M'},
+    {'id': 8, 'birthday': '2008-01-01', 'name': 'H', 'room': 5, 'sex': 'F'},
+    {'id': 9, 'birthday': '2001-09-09', 'name': 'I', 'room': 6, 'sex': 'F'},
+    {'id': 10, 'birthday': '2002-09-09', 'name': 'J', 'room': 7, 'sex': 'M'},
+    {'id': 11, 'birthday': '2002-09-10', 'name': 'K', 'room': 7, 'sex': 'M'},
+    {'id': 12, 'birthday': '1980-01-01', 'name': 'L', 'room': 99, 'sex': 'F'},  # комнаты нет - как при JOIN
+    {'id': 3, 'birthday': '1970-01-01', 'name': 'Dup', 'room': 2, 'sex': 'F'},  # повтор id
+]
+
+def _age(birthday: str) -> int:
+    born = datetime.date.fromisoformat(birthday)
+    return TODAY.year - born.year - ((TODAY.month, TODAY.day) < (born.month, born.day))
+
+def reference_room_stats():
+    """Показатели по комнатам так, как их считает QueryRunner.ROOM_STATS_QUERY, построчно на Python."""
+    rooms = {}
+    for room in ROOMS:
+        rooms.setdefault(room['id'], room['name'])
+    students = {}
+    for student in STUDENTS:
+        students.setdefault(student['id'], student)
+    stats = []
+    for room_id, name in sorted(rooms.items(), key=lambda item: (item[1], item[0])):
+        members = [s for s in students.values() if s['room'] == room_id]
+        ages = [_age(s['birthday']) for s in members]
+        sexes = {s['sex'] for s in members}
+        stats.append({
+            'room_name': name,
+            'students_count': len(members),
+            'avg_age': sum(ages) / len(ages) if ages else None,
+            'min_age': min(ages) if ages else None,
+            'max_age': max(ages) if ages else None,
+            'has_mixed_sexes': len(sexes) > 1,
+        })
+    return stats
+
+@pytest.fixture
+def engine(tmp_path):
+    rooms_path, students_path = tmp_path / 'rooms.json', tmp_path / 'students.jsonl'
+    rooms_path.write_text(json.dumps(ROOMS), encoding='utf-8')
+    students_path.write_text('\n'.join(json.dumps(s) for s in STUDENTS), encoding='utf-8')
+    return InMemoryAnalytics.from_json(str(students_path), str(rooms_path), chunk_size=4, today=TODAY)
+
+def test_room_stats_match_reference(engine):
+    assert engine.get_room_stats() == reference_room_stats()
+
+def test_reports_match_build_room_reports(engine):
+    assert engine.get_reports() == build_room_reports(reference_room_stats())
@@ -0,0 +1,49 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+pytest.importorskip('psycopg2')
+from pipeline import StageTimer, load_table
+
+class SlowLoader:
+    """Вместо ParallelLoader: запись порции идёт дольше, чем разбор следующей."""
+    def __init__(self):
+        self.written = []
+        self.active = threading.Event()
+
+    def load_chunk(self, table_name, partition, records):
+        self.active.set()
+        time.sleep(0.2)
+        self.written.append(records)
+        self.active.clear()
+        return len(records)
+
+def _run(loader, path, chunk_size):
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as parse_executor, ThreadPoolExecutor(max_workers=1) as db_executor:
+            try:
+                return await load_table(loader, parse_executor, db_executor, str(path), 'rooms', chunk_size,
+                                        StageTimer())
+            finally:
+                # Состояние на момент выхода из load_table, до того как shutdown дождётся потоков
+                loader.on_exit = (len(loader.written), loader.active.is_set())
+    return asyncio.run(run())
+
+def test_load_table_writes_all_chunks(tmp_path):
+    path = tmp_path / 'rooms.json'
+    path.write_text(json.dumps([{'id': i, 'name': f"Room #{i}"} for i in range(5)]))
+    loader = SlowLoader()
+    assert _run(loader, path, 2) == 5
+    assert [len(records) for records in loader.written] == [2, 2, 1]
+
+def test_parse_error_waits_for_pending_write(tmp_path):
+    path = tmp_path / 'rooms.json'
+    path.write_text(json.dumps([{'id': 0, 'name': 'Room #0'}, {'id': 1, 'name': 'Room #1'}, {'id': 2}]))
+    loader = SlowLoader()
+    with pytest.raises(KeyError):
+        _run(loader, path, 2)
+    # Ошибка разбора второй порции пробрасывается только после того, как первая записана
+    assert loader.on_exit == (1, False)
@@ -0,0 +1,44 @@
+import os
+import pickle
+import sys
+import types
+import pytest
+from result_cache import ResultCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path), 2 ** 20)
+
+def test_put_get_and_miss(cache):
+    key = cache.make_key("SELECT 1;", 'v1')
+    assert cache.get(key) is None
+    cache.put(key, [{'room_name': 'Room #1'}])
+    assert cache.get(key) == [{'room_name': 'Room #1'}]
+    assert cache.make_key("SELECT  1;", 'v1') == key and cache.make_key("SELECT 1;", 'v2') != key
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+def _pickle_of_removed_class() -> bytes:
+    """Запись со ссылкой на класс из модуля, которого больше нет (ModuleNotFoundError при чтении)."""
+    module = types.ModuleType('removed_report_module')
+    module.Row = type('Row', (), {'__module__': module.__name__})
+    sys.modules[module.__name__] = module
+    try:
+        return pickle.dumps([module.Row()])
+    finally:
+        del sys.modules[module.__name__]
+
+@pytest.mark.parametrize('payload', [
+    b'',  # пустой файл - EOFError
+    pickle.dumps([{'a': 1}] * 100)[:-20],  # обрезанная запись
+    _pickle_of_removed_class(),
+    b'not a pickle at all',
+])
+def test_corrupt_entry_is_removed_and_counted_as_miss(cache, payload):
+    key = cache.make_key("SELECT 1;", 'v1')
+    with open(os.path.join(cache.directory, key + ResultCache.SUFFIX), 'wb') as f:
+        f.write(payload)
+    assert cache.get(key) is None
+    assert not os.path.exists(os.path.join(cache.directory, key + ResultCache.SUFFIX))
+    assert cache.stats()['misses'] == 1
+    cache.put(key, [])
+    assert cache.get(key) == []